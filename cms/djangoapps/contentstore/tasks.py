@@ -3,17 +3,39 @@ This file contains celery tasks for contentstore views
 """
 
 from celery.task import task
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousOperation
+from django.core.files import File
+from django.core.files.storage import get_storage_class
+from django.core.files.temp import NamedTemporaryFile
+from django.utils.translation import ugettext as _
 import json
 import logging
+import os
+import shutil
+import tarfile
+from path import path
+from tempfile import mkdtemp
+from xmodule.contentstore.django import contentstore
+from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.course_module import CourseFields
 
 from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
 from course_action_state.models import CourseRerunState
-from contentstore.utils import initialize_permissions
+from contentstore.utils import initialize_permissions, reverse_usage_url
+from extract_tar import safetar_extractall
 from opaque_keys.edx.keys import CourseKey
 
+log = logging.getLogger(__name__)
+
+# Seconds to keep the status of an import or export for
+IMPORT_EXPORT_STATUS_TIMEOUT = 60 * 60 * 24
+
 
 @task()
 def rerun_course(source_course_key_string, destination_course_key_string, user_id, fields=None):
@@ -66,3 +88,212 @@ def deserialize_fields(json_fields):
     for field_name, value in fields.iteritems():
         fields[field_name] = getattr(CourseFields, field_name).from_json(value)
     return fields
+
+
+def course_import_dir(course_key):
+    """
+    Return the directory that an archive uploaded for import into the course is
+    written to and extracted in. It must be shared by Studio and its workers.
+    """
+    course_subdir = u"{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
+    return path(settings.GITHUB_REPO_ROOT) / course_subdir
+
+
+def _import_status_key(user_id, course_key_string, filename):
+    """
+    Return the cache key of the status of a user's import of an archive into a course.
+    """
+    return u'contentstore.import_status.{}.{}.{}'.format(user_id, course_key_string, filename)
+
+
+def get_import_status(user_id, course_key_string, filename):
+    """
+    Return the status of a user's import of an archive into a course, as a dict
+    with its 'ImportStatus' stage and an error 'Message'. The stage is 0 if no
+    import is known.
+    """
+    status = cache.get(_import_status_key(user_id, course_key_string, filename))
+    return status or {'ImportStatus': 0, 'Message': ''}
+
+
+def set_import_status(user_id, course_key_string, filename, stage, message=u''):
+    """
+    Record the stage that a user's import of an archive into a course has reached.
+    Failed imports have the negated stage they failed at, and an error message.
+    """
+    cache.set(
+        _import_status_key(user_id, course_key_string, filename),
+        {'ImportStatus': stage, 'Message': message},
+        IMPORT_EXPORT_STATUS_TIMEOUT
+    )
+
+
+@task()
+def import_olx(user_id, course_key_string, archive_path, filename):
+    """
+    Import a course from an uploaded .tar.gz archive in a new celery task.
+
+    The archive is extracted next to itself, and the whole directory is removed
+    afterwards, however the import went.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    course_dir = course_import_dir(course_key)
+    stage = 1
+
+    def fail(message):
+        """Record that the import failed at the current stage."""
+        set_import_status(user_id, course_key_string, filename, -stage, message)
+
+    try:
+        set_import_status(user_id, course_key_string, filename, stage)
+        with tarfile.open(archive_path) as tar_file:
+            try:
+                safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
+            except SuspiciousOperation as exc:
+                fail(u'{} {}'.format(_('Unsafe tar file. Aborting import.'), exc.args[0]))
+                return "unsafe archive"
+
+        log.info(u"Course import %s: Uploaded file extracted", course_key)
+        stage = 2
+        set_import_status(user_id, course_key_string, filename, stage)
+
+        # find the first directory with a 'course.xml' file
+        dirpath = next(
+            (dirpath for dirpath, __, filenames in os.walk(course_dir) if 'course.xml' in filenames),
+            None
+        )
+        if dirpath is None:
+            fail(_('Could not find the course.xml file in the package.'))
+            return "no course.xml"
+
+        dirpath = os.path.relpath(dirpath, settings.GITHUB_REPO_ROOT)
+        log.debug(u'found course.xml at %s', dirpath)
+
+        log.info(u"Course import %s: Extracted file verified", course_key)
+        stage = 3
+        set_import_status(user_id, course_key_string, filename, stage)
+
+        course_items = import_from_xml(
+            modulestore(),
+            user_id,
+            settings.GITHUB_REPO_ROOT,
+            [dirpath],
+            load_error_modules=False,
+            static_content_store=contentstore(),
+            target_course_id=course_key,
+        )
+        log.debug(u'new course at %s', course_items[0].location)
+
+        log.info(u"Course import %s: Course import successful", course_key)
+        set_import_status(user_id, course_key_string, filename, 4)
+        return "succeeded"
+
+    # catch all exceptions so that the failure shows in the import status
+    except Exception as exc:  # pylint: disable=broad-except
+        log.exception(u"error importing course")
+        fail(unicode(exc))
+        return "exception: " + unicode(exc)
+
+    finally:
+        if course_dir.isdir():
+            shutil.rmtree(course_dir)
+            log.info(u"Course import %s: Temp data cleared", course_key)
+
+
+def _export_status_key(user_id, course_key_string):
+    """
+    Return the cache key of the status of a user's latest export of a course.
+    """
+    return u'contentstore.export_status.{}.{}'.format(user_id, course_key_string)
+
+
+def get_export_status(user_id, course_key_string):
+    """
+    Return the status of a user's latest export of a course, as a dict with its
+    'ExportStatus' and, for a failed export, what went wrong. See
+    `contentstore.views.export_status_handler` for the statuses.
+    """
+    status = cache.get(_export_status_key(user_id, course_key_string))
+    return status or {'ExportStatus': 0}
+
+
+def set_export_status(user_id, course_key_string, export_status, **info):
+    """
+    Record the status of a user's export of a course, with any other info about it.
+    """
+    info['ExportStatus'] = export_status
+    cache.set(_export_status_key(user_id, course_key_string), info, IMPORT_EXPORT_STATUS_TIMEOUT)
+
+
+def export_storage():
+    """
+    Return the private file storage that the archives of course exports are kept in
+    until they are downloaded through `contentstore.views.export_handler`.
+    """
+    return get_storage_class(settings.COURSE_EXPORT_STORAGE)(**settings.COURSE_EXPORT_STORAGE_KWARGS)
+
+
+def export_output_path(user_id, course_key, name):
+    """
+    Return where in the export storage a user's export of a course is kept.
+    """
+    course_subdir = u"{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
+    return u'course_exports/{}/{}/{}.tar.gz'.format(user_id, course_subdir, name)
+
+
+@task()
+def export_olx(user_id, course_key_string):
+    """
+    Export a course to a .tar.gz archive in the export storage in a new celery
+    task, replacing the user's last export of the course.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    set_export_status(user_id, course_key_string, 1)
+    root_dir = path(mkdtemp())
+    try:
+        course_module = modulestore().get_course(course_key)
+        name = course_module.url_name
+        export_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
+
+        with NamedTemporaryFile(prefix=name + '.', suffix='.tar.gz') as export_file:
+            with tarfile.open(fileobj=export_file, mode='w:gz') as tar_file:
+                tar_file.add(root_dir / name, arcname=name)
+            export_file.seek(0)
+
+            storage = export_storage()
+            output_path = export_output_path(user_id, course_key, name)
+            if storage.exists(output_path):
+                storage.delete(output_path)
+            output_path = storage.save(output_path, File(export_file))
+
+        set_export_status(user_id, course_key_string, 2, Output=output_path)
+        return "succeeded"
+
+    except SerializationError as exc:
+        log.exception(u'There was an error exporting course %s', course_key)
+        parent = None
+        try:
+            failed_item = modulestore().get_item(exc.location)
+            parent_loc = modulestore().get_parent_location(failed_item.location)
+            if parent_loc is not None:
+                parent = modulestore().get_item(parent_loc)
+        except:  # pylint: disable=bare-except
+            # if we have a nested exception, then we'll show the more generic error message
+            pass
+
+        set_export_status(
+            user_id, course_key_string, -1,
+            ErrMsg=str(exc),
+            HasUnit=parent is not None and parent.location.category == 'vertical',
+            EditUnitUrl=reverse_usage_url("container_handler", parent.location) if parent else "",
+        )
+        return "exception: " + str(exc)
+
+    # catch all exceptions so that the failure shows in the export status
+    except Exception as exc:  # pylint: disable=broad-except
+        log.exception(u'There was an error exporting course %s', course_key)
+        set_export_status(user_id, course_key_string, -1, ErrMsg=str(exc), HasUnit=False, EditUnitUrl="")
+        return "exception: " + str(exc)
+
+    finally:
+        shutil.rmtree(root_dir)
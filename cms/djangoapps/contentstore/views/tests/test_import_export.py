@@ -82,18 +82,25 @@ class ImportTestCase(CourseTestCase):
                     "name": self.bad_tar,
                     "course-data": [btar]
                 })
-        self.assertEquals(resp.status_code, 415)
+        self.assertEquals(resp.status_code, 200)
         # Check that `import_status` returns the appropriate stage (i.e., the
         # stage at which import failed).
+        import_status = self._import_status(self.bad_tar)
+        self.assertEquals(import_status["ImportStatus"], -2)
+        self.assertIn("Could not find the course.xml file", import_status["Message"])
+
+    def _import_status(self, tarpath):
+        """
+        Return the status of the import of the tar file.
+        """
         resp_status = self.client.get(
             reverse_course_url(
                 'import_status_handler',
                 self.course.id,
-                kwargs={'filename': os.path.split(self.bad_tar)[1]}
+                kwargs={'filename': os.path.split(tarpath)[1]}
             )
         )
-
-        self.assertEquals(json.loads(resp_status.content)["ImportStatus"], -2)
+        return json.loads(resp_status.content)
 
     def test_with_coursexml(self):
         """
@@ -105,6 +112,11 @@ class ImportTestCase(CourseTestCase):
             resp = self.client.post(self.url, args)
 
         self.assertEquals(resp.status_code, 200)
+        self.assertEquals(self._import_status(self.good_tar)["ImportStatus"], 4)
+        # the uploaded and extracted files are removed afterwards
+        self.assertFalse(os.path.exists(settings.GITHUB_REPO_ROOT / "{0}-{1}-{2}".format(
+            self.course.id.org, self.course.id.course, self.course.id.run
+        )))
 
     def test_import_in_existing_course(self):
         """
@@ -213,7 +225,7 @@ class ImportTestCase(CourseTestCase):
         outside or directly in the working directory,
             'special files' (character device, block device or FIFOs),
 
-        all raise exceptions/400s.
+        all fail the import at the first stage.
         """
 
         def try_tar(tarpath):
@@ -221,8 +233,10 @@ class ImportTestCase(CourseTestCase):
             with open(tarpath) as tar:
                 args = {"name": tarpath, "course-data": [tar]}
                 resp = self.client.post(self.url, args)
-            self.assertEquals(resp.status_code, 400)
-            self.assertTrue("SuspiciousFileOperation" in resp.content)
+            self.assertEquals(resp.status_code, 200)
+            import_status = self._import_status(tarpath)
+            self.assertEquals(import_status["ImportStatus"], -1)
+            self.assertIn("Unsafe tar file", import_status["Message"])
 
         try_tar(self._fifo_tar())
         try_tar(self._symlink_tar())
@@ -273,6 +287,7 @@ class ExportTestCase(CourseTestCase):
         """
         Get tar.gz file, using HTTP_ACCEPT.
         """
+        self._export()
         resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
         self._verify_export_succeeded(resp)
 
@@ -280,13 +295,54 @@ class ExportTestCase(CourseTestCase):
         """
         Get tar.gz file, using URL parameter.
         """
+        self._export()
         resp = self.client.get(self.url + '?_accept=application/x-tgz')
         self._verify_export_succeeded(resp)
 
+    def test_export_targz_deleted(self):
+        """
+        The tar.gz file is deleted once it has been downloaded.
+        """
+        self._export()
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self._verify_export_succeeded(resp)
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 404)
+
+    def test_export_targz_not_exported(self):
+        """
+        There's no tar.gz file before the course has been exported.
+        """
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self.assertEquals(resp.status_code, 404)
+        self.assertEquals(self._export_status()["ExportStatus"], 0)
+
+    def _export(self):
+        """
+        Export the course, and return the status of the export.
+        """
+        resp = self.client.post(self.url, HTTP_ACCEPT='application/json')
+        self.assertEquals(resp.status_code, 200)
+        return self._export_status()
+
+    def _export_status(self):
+        """
+        Return the status of the export of the course.
+        """
+        resp = self.client.get(reverse_course_url('export_status_handler', self.course.id))
+        self.assertEquals(resp.status_code, 200)
+        return json.loads(resp.content)
+
     def _verify_export_succeeded(self, resp):
         """ Export success helper method. """
+        self.assertEquals(self._export_status()["ExportStatus"], 2)
         self.assertEquals(resp.status_code, 200)
         self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
+        with tempfile.TemporaryFile() as export_file:
+            export_file.write(resp.content)
+            export_file.seek(0)
+            with tarfile.open(fileobj=export_file) as tar_file:
+                self.assertIn('{}/course.xml'.format(self.course.location.name), tar_file.getnames())
 
     def test_export_failure_top_level(self):
         """
@@ -294,7 +350,7 @@ class ExportTestCase(CourseTestCase):
         """
         fake_xblock = ItemFactory.create(parent_location=self.course.location, category='aawefawef')
         self.store.publish(fake_xblock.location, self.user.id)
-        self._verify_export_failure(u'/container/{}'.format(self.course.location))
+        self._verify_export_failure(u'/container/{}'.format(self.course.location), False)
 
     def test_export_failure_subsection_level(self):
         """
@@ -306,12 +362,15 @@ class ExportTestCase(CourseTestCase):
             category='aawefawef'
         )
 
-        self._verify_export_failure(u'/container/{}'.format(vertical.location))
+        self._verify_export_failure(u'/container/{}'.format(vertical.location), True)
 
-    def _verify_export_failure(self, expected_text):
+    def _verify_export_failure(self, expected_url, has_unit):
         """ Export failure helper method. """
+        status = self._export()
+        self.assertEquals(status["ExportStatus"], -1)
+        self.assertIn('Unable to create xml for module', status["ErrMsg"])
+        self.assertIn(expected_url, status["EditUnitUrl"])
+        self.assertEquals(status["HasUnit"], has_unit)
+
         resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
-        self.assertEquals(resp.status_code, 200)
-        self.assertIsNone(resp.get('Content-Disposition'))
-        self.assertContains(resp, 'Unable to create xml for module')
-        self.assertContains(resp, expected_text)
+        self.assertEquals(resp.status_code, 404)
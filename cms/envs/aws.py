@@ -101,6 +101,11 @@ if STATIC_URL_BASE:
 # for course data
 GITHUB_REPO_ROOT = ENV_TOKENS.get('GITHUB_REPO_ROOT', GITHUB_REPO_ROOT)
 
+# Course exports are kept, until they are downloaded, as private files in the
+# default file storage's bucket unless a storage of their own is configured
+COURSE_EXPORT_STORAGE = ENV_TOKENS.get('COURSE_EXPORT_STORAGE', DEFAULT_FILE_STORAGE)
+COURSE_EXPORT_STORAGE_KWARGS = ENV_TOKENS.get('COURSE_EXPORT_STORAGE_KWARGS', {'acl': 'private'})
+
 # STATIC_ROOT specifies the directory where static files are
 # collected
 
@@ -238,7 +243,9 @@ if AWS_SECRET_ACCESS_KEY == "":
 DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+ASSET_DISK_CACHE = ENV_TOKENS.get('ASSET_DISK_CACHE', ASSET_DISK_CACHE)
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
+SPLIT_STRUCTURE_CACHE_MAX_BLOCKS = ENV_TOKENS.get('SPLIT_STRUCTURE_CACHE_MAX_BLOCKS', SPLIT_STRUCTURE_CACHE_MAX_BLOCKS)
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
 DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
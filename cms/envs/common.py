@@ -120,6 +120,11 @@ ENV_ROOT = REPO_ROOT.dirname()  # virtualenv dir /edx-platform is in
 
 GITHUB_REPO_ROOT = ENV_ROOT / "data"
 
+# The storage that the archives of course exports are kept in until they are downloaded.
+# Only Studio serves them, so this must not be publicly readable (e.g. not MEDIA_ROOT).
+COURSE_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
+COURSE_EXPORT_STORAGE_KWARGS = {'location': ENV_ROOT / "course_exports"}
+
 sys.path.append(REPO_ROOT)
 sys.path.append(PROJECT_ROOT / 'djangoapps')
 sys.path.append(COMMON_ROOT / 'djangoapps')
@@ -265,6 +270,16 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# The total number of blocks split's process-wide cache of course structures may hold (0 disables it)
+SPLIT_STRUCTURE_CACHE_MAX_BLOCKS = 50000
+
+# Assets too big for memcached are kept in the directory ROOT, up to MAX_BYTES
+# in all, and served from there. Set ROOT to enable.
+ASSET_DISK_CACHE = {
+    'ROOT': None,
+    'MAX_BYTES': 2 * 1024 * 1024 * 1024,
+}
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -618,6 +633,10 @@ INSTALLED_APPS = (
     # Course action state
     'course_action_state',
 
+    # Summaries of courses, which are deleted when a course is published. The LMS
+    # reads them, so it has to share the database and default cache with the CMS.
+    'course_summary',
+
     # Additional problem types
     'edx_jsme',    # Molecular Structure
 )
@@ -46,6 +46,7 @@ TEST_ROOT = path('test_root')
 STATIC_ROOT = TEST_ROOT / "staticfiles"
 
 GITHUB_REPO_ROOT = TEST_ROOT / "data"
+COURSE_EXPORT_STORAGE_KWARGS = {'location': TEST_ROOT / "course_exports"}
 COMMON_TEST_DATA_ROOT = COMMON_ROOT / "test" / "data"
 
 # For testing "push to lms"
@@ -74,6 +75,9 @@ STATICFILES_STORAGE = 'pipeline.storage.NonPackagingPipelineStorage'
 STATIC_URL = "/static/"
 PIPELINE_ENABLED = False
 
+# The structure cache outlives each test's modulestore, so it would change the mongo call counts tests expect
+SPLIT_STRUCTURE_CACHE_MAX_BLOCKS = 0
+
 # Update module store settings per defaults for tests
 update_module_store_settings(
     MODULESTORE,
@@ -1,6 +1,8 @@
-define(['gettext', 'js/views/feedback_prompt'], function(gettext, PromptView) {
+define([
+    'jquery', 'underscore', 'gettext', 'js/views/feedback_prompt', 'js/views/feedback_notification'
+], function($, _, gettext, PromptView, NotificationView) {
     'use strict';
-    return function (hasUnit, editUnitUrl, courseHomeUrl, errMsg) {
+    var showError = function (hasUnit, editUnitUrl, courseHomeUrl, errMsg) {
         var dialog;
         if(hasUnit) {
             dialog = new PromptView({
@@ -54,4 +56,44 @@ define(['gettext', 'js/views/feedback_prompt'], function(gettext, PromptView) {
         $('body').addClass('js');
         dialog.show();
     };
+
+    /**
+     * Check the status of the export every `timeout` milliseconds, until it has
+     * either succeeded, when the exported course is downloaded, or failed.
+     */
+    var pollExportStatus = function (exportUrl, exportStatusUrl, courseHomeUrl, notification, timeout) {
+        $.getJSON(exportStatusUrl, function (data) {
+            if (data.ExportStatus === 1) {
+                setTimeout(function () {
+                    pollExportStatus(exportUrl, exportStatusUrl, courseHomeUrl, notification, timeout);
+                }, timeout);
+                return;
+            }
+            notification.hide();
+            if (data.ExportStatus === 2) {
+                document.location = exportUrl + '?_accept=application/x-tgz';
+            } else {
+                showError(data.HasUnit, data.EditUnitUrl, courseHomeUrl, _.escape(data.ErrMsg || ''));
+            }
+        });
+    };
+
+    return function (exportUrl, exportStatusUrl, courseHomeUrl) {
+        $('.action-export').click(function (event) {
+            var notification = new NotificationView.Mini({
+                title: gettext('Exporting&hellip;')
+            });
+            event.preventDefault();
+            notification.show();
+            $.ajax({
+                url: exportUrl,
+                type: 'POST',
+                dataType: 'json'
+            }).done(function () {
+                pollExportStatus(exportUrl, exportStatusUrl, courseHomeUrl, notification, 1000);
+            }).fail(function () {
+                notification.hide();
+            });
+        });
+    };
 });
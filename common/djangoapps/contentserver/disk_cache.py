@@ -0,0 +1,207 @@
+"""
+A local disk cache of asset contents, so that popular assets too big for
+memcached don't have to be streamed out of GridFS on every request.
+
+Files are keyed by the asset key and its last modified time, so a new version of
+an asset simply gets a new file, and are served out of a memory map.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContent, STREAM_DATA_CHUNK_SIZE
+
+log = logging.getLogger(__name__)
+
+# Stream the memory mapped files in bigger chunks than GridFS, as no query is needed for each
+MAPPED_CHUNK_SIZE = 64 * STREAM_DATA_CHUNK_SIZE
+
+
+def content_digest(location, last_modified_at):
+    """
+    Return a hex digest identifying the version of the asset at `location`
+    which was last modified at `last_modified_at`.
+    """
+    return hashlib.sha1(u'{}@{}'.format(location, last_modified_at.isoformat()).encode('utf-8')).hexdigest()
+
+
+class MappedContent(StaticContent):
+    """
+    An asset whose contents are read from a memory map of a file in the disk cache.
+
+    The file is mapped right away, so the contents stay readable even if the file
+    is evicted before they are streamed.  Raises IOError or OSError if the file
+    can't be mapped.
+    """
+    def __init__(self, content, path):
+        super(MappedContent, self).__init__(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked
+        )
+        self.path = path
+        self._mapped = None
+        if self.length:
+            # empty files can't be mapped
+            with open(path, 'rb') as asset_file:
+                self._mapped = mmap.mmap(asset_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def stream_data(self):
+        return self.stream_data_in_range(0, self.length - 1)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        for position in xrange(first_byte, last_byte + 1, MAPPED_CHUNK_SIZE):
+            yield self._mapped[position:min(position + MAPPED_CHUNK_SIZE, last_byte + 1)]
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+
+
+class AssetDiskCache(object):
+    """
+    An LRU cache of asset contents in the files of the directory `root`, which
+    evicts the least recently used files once they add up to more than `max_bytes`.
+
+    The processes of a server can share the directory: the modification time of
+    each file records when any of them last used it, and the directory is
+    measured afresh whenever a file is added, so the budget covers the files of
+    every process.
+    """
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if not os.path.isdir(root):
+            os.makedirs(root)
+
+    def _path(self, content):
+        """
+        The path of the file for this version of `content`
+        """
+        return os.path.join(self.root, content_digest(content.location, content.last_modified_at))
+
+    def is_cacheable(self, content):
+        """
+        Return whether the contents of `content` fit in the cache.
+        """
+        return content.length is not None and content.length <= self.max_bytes
+
+    def get(self, content):
+        """
+        Return a MappedContent for `content` if its contents are in the cache, else None.
+
+        `content` only needs the metadata of the asset, its contents aren't read.
+        """
+        path = self._path(content)
+        try:
+            mapped = MappedContent(content, path)
+        except (IOError, OSError):
+            # not cached, or another process evicted it
+            return None
+        try:
+            # mark the file as recently used, for every process
+            os.utime(path, None)
+        except OSError:
+            pass
+        return mapped
+
+    def put(self, content):
+        """
+        Write the contents of `content`, which must be cacheable, to the cache,
+        and return a MappedContent for them.  Return None if writing them fails,
+        in which case the stream of `content` has been read.
+        """
+        path = self._path(content)
+        # write to a temporary file first, so no one sees part of the contents
+        handle, temp_path = tempfile.mkstemp(dir=self.root, prefix='.')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in content.stream_data():
+                    temp_file.write(chunk)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            log.exception(u"Could not cache the contents of %s", unicode(content.location))
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return None
+        self._evict()
+        try:
+            return MappedContent(content, path)
+        except (IOError, OSError):
+            return None
+
+    def _files(self):
+        """
+        Return a list of (modification time, path, size) of the files in the
+        cache directory, least recently used first.
+        """
+        files = []
+        for name in os.listdir(self.root):
+            if name.startswith('.'):
+                # still being written
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # another process evicted it
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        files.sort()
+        return files
+
+    def size(self):
+        """
+        Return the total size of the files in the cache directory.
+        """
+        return sum(size for __, __, size in self._files())
+
+    def _evict(self):
+        """
+        Remove the least recently used files in the cache directory until they
+        fit in the budget.
+        """
+        with self._lock:
+            files = self._files()
+            total = sum(size for __, __, size in files)
+            for __, path, size in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    # any open memory maps of the file stay valid
+                    os.remove(path)
+                except OSError:
+                    # another process evicted it already
+                    pass
+                total -= size
+
+
+_disk_caches = {}
+_disk_caches_lock = threading.Lock()
+
+
+def get_disk_cache():
+    """
+    Return the AssetDiskCache configured by settings.ASSET_DISK_CACHE, or None
+    if assets shouldn't be cached on disk.
+    """
+    config = settings.ASSET_DISK_CACHE
+    if not config.get('ROOT'):
+        return None
+    key = (config['ROOT'], config['MAX_BYTES'])
+    with _disk_caches_lock:
+        if key not in _disk_caches:
+            _disk_caches[key] = AssetDiskCache(*key)
+        return _disk_caches[key]
@@ -15,6 +15,7 @@ from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from cache_toolbox.core import get_cached_content, set_cached_content
+from contentserver.disk_cache import content_digest, get_disk_cache
 from xmodule.exceptions import NotFoundError
 
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
@@ -56,6 +57,9 @@ class StaticContentServer(object):
                         # since we've queried as a stream, let's read in the stream into memory to set in cache
                         content = content.copy_to_in_mem()
                         set_cached_content(content)
+                    else:
+                        # too big for memcached, so keep it on local disk
+                        content = self.get_disk_cached_content(loc, content)
             else:
                 # NOP here, but we may wish to add a "cache-hit" counter in the future
                 pass
@@ -78,9 +82,14 @@ class StaticContentServer(object):
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
 
+            etag = '"{}"'.format(content_digest(loc, content.last_modified_at))
+
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # etags or timestamps, if they are the same then just return a 304 (Not Modified)
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag in [tag.strip() for tag in request.META['HTTP_IF_NONE_MATCH'].split(',')]:
+                    return HttpResponseNotModified()
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
@@ -93,10 +102,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -142,9 +147,26 @@ class StaticContentServer(object):
             response['Accept-Ranges'] = 'bytes'
             response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
+            response['ETag'] = etag
 
             return response
 
+    def get_disk_cached_content(self, loc, content):
+        """
+        Return the version of `content`, the asset at `loc` fetched from the DB as
+        a stream, which is served from the local disk cache, if it can be.
+        Otherwise return `content`, or a fresh stream of it.
+        """
+        disk_cache = get_disk_cache()
+        if disk_cache is None or not disk_cache.is_cacheable(content):
+            return content
+        mapped = disk_cache.get(content) or disk_cache.put(content)
+        content.close()
+        if mapped is None:
+            # writing it to disk failed and used up the stream, so fetch it again
+            return AssetManager.find(loc, as_stream=True)
+        return mapped
+
 
 def parse_range_header(header_value, content_length):
     """
@@ -0,0 +1,105 @@
+"""
+Tests for the local disk cache of asset contents
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.contentstore.content import StaticContent
+
+from contentserver.disk_cache import AssetDiskCache, content_digest
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for AssetDiskCache and MappedContent.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.last_modified_at = datetime(2014, 10, 1, 12, 0, 0)
+
+    def make_content(self, name, data, last_modified_at=None):
+        """
+        Return an in-memory StaticContent named `name` holding `data`.
+        """
+        return StaticContent(
+            self.course_key.make_asset_key('asset', name), name, 'application/octet-stream', data,
+            last_modified_at=last_modified_at or self.last_modified_at, length=len(data)
+        )
+
+    def test_put_then_get(self):
+        cache = AssetDiskCache(self.root, 1000)
+        content = self.make_content('a.bin', 'a' * 100)
+        self.assertIsNone(cache.get(content))
+        mapped = cache.put(content)
+        self.assertEqual(''.join(mapped.stream_data()), 'a' * 100)
+        self.assertEqual(''.join(cache.get(content).stream_data()), 'a' * 100)
+        self.assertEqual(cache.size(), 100)
+
+    def test_stream_range(self):
+        cache = AssetDiskCache(self.root, 1000)
+        mapped = cache.put(self.make_content('a.bin', '0123456789'))
+        self.assertEqual(''.join(mapped.stream_data_in_range(2, 5)), '2345')
+
+    def test_empty_content(self):
+        cache = AssetDiskCache(self.root, 1000)
+        mapped = cache.put(self.make_content('empty.bin', ''))
+        self.assertEqual(''.join(mapped.stream_data()), '')
+
+    def test_new_version_is_a_miss(self):
+        cache = AssetDiskCache(self.root, 1000)
+        cache.put(self.make_content('a.bin', 'a' * 100))
+        newer = self.make_content('a.bin', 'b' * 100, last_modified_at=datetime(2014, 10, 2))
+        self.assertIsNone(cache.get(newer))
+
+    def test_least_recently_used_evicted(self):
+        cache = AssetDiskCache(self.root, 250)
+        first = self.make_content('first.bin', 'a' * 100)
+        second = self.make_content('second.bin', 'b' * 100)
+        cache.put(first)
+        cache.put(second)
+        # as if they were written some time ago, the first before the second
+        for index, content in enumerate([first, second]):
+            os.utime(os.path.join(self.root, content_digest(content.location, content.last_modified_at)), (index, index))
+        # use the first, so the second is the least recently used
+        cache.get(first)
+        cache.put(self.make_content('third.bin', 'c' * 100))
+        self.assertIsNotNone(cache.get(first))
+        self.assertIsNone(cache.get(second))
+        self.assertLessEqual(cache.size(), 250)
+
+    def test_too_big_not_cacheable(self):
+        cache = AssetDiskCache(self.root, 50)
+        self.assertFalse(cache.is_cacheable(self.make_content('big.bin', 'a' * 100)))
+        self.assertTrue(cache.is_cacheable(self.make_content('small.bin', 'a' * 10)))
+
+    def test_existing_files_indexed(self):
+        content = self.make_content('a.bin', 'a' * 100)
+        AssetDiskCache(self.root, 1000).put(content)
+        cache = AssetDiskCache(self.root, 1000)
+        self.assertEqual(cache.size(), 100)
+        self.assertIsNotNone(cache.get(content))
+
+    def test_budget_shared_by_processes(self):
+        # caches of the same directory in two processes
+        cache, other_cache = AssetDiskCache(self.root, 250), AssetDiskCache(self.root, 250)
+        cache.put(self.make_content('first.bin', 'a' * 100))
+        other_cache.put(self.make_content('second.bin', 'b' * 100))
+        cache.put(self.make_content('third.bin', 'c' * 100))
+        other_cache.put(self.make_content('fourth.bin', 'd' * 100))
+        self.assertLessEqual(cache.size(), 250)
+
+    def test_mapped_survives_eviction(self):
+        cache = AssetDiskCache(self.root, 1000)
+        content = self.make_content('a.bin', 'a' * 100)
+        mapped = cache.put(content)
+        os.remove(os.path.join(self.root, content_digest(content.location, content.last_modified_at)))
+        self.assertEqual(''.join(mapped.stream_data()), 'a' * 100)
+        self.assertIsNone(cache.get(content))
+        self.assertEqual(cache.size(), 0)
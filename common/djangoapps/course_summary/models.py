@@ -0,0 +1,259 @@
+"""
+Summaries of courses, copied from their course descriptors, for the pages that
+list many courses, like the student dashboard and the course catalog.
+
+A course's summary is deleted whenever the course is published, and made again
+from the course descriptor the next time it's needed.
+
+Courses are mostly published from the CMS, which deletes the summaries from the
+database and forgets the list of all course ids in its default cache. So the CMS
+and the LMS have to share the database and the default cache, or new courses
+only show up in the LMS once the list times out.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, IntegrityError
+from django.dispatch import receiver
+from django.utils.translation import ugettext as _
+
+from util.date_utils import strftime_localized
+from xmodule.course_module import (
+    course_has_ended, course_has_started, course_may_certify, course_start_date_is_still_default,
+    course_start_datetime_text, course_end_datetime_text, course_is_newish, course_sorting_score,
+)
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore, course_published
+from xmodule_django.models import CourseKeyField, UsageKeyField
+
+log = logging.getLogger(__name__)
+
+# The cache key of the list of the ids of all courses
+ALL_COURSE_IDS_CACHE_KEY = 'course_summary.all_course_ids'
+
+
+class CourseSummary(models.Model):
+    """
+    The settings of a course that course listings need.
+
+    A CourseSummary has the attributes and methods of CourseDescriptor that the
+    course listings use, so it can stand in for the course there.
+    """
+    course_id = CourseKeyField(max_length=255, primary_key=True)
+    location = UsageKeyField(max_length=255)
+
+    display_name = models.TextField(null=True)
+    display_name_with_default = models.TextField()
+    display_number_with_default = models.TextField()
+    display_org_with_default = models.TextField()
+    course_image_url = models.TextField()
+    static_asset_path = models.TextField(blank=True)
+
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    advertised_start = models.TextField(null=True)
+    announcement = models.DateTimeField(null=True)
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    days_early_for_beta = models.FloatField(null=True)
+    is_new = models.NullBooleanField()
+
+    visible_to_staff_only = models.BooleanField(default=False)
+    ispublic = models.NullBooleanField()
+    invitation_only = models.BooleanField(default=False)
+    enrollment_domain = models.TextField(null=True)
+    catalog_visibility = models.TextField()
+
+    certificates_display_behavior = models.TextField(null=True)
+    certificates_show_before_end = models.BooleanField(default=False)
+    cert_name_short = models.TextField(blank=True)
+    cert_name_long = models.TextField(blank=True)
+    end_of_course_survey_url = models.TextField(null=True)
+
+    # courseware.access checks this of descriptors; a course is never detached
+    _class_tags = frozenset()
+
+    @classmethod
+    def get_course(cls, course_key):
+        """
+        Return the summary of the course with the given id, or None if there is
+        no such course or it can't be loaded.
+        """
+        return cls.get_courses([course_key]).get(course_key)
+
+    @classmethod
+    def get_courses(cls, course_keys):
+        """
+        Return a dict from course id to course summary, for the courses with the
+        given ids that exist and can be loaded.
+
+        Courses in the XML modulestore are always in memory, so for them this
+        returns the course descriptor itself rather than a summary.
+        """
+        course_keys = set(course_keys)
+        courses = {}
+        if course_keys:
+            for summary in cls.objects.filter(course_id__in=course_keys):
+                courses[summary.course_id] = summary
+
+        store = modulestore()
+        for course_key in course_keys - set(courses):
+            course = store.get_course(course_key)
+            if course is None or isinstance(course, ErrorDescriptor):
+                continue
+            if store.get_modulestore_type(course_key) == ModuleStoreEnum.Type.xml:
+                courses[course_key] = course
+            else:
+                courses[course_key] = cls._create_from_course(course)
+        return courses
+
+    @classmethod
+    def get_all_courses(cls):
+        """
+        Return the summaries of every course that can be loaded, as get_courses does.
+
+        The list of all course ids is cached for COURSE_SUMMARY_IDS_TIMEOUT seconds,
+        or until a course is created. Making it only lists the course ids, rather than
+        loading every course.
+        """
+        course_keys = cache.get(ALL_COURSE_IDS_CACHE_KEY)
+        if course_keys is None:
+            course_keys = modulestore().get_course_keys()
+            cache.set(ALL_COURSE_IDS_CACHE_KEY, course_keys, settings.COURSE_SUMMARY_IDS_TIMEOUT)
+        return cls.get_courses(course_keys).values()
+
+    @classmethod
+    def _create_from_course(cls, course):
+        """
+        Make and save a summary of the course descriptor.
+        """
+        # courseware imports this module, so import it here rather than at the top
+        from courseware.courses import course_image_url
+
+        is_new = course.is_new
+        if isinstance(is_new, basestring):
+            is_new = is_new.lower() in ['true', 'yes', 'y']
+        elif is_new is not None:
+            is_new = bool(is_new)
+
+        summary = cls(
+            course_id=course.id,
+            location=course.location,
+            display_name=course.display_name,
+            display_name_with_default=course.display_name_with_default,
+            display_number_with_default=course.display_number_with_default,
+            display_org_with_default=course.display_org_with_default,
+            course_image_url=course_image_url(course),
+            static_asset_path=course.static_asset_path,
+            start=course.start,
+            end=course.end,
+            advertised_start=course.advertised_start,
+            announcement=course.announcement,
+            enrollment_start=course.enrollment_start,
+            enrollment_end=course.enrollment_end,
+            days_early_for_beta=course.days_early_for_beta,
+            is_new=is_new,
+            visible_to_staff_only=course.visible_to_staff_only,
+            ispublic=getattr(course, 'ispublic', None),
+            invitation_only=course.invitation_only,
+            enrollment_domain=course.enrollment_domain,
+            catalog_visibility=course.catalog_visibility,
+            certificates_display_behavior=course.certificates_display_behavior,
+            certificates_show_before_end=course.certificates_show_before_end,
+            cert_name_short=course.cert_name_short,
+            cert_name_long=course.cert_name_long,
+            end_of_course_survey_url=course.end_of_course_survey_url,
+        )
+        try:
+            summary.save()
+        except IntegrityError:
+            # Another request made the summary first, which is just as good
+            log.info(u"Course summary of %s was already made", course.id)
+        return summary
+
+    @property
+    def id(self):  # pylint: disable=invalid-name
+        """Return the course_id for this course"""
+        return self.course_id
+
+    @property
+    def number(self):
+        return self.location.course
+
+    @property
+    def org(self):
+        return self.location.org
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the specified course end date.
+        Returns False if there is no end date specified.
+        """
+        return course_has_ended(self)
+
+    def has_started(self):
+        return course_has_started(self)
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link
+        """
+        return course_may_certify(self)
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Checks if the start date set for the course is still default, i.e. .start has not been modified,
+        and .advertised_start has not been set.
+        """
+        return course_start_date_is_still_default(self)
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the desired text corresponding the course's start date and time in UTC.  Prefers .advertised_start,
+        then falls back to .start
+        """
+        return course_start_datetime_text(self, format_string, _, strftime_localized)
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the end date or date_time for the course formatted as a string.
+
+        If the course does not have an end date set (course.end is None), an empty string will be returned.
+        """
+        return course_end_datetime_text(self, format_string, strftime_localized)
+
+    @property
+    def is_newish(self):
+        """
+        Returns if the course has been flagged as new. If
+        there is no flag, return a heuristic value considering the
+        announcement and the start dates.
+        """
+        return course_is_newish(self)
+
+    @property
+    def sorting_score(self):
+        """
+        Returns a number that can be used to sort the courses according
+        the how "new" they are, as CourseDescriptor.sorting_score does.
+        """
+        return course_sorting_score(self)
+
+    def __unicode__(self):
+        return u"Course summary of {}".format(self.course_id)
+
+
+@receiver(course_published)
+def _course_published_handler(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Delete the summary of a course that has been published, and forget the list of
+    all course ids if the course is new.
+    """
+    CourseSummary.objects.filter(course_id=course_key).delete()
+
+    course_keys = cache.get(ALL_COURSE_IDS_CACHE_KEY)
+    if course_keys is not None and course_key not in course_keys:
+        cache.delete(ALL_COURSE_IDS_CACHE_KEY)
@@ -0,0 +1,85 @@
+"""
+Tests for course summaries
+"""
+import unittest
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from mock import patch
+from pytz import UTC
+
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, check_mongo_calls
+
+from course_summary.models import CourseSummary, ALL_COURSE_IDS_CACHE_KEY
+
+
+@unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+class CourseSummaryTest(ModuleStoreTestCase):
+    """
+    Tests for CourseSummary.
+    """
+
+    def setUp(self):
+        super(CourseSummaryTest, self).setUp()
+        self.course = CourseFactory.create(
+            org='edX', number='Summary', display_name='Summarized Course',
+            start=datetime(2014, 1, 1, tzinfo=UTC), end=datetime(2014, 6, 1, tzinfo=UTC),
+        )
+
+    def test_summary_made_once(self):
+        self.assertFalse(CourseSummary.objects.filter(course_id=self.course.id).exists())
+
+        summary = CourseSummary.get_course(self.course.id)
+        self.assertEqual(summary.id, self.course.id)
+        self.assertEqual(summary.location, self.course.location)
+        self.assertEqual(summary.number, self.course.number)
+        self.assertEqual(summary.display_name_with_default, self.course.display_name_with_default)
+        self.assertEqual(summary.start, self.course.start)
+        self.assertTrue(summary.has_started())
+        self.assertTrue(summary.has_ended())
+        self.assertTrue(summary.may_certify())
+        self.assertEqual(summary.end_datetime_text(), self.course.end_datetime_text())
+
+        # the second time, the summary is read back without loading the course
+        with self.assertNumQueries(1):
+            with check_mongo_calls(0):
+                summary = CourseSummary.get_course(self.course.id)
+        self.assertEqual(summary.display_name, 'Summarized Course')
+        self.assertEqual(summary.start, self.course.start)
+
+    def test_summary_deleted_on_update(self):
+        CourseSummary.get_course(self.course.id)
+        self.course.display_name = 'Renamed Course'
+        modulestore().update_item(self.course, ModuleStoreEnum.UserID.test)
+
+        self.assertFalse(CourseSummary.objects.filter(course_id=self.course.id).exists())
+        self.assertEqual(CourseSummary.get_course(self.course.id).display_name, 'Renamed Course')
+
+    def test_missing_course(self):
+        self.assertIsNone(CourseSummary.get_course(SlashSeparatedCourseKey('edX', 'missing', 'run')))
+
+    def test_new_course_in_all_courses(self):
+        self.assertEqual([course.id for course in CourseSummary.get_all_courses()], [self.course.id])
+
+        other = CourseFactory.create(org='edX', number='Other')
+        self.assertEqual(
+            set(course.id for course in CourseSummary.get_all_courses()),
+            set([self.course.id, other.id])
+        )
+
+    def test_all_courses_not_loaded(self):
+        cache.delete(ALL_COURSE_IDS_CACHE_KEY)
+        with patch.object(modulestore(), 'get_courses') as mock_get_courses:
+            self.assertEqual([course.id for course in CourseSummary.get_all_courses()], [self.course.id])
+        self.assertFalse(mock_get_courses.called)
+
+    def test_start_datetime_text(self):
+        summary = CourseSummary.get_course(self.course.id)
+        self.assertEqual(summary.start_datetime_text(), self.course.start_datetime_text())
+        self.assertEqual(summary.start_datetime_text('DATE_TIME'), self.course.start_datetime_text('DATE_TIME'))
+        self.assertEqual(summary.sorting_score, self.course.sorting_score)
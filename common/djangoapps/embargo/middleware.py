@@ -32,6 +32,9 @@ EMBARGO_SITE_REDIRECT_URL = 'https://www.edx.org/'
 """
 from functools import partial
 import logging
+import os
+import threading
+import time
 import pygeoip
 from lazy import lazy
 
@@ -48,6 +51,35 @@ from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
 
 log = logging.getLogger(__name__)
 
+# How often, in seconds, to check whether a GeoIP database file has changed
+GEOIP_CHECK_INTERVAL = 60
+
+# path -> (GeoIP reader, file modification time, time last checked)
+_geoip_readers = {}
+_geoip_readers_lock = threading.Lock()
+
+
+def geoip_reader(path):
+    """
+    Return a GeoIP reader for the database at path, which is shared by the whole
+    process, and reads the file through a memory map.
+
+    The reader is replaced when the file has changed, which is checked at most
+    every GEOIP_CHECK_INTERVAL seconds.
+    """
+    now = time.time()
+    reader, mtime, checked_at = _geoip_readers.get(path, (None, None, None))
+    if reader is not None and now - checked_at < GEOIP_CHECK_INTERVAL:
+        return reader
+
+    with _geoip_readers_lock:
+        current_mtime = os.path.getmtime(path)
+        reader, mtime, __ = _geoip_readers.get(path, (None, None, None))
+        if reader is None or current_mtime != mtime:
+            reader = pygeoip.GeoIP(path, pygeoip.MMAP_CACHE)
+        _geoip_readers[path] = (reader, current_mtime, now)
+        return reader
+
 
 class EmbargoMiddleware(object):
     """
@@ -194,9 +226,9 @@ class EmbargoMiddleware(object):
 
         """
         if ip_addr.find(':') >= 0:
-            return pygeoip.GeoIP(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
+            return geoip_reader(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
         else:
-            return pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+            return geoip_reader(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
 
     @property
     def _embargo_redirect_response(self):
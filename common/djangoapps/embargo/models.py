@@ -89,10 +89,25 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        The networks are kept in a binary trie of their prefix bits per IP
+        version, so checking an address takes one step per prefix bit,
+        however many networks there are.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
+            # IP version -> trie of nested [zero child, one child, whether a network ends here]
+            self._tries = {}
+            for network in self.networks:
+                node = self._tries.setdefault(network.version, [None, None, False])
+                address = int(network.network)
+                for position in xrange(network.max_prefixlen - 1, network.max_prefixlen - network.prefixlen - 1, -1):
+                    bit = (address >> position) & 1
+                    if node[bit] is None:
+                        node[bit] = [None, None, False]
+                    node = node[bit]
+                node[2] = True
 
         def __iter__(self):
             for network in self.networks:
@@ -104,12 +119,37 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
+            node = self._tries.get(ip.version)
+            address = int(ip)
+            position = ip.max_prefixlen
+            while node is not None:
+                if node[2]:
                     return True
+                position -= 1
+                if position < 0:
+                    break
+                node = node[(address >> position) & 1]
 
             return False
 
+    # comma-separated list -> IPFilterList, shared by the instances of the same configuration
+    _ip_filter_lists = {}
+
+    @classmethod
+    def _ip_filter_list(cls, ips):
+        """
+        Return the IPFilterList for a comma-separated list of IP addresses,
+        only building it the first time the list is seen.
+        """
+        ip_filter_list = cls._ip_filter_lists.get(ips)
+        if ip_filter_list is None:
+            ip_filter_list = cls.IPFilterList([addr.strip() for addr in ips.split(',')])
+            if len(cls._ip_filter_lists) >= 8:
+                # old configurations are no longer needed
+                cls._ip_filter_lists.clear()
+            cls._ip_filter_lists[ips] = ip_filter_list
+        return ip_filter_list
+
     @property
     def whitelist_ips(self):
         """
@@ -117,7 +157,7 @@ class IPFilter(ConfigurationModel):
         """
         if self.whitelist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.whitelist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.whitelist)
 
     @property
     def blacklist_ips(self):
@@ -126,4 +166,4 @@ class IPFilter(ConfigurationModel):
         """
         if self.blacklist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.blacklist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.blacklist)
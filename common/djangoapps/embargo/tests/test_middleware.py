@@ -21,6 +21,7 @@ from xmodule.modulestore.tests.django_utils import (
 
 # Explicitly import the cache from ConfigurationModel so we can reset it after each test
 from config_models.models import cache
+from embargo import middleware
 from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
 
 
@@ -334,3 +335,32 @@ class EmbargoMiddlewareTests(ModuleStoreTestCase):
         # denied, and redirected to EMBARGO_SITE_REDIRECT_URL rather than returning a 403.
         response = self.client.get(self.regular_page, HTTP_X_FORWARDED_FOR='1.0.0.0', REMOTE_ADDR='1.0.0.0')
         self.assertEqual(response.status_code, 302)
+
+
+class GeoIPReaderTests(unittest.TestCase):
+    """
+    Tests of the shared GeoIP reader
+    """
+    def setUp(self):
+        self.path = '/tmp/GeoIP.dat'
+        middleware._geoip_readers.clear()  # pylint: disable=protected-access
+        self.addCleanup(middleware._geoip_readers.clear)  # pylint: disable=protected-access
+
+    @mock.patch('embargo.middleware.os.path.getmtime', mock.Mock(return_value=1))
+    @mock.patch('embargo.middleware.pygeoip.GeoIP')
+    def test_reader_reused(self, mock_geoip):
+        reader = middleware.geoip_reader(self.path)
+        self.assertIs(reader, middleware.geoip_reader(self.path))
+        mock_geoip.assert_called_once_with(self.path, pygeoip.MMAP_CACHE)
+
+    @mock.patch('embargo.middleware.GEOIP_CHECK_INTERVAL', 0)
+    @mock.patch('embargo.middleware.pygeoip.GeoIP')
+    def test_reader_reloaded_when_file_changes(self, mock_geoip):
+        with mock.patch('embargo.middleware.os.path.getmtime', return_value=1):
+            middleware.geoip_reader(self.path)
+            middleware.geoip_reader(self.path)
+        self.assertEqual(mock_geoip.call_count, 1)
+
+        with mock.patch('embargo.middleware.os.path.getmtime', return_value=2):
+            middleware.geoip_reader(self.path)
+        self.assertEqual(mock_geoip.call_count, 2)
@@ -95,3 +95,21 @@ class EmbargoModelsTest(TestCase):
         self.assertTrue('1.1.0.1' in cblacklist)
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
+
+    def test_ip_network_blocking_ipv6(self):
+        whitelist = '2001:db8::/32, 0.0.0.0/0'
+        blacklist = '2002:c0a8:101::42'
+
+        IPFilter(whitelist=whitelist, blacklist=blacklist).save()
+
+        cwhitelist = IPFilter.current().whitelist_ips
+        self.assertTrue('2001:db8::1' in cwhitelist)
+        self.assertFalse('2001:db9::1' in cwhitelist)
+        self.assertTrue('18.244.51.3' in cwhitelist)
+        self.assertFalse('not an ip' in cwhitelist)
+        cblacklist = IPFilter.current().blacklist_ips
+        self.assertTrue('2002:c0a8:101::42' in cblacklist)
+        self.assertFalse('2002:c0a8:101::43' in cblacklist)
+        self.assertFalse('1.1.0.0' in cblacklist)
+        # the filter lists are only built once per configuration
+        self.assertIs(cblacklist, IPFilter.current().blacklist_ips)
@@ -0,0 +1,177 @@
+"""
+Event tracker backend that queues events in memory and sends them on to
+another backend in batches, from a background thread, so that requests
+don't wait for the events they track to be written.
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# What to do with a new event when the queue stays full
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that sends events to another backend in batches.
+
+    A batch is sent once it has `batch_size` events, or `flush_interval`
+    seconds after its first event was queued, whichever comes first.
+
+    """
+
+    def __init__(self, backend, name='buffered', max_queue_size=10000, batch_size=100,
+                 flush_interval=1.0, block_timeout=0, drop_policy=DROP_NEWEST, **kwargs):
+        """
+        Queue events for a backend.
+
+        :Parameters:
+
+          - `backend`: the backend to send the events to
+          - `name`: the name of the backend, used to tag metrics
+          - `max_queue_size`: the most events to queue
+          - `batch_size`: the most events to send at once
+          - `flush_interval`: the most seconds an event waits before it is sent
+          - `block_timeout`: seconds to wait for room in a full queue before
+            dropping an event
+          - `drop_policy`: whether to drop the new event (`drop_newest`), or
+            the oldest queued event (`drop_oldest`), when the queue stays full
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError('Invalid drop policy %s' % drop_policy)
+
+        self.backend = backend
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.drop_policy = drop_policy
+
+        self._tags = ['backend:{0}'.format(name)]
+        self._queue = Queue.Queue(max_queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # Send whatever is still queued when the process exits
+        atexit.register(self.flush)
+
+    def send(self, event):
+        """Queue the event to be sent by the background thread."""
+        self._start_flusher()
+
+        item = (time.time(), event)
+        try:
+            if self.block_timeout:
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+            return
+        except Queue.Full:
+            pass
+
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+            except Queue.Empty:
+                # The background thread emptied the queue meanwhile, so there's room now
+                pass
+            else:
+                dog_stats_api.increment('track.buffer.dropped', tags=self._tags)
+            try:
+                self._queue.put_nowait(item)
+                return
+            except Queue.Full:
+                # Other threads filled the queue again first, so drop this event too
+                pass
+        dog_stats_api.increment('track.buffer.dropped', tags=self._tags)
+
+    def flush(self):
+        """Send every queued event now, from the calling thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Queue.Empty:
+                break
+            if len(batch) == self.batch_size:
+                self._send_batch(batch)
+                batch = []
+        if batch:
+            self._send_batch(batch)
+
+    def _start_flusher(self):
+        """
+        Start the background thread, if it isn't running in this process.
+
+        The thread is started on the first event rather than when the backend
+        is made, as forked worker processes don't inherit it.
+
+        """
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='track-buffer-{0}'.format(self.name),
+                )
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        """Send the queued events in batches, forever."""
+        while True:
+            self._send_batch(self._next_batch())
+
+    def _next_batch(self):
+        """
+        Wait for a batch of events to send: `batch_size` of them, or as many as
+        are queued `flush_interval` seconds after the first one.
+
+        """
+        batch = [self._queue.get()]
+        deadline = batch[0][0] + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except Queue.Empty:
+                break
+        return batch
+
+    def _send_batch(self, batch):
+        """Send a batch of (time queued, event) to the backend."""
+        dog_stats_api.gauge('track.buffer.queue_depth', self._queue.qsize(), tags=self._tags)
+        dog_stats_api.histogram('track.buffer.latency', time.time() - batch[0][0], tags=self._tags)
+        dog_stats_api.histogram('track.buffer.batch_size', len(batch), tags=self._tags)
+
+        try:
+            with dog_stats_api.timer('track.buffer.send', tags=self._tags):
+                self.backend.send_many([event for __, event in batch])
+        except Exception:  # pylint: disable=broad-except
+            # The background thread has to keep going, so the events are lost
+            log.exception('Error sending %d events to event tracker backend %s', len(batch), self.name)
+            dog_stats_api.increment('track.buffer.failed', len(batch), tags=self._tags)
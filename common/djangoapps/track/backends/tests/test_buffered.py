@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+
+import Queue
+import threading
+
+from mock import patch
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend, DROP_OLDEST
+
+
+class RecordingBackend(BaseBackend):
+    """Backend that records the batches it is sent."""
+    def __init__(self, **options):
+        super(RecordingBackend, self).__init__(**options)
+        self.batches = []
+        self.sent = threading.Event()
+
+    def send(self, event):
+        self.send_many([event])
+
+    def send_many(self, events):
+        self.batches.append(events)
+        self.sent.set()
+
+
+class TestBufferedBackend(TestCase):
+    def setUp(self):
+        self.backend = RecordingBackend()
+
+    def test_flush_in_batches(self):
+        buffered = BufferedBackend(self.backend, batch_size=2)
+        # don't start the background thread
+        with patch.object(buffered, '_start_flusher'):
+            for i in xrange(5):
+                buffered.send({'test': i})
+            buffered.flush()
+
+        self.assertEqual(
+            self.backend.batches,
+            [[{'test': 0}, {'test': 1}], [{'test': 2}, {'test': 3}], [{'test': 4}]]
+        )
+
+    def test_background_thread_sends(self):
+        buffered = BufferedBackend(self.backend, flush_interval=0.01)
+        buffered.send({'test': 1})
+
+        self.assertTrue(self.backend.sent.wait(5))
+        self.assertEqual(self.backend.batches, [[{'test': 1}]])
+
+    def test_drop_newest(self):
+        buffered = BufferedBackend(self.backend, max_queue_size=2)
+        with patch.object(buffered, '_start_flusher'):
+            for i in xrange(3):
+                buffered.send({'test': i})
+            buffered.flush()
+
+        self.assertEqual(self.backend.batches, [[{'test': 0}, {'test': 1}]])
+
+    def test_drop_oldest(self):
+        buffered = BufferedBackend(self.backend, max_queue_size=2, drop_policy=DROP_OLDEST)
+        with patch.object(buffered, '_start_flusher'):
+            for i in xrange(3):
+                buffered.send({'test': i})
+            buffered.flush()
+
+        self.assertEqual(self.backend.batches, [[{'test': 1}, {'test': 2}]])
+
+    def test_drop_oldest_counts_once(self):
+        buffered = BufferedBackend(self.backend, max_queue_size=1, drop_policy=DROP_OLDEST)
+        with patch.object(buffered, '_start_flusher'):
+            buffered.send({'test': 0})
+            with patch('track.backends.buffered.dog_stats_api') as mock_stats:
+                buffered.send({'test': 1})
+
+        self.assertEqual(mock_stats.increment.call_count, 1)
+
+    def test_drop_oldest_queue_emptied(self):
+        buffered = BufferedBackend(self.backend, max_queue_size=1, drop_policy=DROP_OLDEST)
+        get_nowait = buffered._queue.get_nowait  # pylint: disable=protected-access
+
+        def emptied_meanwhile():
+            """The background thread takes the queued event before the oldest can be dropped."""
+            get_nowait()
+            raise Queue.Empty
+
+        with patch.object(buffered, '_start_flusher'):
+            buffered.send({'test': 0})
+            with patch('track.backends.buffered.dog_stats_api') as mock_stats:
+                with patch.object(buffered._queue, 'get_nowait', side_effect=emptied_meanwhile):  # pylint: disable=protected-access
+                    buffered.send({'test': 1})
+            buffered.flush()
+
+        self.assertFalse(mock_stats.increment.called)
+        self.assertEqual(self.backend.batches, [[{'test': 1}]])
+
+    def test_invalid_drop_policy(self):
+        self.assertRaises(ValueError, BufferedBackend, self.backend, drop_policy='drop_everything')
+
+    def test_backend_error_is_logged(self):
+        buffered = BufferedBackend(self.backend)
+        with patch.object(buffered, '_start_flusher'):
+            buffered.send({'test': 1})
+            with patch.object(self.backend, 'send_many', side_effect=Exception):
+                with patch('track.backends.buffered.log') as mock_log:
+                    buffered.flush()
+
+        self.assertTrue(mock_log.exception.called)
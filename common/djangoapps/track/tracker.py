@@ -16,6 +16,22 @@ below::
       }
   }
 
+A backend can also be given a `BUFFER` dictionary, of options to
+`track.backends.buffered.BufferedBackend`, to queue its events and send
+them in batches from a background thread::
+
+  TRACKING_BACKENDS = {
+      'tracker_name': {
+          'ENGINE': ...,
+          'OPTIONS': ...,
+          'BUFFER': {
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'flush_interval': 1.0,
+          }
+      }
+  }
+
 """
 
 import inspect
@@ -26,6 +42,7 @@ from dogapi import dog_stats_api
 from django.conf import settings
 
 from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
 
 
 __all__ = ['send']
@@ -49,7 +66,10 @@ def _initialize_backends_from_django_settings():
         if values:
             engine = values['ENGINE']
             options = values.get('OPTIONS', {})
-            backends[name] = _instantiate_backend_from_name(engine, options)
+            backend = _instantiate_backend_from_name(engine, options)
+            if 'BUFFER' in values:
+                backend = BufferedBackend(backend, name=name, **values['BUFFER'])
+            backends[name] = backend
 
 
 def _instantiate_backend_from_name(name, options):
@@ -2,11 +2,17 @@
 Parser and evaluator for FormulaResponse and NumericalResponse
 
 Uses pyparsing to parse. Main function as of now is evaluator().
+evaluate_samples() evaluates an expression for many sets of variables at once.
+
+Parsed expressions are kept, as `CompiledExpression`s, in a cache of the
+`EXPRESSION_CACHE_SIZE` most recently used ones.
 """
 
+from collections import OrderedDict
 import math
 import operator
 import numbers
+import threading
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +79,22 @@ SUFFIXES = {
 }
 
 
+# The number of parsed expressions to keep
+EXPRESSION_CACHE_SIZE = 1000
+
+# The functions which can be applied to numpy arrays element by element.
+# (Not arccot, which branches on the sign of its argument.)
+VECTORIZABLE_FUNCTIONS = set(
+    function for function in DEFAULT_FUNCTIONS.itervalues()
+    if isinstance(function, numpy.ufunc)
+) | set([
+    functions.sec, functions.csc, functions.cot,
+    functions.arcsec, functions.arccsc,
+    functions.sech, functions.csch, functions.coth,
+    functions.arcsech, functions.arccsch, functions.arccoth,
+])
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -216,6 +238,97 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
+# The following functions are the evaluation actions used instead of the above
+# when the numbers are numpy arrays holding a value for each sample.
+
+def _is_operator(token):
+    """
+    Whether the token is an operator or parenthesis, rather than a number.
+    """
+    return isinstance(token, basestring)
+
+
+def eval_atom_array(parse_result):
+    """
+    Return the value wrapped by the atom, like `eval_atom`.
+    """
+    return next(k for k in parse_result if not _is_operator(k))
+
+
+def eval_power_array(parse_result):
+    """
+    Exponentiate, right to left, like `eval_power`.
+    """
+    parse_result = reversed([k for k in parse_result if not _is_operator(k)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_array(parse_result):
+    """
+    Compute the parallel resistors operator, like `eval_parallel`.
+
+    This relies on numpy raising FloatingPointError for a zero among the
+    inputs, where `eval_parallel` would return NaN.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    reciprocals = [1. / e for e in parse_result if not _is_operator(e)]
+    return 1. / sum(reciprocals)
+
+
+def eval_sum_array(parse_result):
+    """
+    Add the inputs, keeping in mind their sign, like `eval_sum`.
+
+    Comparing an array to '+' would compare it element by element, so the
+    operators are told apart from the numbers by their type.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if not _is_operator(token):
+            total = current_op(total, token)
+        elif token == '+':
+            current_op = operator.add
+        elif token == '-':
+            current_op = operator.sub
+    return total
+
+
+def eval_product_array(parse_result):
+    """
+    Multiply the inputs, like `eval_product`, telling the operators apart from
+    the numbers by their type.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if not _is_operator(token):
+            prod = current_op(prod, token)
+        elif token == '*':
+            current_op = operator.mul
+        elif token == '/':
+            current_op = operator.truediv
+    return prod
+
+
+SCALAR_ACTIONS = {
+    'atom': eval_atom,
+    'power': eval_power,
+    'parallel': eval_parallel,
+    'product': eval_product,
+    'sum': eval_sum
+}
+
+ARRAY_ACTIONS = {
+    'atom': eval_atom_array,
+    'power': eval_power_array,
+    'parallel': eval_parallel_array,
+    'product': eval_product_array,
+    'sum': eval_sum_array
+}
+
+
 def evaluator(variables, functions, math_expr, case_sensitive=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
@@ -228,34 +341,177 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each of the dictionaries of variables in
+    `variables_list` and return the list of results.
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+    Gives the same results (or raises the same exception) as calling
+    `evaluator` for each of them in turn, but parses the expression only once
+    and when it can, evaluates it for all the samples at once with numpy.
+    """
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+    if not variables_list:
+        return []
+
+    return compile_expression(math_expr, case_sensitive).evaluate_many(variables_list, functions)
+
+
+_expression_cache = OrderedDict()
+_expression_cache_lock = threading.Lock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the `CompiledExpression` for `math_expr`, from the cache if it has
+    been parsed recently.
+
+    Raises pyparsing's ParseException if the expression can't be parsed.
+    """
+    key = (math_expr, case_sensitive)
+    with _expression_cache_lock:
+        compiled = _expression_cache.pop(key, None)
+        if compiled is not None:
+            _expression_cache[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+    with _expression_cache_lock:
+        _expression_cache[key] = compiled
+        while len(_expression_cache) > EXPRESSION_CACHE_SIZE:
+            _expression_cache.popitem(last=False)
+    return compiled
+
+
+class CompiledExpression(object):
+    """
+    A math expression parsed into a tree of plain tuples, which can be
+    evaluated over and over w/o going back to pyparsing.
+
+    In the tree, numbers are floats and operators and parentheses strings. A
+    variable is `('variable', name)`, a function call `('function', name,
+    argument)` and any other node `(node_name, children)`, where the node
+    names are those of the `ParseAugmenter` tree. Variable and function names
+    are lowercased unless the expression is case sensitive.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+
+        parser = ParseAugmenter(math_expr, case_sensitive)
+        parser.parse_algebra()
+        self.variables_used = frozenset(parser.variables_used)
+        self.functions_used = frozenset(parser.functions_used)
+
+        casify = self.casify
+        self.tree = parser.reduce_tree({
+            'number': eval_number,
+            'variable': lambda x: ('variable', casify(x[0])),
+            'function': lambda x: ('function', casify(x[0]), x[1]),
+            'atom': lambda x: ('atom', x),
+            'power': lambda x: ('power', x),
+            'parallel': lambda x: ('parallel', x),
+            'product': lambda x: ('product', x),
+            'sum': lambda x: ('sum', x),
+        })
+
+    def casify(self, name):
+        """
+        Return the name as it is looked up in the dictionaries of variables and functions.
+        """
+        return name if self.case_sensitive else name.lower()
+
+    def check_variables(self, valid_variables, valid_functions):
+        """
+        Confirm that all the variables used in the expression are valid/defined.
+
+        Otherwise, raise an UndefinedVariable containing all bad variables.
+        """
+        # Test if casify(X) is valid, but return the actual bad input (i.e. X)
+        bad_vars = set(var for var in self.variables_used
+                       if self.casify(var) not in valid_variables)
+        bad_vars.update(func for func in self.functions_used
+                        if self.casify(func) not in valid_functions)
+
+        if bad_vars:
+            raise UndefinedVariable(' '.join(sorted(bad_vars)))
+
+    def _evaluate_node(self, node, actions, all_variables, all_functions):
+        """
+        Return the value of the (sub)tree `node`, reducing its nodes with `actions`.
+        """
+        if not isinstance(node, tuple):
+            # a number, operator or parenthesis
+            return node
+        if node[0] == 'variable':
+            return all_variables[node[1]]
+        if node[0] == 'function':
+            return all_functions[node[1]](self._evaluate_node(node[2], actions, all_variables, all_functions))
+        return actions[node[0]]([
+            self._evaluate_node(child, actions, all_variables, all_functions) for child in node[1]
+        ])
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression with the given variables and functions, as
+        `evaluator` does.
+        """
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        self.check_variables(all_variables, all_functions)
+        return self._evaluate_node(self.tree, SCALAR_ACTIONS, all_variables, all_functions)
+
+    def evaluate_many(self, variables_list, functions):
+        """
+        Evaluate the expression for each of the dictionaries of variables in
+        `variables_list`, as `evaluate_samples` does.
+        """
+        results = self._evaluate_arrays(variables_list, functions)
+        if results is None:
+            results = [self.evaluate(variables, functions) for variables in variables_list]
+        return results
+
+    def _evaluate_arrays(self, variables_list, functions):
+        """
+        Try to evaluate the expression for all of `variables_list` in one go,
+        with each variable a numpy array of its values in the samples.
+
+        Return None wherever that might not give exactly the results of
+        evaluating each sample in turn: if a function isn't known to work
+        element by element, if a variable isn't a float or complex in some
+        sample, or if anything goes wrong (numpy is made to raise, rather than
+        warn, for division by zero, overflow and invalid operations) so that
+        the samples are evaluated one by one to get the value or error of each.
+        """
+        all_variables, all_functions = add_defaults({}, functions, self.case_sensitive)
+        used_functions = [all_functions.get(self.casify(name)) for name in self.functions_used]
+        if not all(function in VECTORIZABLE_FUNCTIONS for function in used_functions):
+            return None
+
+        if not self.case_sensitive:
+            variables_list = [lower_dict(variables) for variables in variables_list]
+        for name in set(self.casify(name) for name in self.variables_used):
+            values = [variables.get(name, all_variables.get(name)) for variables in variables_list]
+            if not all(isinstance(value, (float, complex)) for value in values):
+                return None
+            all_variables[name] = numpy.array(values)
+
+        try:
+            with numpy.errstate(all='raise', under='ignore'):
+                result = self._evaluate_node(self.tree, ARRAY_ACTIONS, all_variables, all_functions)
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+        if isinstance(result, numpy.ndarray):
+            if result.shape != (len(variables_list),):
+                return None
+            return list(result)
+        elif isinstance(result, numbers.Number):
+            return [result] * len(variables_list)
+        return None
 
 
 class ParseAugmenter(object):
@@ -3,6 +3,7 @@ Unit tests for calc.py
 """
 
 import unittest
+from mock import patch
 import numpy
 import calc
 from pyparsing import ParseException
@@ -559,3 +560,77 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Test that calc.evaluate_samples agrees with calling calc.evaluator for each sample
+    """
+    def setUp(self):
+        super(EvaluateSamplesTest, self).setUp()
+        self.samples = [{'x': value, 'y': 2.0} for value in (-1.5, 0.0, 0.5, 3.0)]
+
+    def assert_same_as_evaluator(self, math_expr, samples=None, functions=None, case_sensitive=False):
+        """
+        Assert that evaluate_samples returns what evaluator does for each of the samples
+        """
+        samples = self.samples if samples is None else samples
+        functions = functions or {}
+        expected = [calc.evaluator(sample, functions, math_expr, case_sensitive) for sample in samples]
+        actual = calc.evaluate_samples(samples, functions, math_expr, case_sensitive)
+        self.assertEqual(len(actual), len(expected))
+        for actual_value, expected_value in zip(actual, expected):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(actual_value))
+            else:
+                self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_vectorized(self):
+        self.assert_same_as_evaluator('x^2 + 3*y - sin(x)/2')
+        self.assert_same_as_evaluator('(X + 1)*(x - 1)')
+        self.assert_same_as_evaluator('x*i + e^(x*j)')
+        self.assert_same_as_evaluator('sqrt(y)*pi')
+        self.assert_same_as_evaluator('2 || 3 - 1k')
+        self.assert_same_as_evaluator('-x + y/2 - x*y/3')
+
+    def test_array_operators(self):
+        x_values = numpy.array([1.0, 2.0])
+        y_values = numpy.array([4.0, 8.0])
+        numpy.testing.assert_array_equal(calc.eval_sum_array([x_values, '-', y_values, '+', 1.0]), [-2.0, -5.0])
+        numpy.testing.assert_array_equal(calc.eval_product_array([y_values, '/', x_values, '*', 3.0]), [12.0, 12.0])
+
+    def test_fallbacks(self):
+        # parallel resistors with a zero
+        self.assert_same_as_evaluator('x || y')
+        # functions which don't work element by element
+        self.assert_same_as_evaluator('arccot(x)')
+        self.assert_same_as_evaluator('f(x)', functions={'f': lambda val: val + 1})
+        # out of numpy's domain
+        self.assert_same_as_evaluator('sqrt(x)')
+        # integer variables
+        self.assert_same_as_evaluator('x^y', samples=[{'x': 2, 'y': 70}, {'x': 3, 'y': 1}])
+
+    def test_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(self.samples, {}, '1/x')
+        with self.assertRaises(ValueError):
+            calc.evaluate_samples(self.samples, {}, 'fact(x)')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(self.samples, {}, 'x + z')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'X'):
+            calc.evaluate_samples(self.samples, {}, 'X', case_sensitive=True)
+        with self.assertRaises(ParseException):
+            calc.evaluate_samples(self.samples, {}, 'x +* 1')
+
+    def test_empty(self):
+        self.assertEqual(calc.evaluate_samples([], {}, 'x'), [])
+        self.assertTrue(all(numpy.isnan(value) for value in calc.evaluate_samples(self.samples, {}, ' ')))
+
+    def test_expression_cache(self):
+        compiled = calc.compile_expression('x + 1')
+        self.assertIs(calc.compile_expression('x + 1'), compiled)
+        self.assertIsNot(calc.compile_expression('x + 1', case_sensitive=True), compiled)
+
+        with patch('calc.calc.EXPRESSION_CACHE_SIZE', 1):
+            calc.compile_expression('x + 2')
+            self.assertIsNot(calc.compile_expression('x + 1'), compiled)
@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +61,9 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# The number of problem templates (see ProblemTemplate) to keep
+PROBLEM_TEMPLATE_CACHE_SIZE = 500
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -110,6 +116,73 @@ class LoncapaSystem(object):
         self.matlab_api_key = matlab_api_key
 
 
+class ProblemTemplate(object):
+    """
+    The part of setting up a LoncapaProblem which only depends on its text and
+    id, not on the seed or the student: the problem text, with startouttext and
+    endouttext converted, its parsed tree, with ids assigned to the responses
+    and their inputs, and the layout of those responses.
+
+    `layout` lists `(response_index, inputfield_indexes)` for each response,
+    in document order, where the indexes are positions in `tree.iter()`. That
+    way they can be looked up in a deep copy of the tree.
+    """
+    def __init__(self, problem_text, tree, layout):
+        self.problem_text = problem_text
+        self.tree = tree
+        self.layout = layout
+
+    @classmethod
+    def from_responses(cls, problem_text, tree, responses):
+        """
+        Make a template holding a copy of `tree` where `responses` is the list
+        of `(response, inputfields)` elements of `tree`.
+        """
+        positions = dict((element, index) for index, element in enumerate(tree.iter()))
+        layout = [
+            (positions[response], [positions[entry] for entry in inputfields])
+            for response, inputfields in responses
+        ]
+        return cls(problem_text, deepcopy(tree), layout)
+
+    def copy_tree(self):
+        """
+        Return a deep copy of the tree and the list of its `(response, inputfields)` elements.
+        """
+        tree = deepcopy(self.tree)
+        elements = list(tree.iter())
+        responses = [
+            (elements[response_index], [elements[index] for index in inputfield_indexes])
+            for response_index, inputfield_indexes in self.layout
+        ]
+        return tree, responses
+
+
+_problem_templates = OrderedDict()
+_problem_templates_lock = threading.Lock()
+
+
+def _get_problem_template(key):
+    """
+    Return the cached ProblemTemplate for `key`, or None.
+    """
+    with _problem_templates_lock:
+        template = _problem_templates.pop(key, None)
+        if template is not None:
+            _problem_templates[key] = template
+        return template
+
+
+def _set_problem_template(key, template):
+    """
+    Cache `template` for `key`, evicting the least recently used templates if need be.
+    """
+    with _problem_templates_lock:
+        _problem_templates[key] = template
+        while len(_problem_templates) > PROBLEM_TEMPLATE_CACHE_SIZE:
+            _problem_templates.popitem(last=False)
+
+
 class LoncapaProblem(object):
     """
     Main class for capa Problems.
@@ -154,25 +227,18 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # Parse the problem XML into an element tree with ID's added to the responses
+        # and their inputs, or copy the tree parsed for another student.
+        responses = self._parse_problem(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
+        # Pre-parse the XML tree: perform some in-place transformations.
+        # This also creates the dict (self.responders) of Response
         # instances for each question in the problem. The dict has keys = xml subtree of
         # Response, values = Response instance
-        self._preprocess_problem(self.tree)
+        self._preprocess_problem(self.tree, responses)
 
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
@@ -529,6 +595,46 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _parse_problem(self, problem_text):
+        """
+        Set `self.problem_text` and `self.tree` from `problem_text` and return
+        the list of `(response, inputfields)` elements of the tree (see
+        `_assign_response_ids`).
+
+        A problem's text is the same for every student, so once it has been
+        parsed, a template of the result is cached and later instances of the
+        problem get a copy of its tree. Problems with <include> tags aren't
+        cached, since the included files might change.
+        """
+        if isinstance(problem_text, unicode):
+            text_hash = hashlib.sha1(problem_text.encode('utf-8')).hexdigest()
+        else:
+            text_hash = hashlib.sha1(problem_text).hexdigest()
+        key = (text_hash, self.problem_id)
+
+        template = _get_problem_template(key)
+        if template is not None:
+            self.problem_text = template.problem_text
+            self.tree, responses = template.copy_tree()
+            return responses
+
+        # Convert startouttext and endouttext to proper <text></text>
+        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+        self.problem_text = problem_text
+
+        # parse problem XML file into an element tree
+        self.tree = etree.XML(problem_text)
+
+        if self.tree.find('.//include') is not None:
+            # handle any <include file="foo"> tags
+            self._process_includes()
+            return self._assign_response_ids(self.tree)
+
+        responses = self._assign_response_ids(self.tree)
+        _set_problem_template(key, ProblemTemplate.from_responses(problem_text, self.tree, responses))
+        return responses
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -774,19 +880,16 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _assign_response_ids(self, tree):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns the list of `(response, inputfields)` elements, in document order.
         """
+        responses = []
         response_id = 1
-        self.responders = {}
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             response_id_str = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -807,6 +910,21 @@ class LoncapaProblem(object):
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+            responses.append((response, inputfields))
+        return responses
+
+    def _preprocess_problem(self, tree, responses):  # private
+        """
+        Annoted correctness and value
+        In-place transformation
+
+        Create capa Response instances for each of the `(response, inputfields)`
+        returned by `_assign_response_ids` and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response, inputfields in responses:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(response, inputfields, self.context, self.capa_system)
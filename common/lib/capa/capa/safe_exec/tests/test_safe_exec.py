@@ -9,7 +9,7 @@ import unittest
 
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, LocalCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +177,73 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestLocalCache(unittest.TestCase):
+    """Test the in-process cache in front of the shared cache."""
+
+    def test_local_hit(self):
+        shared = {}
+        cache = LocalCache(DictCache(shared))
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(len(shared), 1)
+
+        # Fiddle with the shared cache: the local copy is used.
+        shared[shared.keys()[0]] = (None, {'a': 17})
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['shared_hits'], 0)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertGreaterEqual(stats['time_saved'], 0)
+
+    def test_shared_hit(self):
+        shared = {}
+        safe_exec("a = int(math.pi)", {}, cache=DictCache(shared))
+
+        cache = LocalCache(DictCache(shared))
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(cache.shared_hits, 1)
+        # and now it's in the local tier
+        shared.clear()
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(shared, {})
+        self.assertEqual(cache.hits, 1)
+
+    def test_clear(self):
+        cache = LocalCache()
+        cache.set('key', 1)
+        cache.get('key')
+        cache.clear()
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.stats()['hits'], 0)
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_results_are_copied(self):
+        cache = LocalCache()
+        cache.set('key', (None, {'a': [1, 2]}))
+        cache.get('key')[1]['a'].append(3)
+        self.assertEqual(cache.get('key'), (None, {'a': [1, 2]}))
+
+    def test_eviction(self):
+        cache = LocalCache(max_entries=2)
+        cache.set('one', 1)
+        cache.set('two', 2)
+        # touch one so that two is the least recently used
+        cache.get('one')
+        cache.set('three', 3)
+        self.assertIsNone(cache.get('two'))
+        self.assertEqual(cache.get('one'), 1)
+        self.assertEqual(cache.get('three'), 3)
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,70 @@
+"""
+Tests for the parsed problem templates shared by LoncapaProblem instances
+"""
+import textwrap
+import unittest
+
+from lxml import etree
+import mock
+
+from capa import capa_problem
+from . import new_loncapa_problem, test_capa_system
+
+
+class ProblemTemplateTest(unittest.TestCase):
+    """
+    Test that problems built from a cached template match those parsed from scratch
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <startouttext/>What is 1 + 1?<endouttext/>
+            <stringresponse answer="2">
+                <textline size="5"/>
+            </stringresponse>
+            <p>And 1 + 2?</p>
+            <stringresponse answer="3">
+                <textline size="5"/>
+            </stringresponse>
+            <solution><p>Explanation</p></solution>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateTest, self).setUp()
+        patcher = mock.patch.object(capa_problem, '_problem_templates', capa_problem.OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_as_parsed(self):
+        first = new_loncapa_problem(self.xml, seed=1)
+        self.assertEqual(len(capa_problem._problem_templates), 1)  # pylint: disable=protected-access
+        second = new_loncapa_problem(self.xml, seed=2)
+
+        self.assertEqual(etree.tostring(second.tree), etree.tostring(first.tree))
+        self.assertEqual(second.problem_text, first.problem_text)
+        self.assertEqual(
+            sorted((response.get('id'), [entry.get('id') for entry in responder.inputfields])
+                   for response, responder in second.responders.items()),
+            sorted((response.get('id'), [entry.get('id') for entry in responder.inputfields])
+                   for response, responder in first.responders.items()),
+        )
+        self.assertEqual(second.get_question_answers(), first.get_question_answers())
+        self.assertEqual(second.tree.find('.//solution').get('id'), '1_solution_1')
+
+        # the responders work on the copy of the tree, not the template
+        for response, responder in second.responders.items():
+            self.assertIs(response.getroottree().getroot(), second.tree)
+            self.assertIs(responder.xml, response)
+        self.assertIsNot(second.tree, first.tree)
+
+    def test_grading_from_template(self):
+        new_loncapa_problem(self.xml)
+        problem = new_loncapa_problem(self.xml)
+        correct_map = problem.grade_answers({'1_2_1': '2', '1_3_1': '4'})
+        self.assertTrue(correct_map.is_correct('1_2_1'))
+        self.assertFalse(correct_map.is_correct('1_3_1'))
+
+    def test_problem_id_in_key(self):
+        new_loncapa_problem(self.xml)
+        problem = capa_problem.LoncapaProblem(self.xml, id='other', seed=1, capa_system=test_capa_system())
+        self.assertEqual(problem.tree.xpath('//stringresponse')[0].get('id'), 'other_1')
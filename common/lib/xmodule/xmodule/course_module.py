@@ -649,6 +649,164 @@ class CourseFields(object):
     )
 
 
+def course_has_ended(course):
+    """
+    Returns True if the current time is after the specified course end date.
+    Returns False if there is no end date specified.
+
+    This, and the other course_ functions, take a CourseDescriptor or anything with the same
+    fields, like the summaries course listings use.
+    """
+    if course.end is None:
+        return False
+
+    return datetime.now(UTC()) > course.end
+
+
+def course_has_started(course):
+    """
+    Returns True if the current time is after the course start date.
+    """
+    return datetime.now(UTC()) > course.start
+
+
+def course_may_certify(course):
+    """
+    Return True if it is acceptable to show the student a certificate download link
+    """
+    show_early = (
+        course.certificates_display_behavior in ('early_with_info', 'early_no_info') or
+        course.certificates_show_before_end
+    )
+    return show_early or course_has_ended(course)
+
+
+def course_start_date_is_still_default(course):
+    """
+    Checks if the start date set for the course is still default, i.e. .start has not been modified,
+    and .advertised_start has not been set.
+    """
+    return course.advertised_start is None and course.start == CourseFields.start.default
+
+
+def course_start_datetime_text(course, format_string, ugettext, strftime):
+    """
+    Returns the desired text corresponding the course's start date and time in UTC.  Prefers .advertised_start,
+    then falls back to .start
+    """
+    _ = ugettext
+
+    def try_parse_iso_8601(text):
+        try:
+            result = Date().from_json(text)
+            if result is None:
+                result = text.title()
+            else:
+                result = strftime(result, format_string)
+                if format_string == "DATE_TIME":
+                    result = _add_timezone_string(result)
+        except ValueError:
+            result = text.title()
+
+        return result
+
+    if isinstance(course.advertised_start, basestring):
+        return try_parse_iso_8601(course.advertised_start)
+    elif course_start_date_is_still_default(course):
+        # Translators: TBD stands for 'To Be Determined' and is used when a course
+        # does not yet have an announced start date.
+        return _('TBD')
+    else:
+        when = course.advertised_start or course.start
+
+        if format_string == "DATE_TIME":
+            return _add_timezone_string(strftime(when, format_string))
+
+        return strftime(when, format_string)
+
+
+def course_end_datetime_text(course, format_string, strftime):
+    """
+    Returns the end date or date_time for the course formatted as a string.
+
+    If the course does not have an end date set (course.end is None), an empty string will be returned.
+    """
+    if course.end is None:
+        return ''
+    else:
+        date_time = strftime(course.end, format_string)
+        return date_time if format_string == "SHORT_DATE" else _add_timezone_string(date_time)
+
+
+def _add_timezone_string(date_time):
+    """
+    Adds 'UTC' string to the end of start/end date and time texts.
+    """
+    return date_time + u" UTC"
+
+
+def course_is_newish(course):
+    """
+    Returns if the course has been flagged as new. If
+    there is no flag, return a heuristic value considering the
+    announcement and the start dates.
+    """
+    flag = course.is_new
+    if flag is None:
+        # Use a heuristic if the course has not been flagged
+        announcement, start, now = _course_sorting_dates(course)
+        if announcement and (now - announcement).days < 30:
+            # The course has been announced for less that month
+            return True
+        elif (now - start).days < 1:
+            # The course has not started yet
+            return True
+        else:
+            return False
+    elif isinstance(flag, basestring):
+        return flag.lower() in ['true', 'yes', 'y']
+    else:
+        return bool(flag)
+
+
+def course_sorting_score(course):
+    """
+    Returns a tuple that can be used to sort the courses according
+    the how "new" they are. The "newness" score is computed using a
+    heuristic that takes into account the announcement and
+    (advertized) start dates of the course if available.
+
+    The lower the number the "newer" the course.
+    """
+    # Make courses that have an announcement date shave a lower
+    # score than courses than don't, older courses should have a
+    # higher score.
+    announcement, start, now = _course_sorting_dates(course)
+    scale = 300.0  # about a year
+    if announcement:
+        days = (now - announcement).days
+        score = -exp(-days / scale)
+    else:
+        days = (now - start).days
+        score = exp(days / scale)
+    return score
+
+
+def _course_sorting_dates(course):
+    # utility function to get datetime objects for dates used to
+    # compute the is_new flag and the sorting_score
+    try:
+        start = dateutil.parser.parse(course.advertised_start)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=UTC())
+    except (ValueError, AttributeError):
+        start = course.start
+
+    now = datetime.now(UTC())
+
+    return course.announcement, start, now
+
+
 class CourseDescriptor(CourseFields, SequenceDescriptor):
     module_class = SequenceModule
 
@@ -809,20 +967,16 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
         Returns True if the current time is after the specified course end date.
         Returns False if there is no end date specified.
         """
-        if self.end is None:
-            return False
-
-        return datetime.now(UTC()) > self.end
+        return course_has_ended(self)
 
     def may_certify(self):
         """
         Return True if it is acceptable to show the student a certificate download link
         """
-        show_early = self.certificates_display_behavior in ('early_with_info', 'early_no_info') or self.certificates_show_before_end
-        return show_early or self.has_ended()
+        return course_may_certify(self)
 
     def has_started(self):
-        return datetime.now(UTC()) > self.start
+        return course_has_started(self)
 
     @property
     def grader(self):
@@ -920,64 +1074,15 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
         there is no flag, return a heuristic value considering the
         announcement and the start dates.
         """
-        flag = self.is_new
-        if flag is None:
-            # Use a heuristic if the course has not been flagged
-            announcement, start, now = self._sorting_dates()
-            if announcement and (now - announcement).days < 30:
-                # The course has been announced for less that month
-                return True
-            elif (now - start).days < 1:
-                # The course has not started yet
-                return True
-            else:
-                return False
-        elif isinstance(flag, basestring):
-            return flag.lower() in ['true', 'yes', 'y']
-        else:
-            return bool(flag)
+        return course_is_newish(self)
 
     @property
     def sorting_score(self):
         """
         Returns a tuple that can be used to sort the courses according
-        the how "new" they are. The "newness" score is computed using a
-        heuristic that takes into account the announcement and
-        (advertized) start dates of the course if available.
-
-        The lower the number the "newer" the course.
+        the how "new" they are. The lower the number the "newer" the course.
         """
-        # Make courses that have an announcement date shave a lower
-        # score than courses than don't, older courses should have a
-        # higher score.
-        announcement, start, now = self._sorting_dates()
-        scale = 300.0  # about a year
-        if announcement:
-            days = (now - announcement).days
-            score = -exp(-days / scale)
-        else:
-            days = (now - start).days
-            score = exp(days / scale)
-        return score
-
-    def _sorting_dates(self):
-        # utility function to get datetime objects for dates used to
-        # compute the is_new flag and the sorting_score
-
-        announcement = self.announcement
-        if announcement is not None:
-            announcement = announcement
-
-        try:
-            start = dateutil.parser.parse(self.advertised_start)
-            if start.tzinfo is None:
-                start = start.replace(tzinfo=UTC())
-        except (ValueError, AttributeError):
-            start = self.start
-
-        now = datetime.now(UTC())
-
-        return announcement, start, now
+        return course_sorting_score(self)
 
     @lazy
     def grading_context(self):
@@ -1050,36 +1155,7 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
         then falls back to .start
         """
         i18n = self.runtime.service(self, "i18n")
-        _ = i18n.ugettext
-        strftime = i18n.strftime
-
-        def try_parse_iso_8601(text):
-            try:
-                result = Date().from_json(text)
-                if result is None:
-                    result = text.title()
-                else:
-                    result = strftime(result, format_string)
-                    if format_string == "DATE_TIME":
-                        result = self._add_timezone_string(result)
-            except ValueError:
-                result = text.title()
-
-            return result
-
-        if isinstance(self.advertised_start, basestring):
-            return try_parse_iso_8601(self.advertised_start)
-        elif self.start_date_is_still_default:
-            # Translators: TBD stands for 'To Be Determined' and is used when a course
-            # does not yet have an announced start date.
-            return _('TBD')
-        else:
-            when = self.advertised_start or self.start
-
-            if format_string == "DATE_TIME":
-                return self._add_timezone_string(strftime(when, format_string))
-
-            return strftime(when, format_string)
+        return course_start_datetime_text(self, format_string, i18n.ugettext, i18n.strftime)
 
     @property
     def start_date_is_still_default(self):
@@ -1087,7 +1163,7 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
         Checks if the start date set for the course is still default, i.e. .start has not been modified,
         and .advertised_start has not been set.
         """
-        return self.advertised_start is None and self.start == CourseFields.start.default
+        return course_start_date_is_still_default(self)
 
     def end_datetime_text(self, format_string="SHORT_DATE"):
         """
@@ -1095,18 +1171,8 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
 
         If the course does not have an end date set (course.end is None), an empty string will be returned.
         """
-        if self.end is None:
-            return ''
-        else:
-            strftime = self.runtime.service(self, "i18n").strftime
-            date_time = strftime(self.end, format_string)
-            return date_time if format_string == "SHORT_DATE" else self._add_timezone_string(date_time)
-
-    def _add_timezone_string(self, date_time):
-        """
-        Adds 'UTC' string to the end of start/end date and time texts.
-        """
-        return date_time + u" UTC"
+        strftime = self.runtime.service(self, "i18n").strftime
+        return course_end_datetime_text(self, format_string, strftime)
 
     @property
     def forum_posts_allowed(self):
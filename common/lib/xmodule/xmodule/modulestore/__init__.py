@@ -882,6 +882,15 @@ class ModuleStoreReadBase(BulkOperationsMixin, ModuleStoreRead):
                 return course
         return None
 
+    def get_course_keys(self):
+        """
+        Returns the keys of the courses in this modulestore.
+
+        Default impl--the ids of the course list. Modulestores which can list the keys without
+        loading the courses override this.
+        """
+        return [course.location.course_key for course in self.get_courses()]
+
     def has_course(self, course_id, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
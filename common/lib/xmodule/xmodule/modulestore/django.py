@@ -11,6 +11,7 @@ from django.conf import settings
 if not settings.configured:
     settings.configure()
 from django.core.cache import get_cache, InvalidCacheBackendError
+from django.dispatch import Signal
 import django.utils
 
 import re
@@ -20,6 +21,7 @@ from xmodule.util.django import get_current_request_hostname
 import xmodule.modulestore  # pylint: disable=unused-import
 from xmodule.modulestore.mixed import MixedModuleStore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.contentstore.django import contentstore
 import xblock.reference.plugins
 
@@ -32,6 +34,17 @@ except ImportError:
 
 ASSET_IGNORE_REGEX = getattr(settings, "ASSET_IGNORE_REGEX", r"(^\._.*$)|(^\.DS_Store$)|(^.*~$)")
 
+# Sent when what the LMS shows of a course may have changed: when the course is
+# created, deleted, or has content published, or its settings are updated.
+course_published = Signal(providing_args=['course_key'])
+
+
+def _send_course_published(course_key):
+    """
+    Send the course_published signal for the course.
+    """
+    course_published.send(sender=MixedModuleStore, course_key=course_key)
+
 
 def load_function(path):
     """
@@ -70,6 +83,15 @@ def create_modulestore_instance(engine, content_store, doc_store_config, options
 
     if issubclass(class_, MixedModuleStore):
         _options['create_modulestore_instance'] = create_modulestore_instance
+        _options['course_published_callback'] = _send_course_published
+
+    if issubclass(class_, SplitMongoModuleStore):
+        _options.setdefault('structure_cache_max_blocks', getattr(settings, 'SPLIT_STRUCTURE_CACHE_MAX_BLOCKS', 0))
+        # the second tier of split's structure cache is only used if explicitly configured
+        try:
+            _options['structure_cache_subsystem'] = get_cache('course_structure_cache')
+        except InvalidCacheBackendError:
+            pass
 
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
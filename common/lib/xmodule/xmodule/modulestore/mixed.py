@@ -98,16 +98,24 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
     """
     ModuleStore knows how to route requests to the right persistence ms
     """
-    def __init__(self, contentstore, mappings, stores, i18n_service=None, fs_service=None, create_modulestore_instance=None, **kwargs):
+    def __init__(
+        self, contentstore, mappings, stores, i18n_service=None, fs_service=None, create_modulestore_instance=None,
+        course_published_callback=None, **kwargs
+    ):
         """
         Initialize a MixedModuleStore. Here we look into our passed in kwargs which should be a
         collection of other modulestore configuration information
+
+        course_published_callback, if given, is called with a course key whenever what the LMS
+        shows of that course may have changed.
         """
         super(MixedModuleStore, self).__init__(contentstore, **kwargs)
 
         if create_modulestore_instance is None:
             raise ValueError('MixedModuleStore constructor must be passed a create_modulestore_instance function')
 
+        self.course_published_callback = course_published_callback
+
         self.modulestores = []
         self.mappings = {}
 
@@ -158,6 +166,13 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
             course_id = course_id.replace(branch=None)
         return course_id
 
+    def _course_published(self, course_key):
+        """
+        Tell the course_published_callback, if there is one, that the course may have changed.
+        """
+        if self.course_published_callback is not None:
+            self.course_published_callback(self._clean_course_id_for_mapping(course_key))
+
     def _get_modulestore_for_courseid(self, course_id=None):
         """
         For a given course_id, look in the mapping table and see if it has been pinned
@@ -261,6 +276,16 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
                     courses[course_id] = course
         return courses.values()
 
+    def get_course_keys(self):
+        """
+        Returns the keys of the courses in all the modulestores, without loading the courses
+        where the modulestore can list them without doing so.
+        """
+        course_keys = set()
+        for store in self.modulestores:
+            course_keys.update(self._clean_course_id_for_mapping(course_key) for course_key in store.get_course_keys())
+        return list(course_keys)
+
     @strip_key
     def get_libraries(self, **kwargs):
         """
@@ -349,7 +374,9 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         """
         assert(isinstance(course_key, CourseKey))
         store = self._get_modulestore_for_courseid(course_key)
-        return store.delete_course(course_key, user_id)
+        result = store.delete_course(course_key, user_id)
+        self._course_published(course_key)
+        return result
 
     @contract(asset_metadata='AssetMetadata')
     def save_asset_metadata(self, asset_metadata, user_id):
@@ -542,6 +569,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         # add new course to the mapping
         self.mappings[course_key] = store
 
+        self._course_published(course_key)
         return course
 
     @strip_key
@@ -588,7 +616,9 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         # to have only course re-runs go to split. This code, however, uses the config'd priority
         dest_modulestore = self._get_modulestore_for_courseid(dest_course_id)
         if source_modulestore == dest_modulestore:
-            return source_modulestore.clone_course(source_course_id, dest_course_id, user_id, fields, **kwargs)
+            result = source_modulestore.clone_course(source_course_id, dest_course_id, user_id, fields, **kwargs)
+            self._course_published(dest_course_id)
+            return result
 
         if dest_modulestore.get_modulestore_type() == ModuleStoreEnum.Type.split:
             split_migrator = SplitMigrator(dest_modulestore, source_modulestore)
@@ -597,6 +627,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
             )
             # the super handles assets and any other necessities
             super(MixedModuleStore, self).clone_course(source_course_id, dest_course_id, user_id, fields, **kwargs)
+            self._course_published(dest_course_id)
         else:
             raise NotImplementedError("No code for cloning from {} to {}".format(
                 source_modulestore, dest_modulestore
@@ -659,7 +690,11 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         (content, children, and metadata) attribute the change to the given user.
         """
         store = self._verify_modulestore_support(xblock.location.course_key, 'update_item')
-        return store.update_item(xblock, user_id, allow_not_found, **kwargs)
+        result = store.update_item(xblock, user_id, allow_not_found, **kwargs)
+        # the course's settings and about pages are published as soon as they're saved
+        if xblock.location.category in ('course', 'about'):
+            self._course_published(xblock.location.course_key)
+        return result
 
     @strip_key
     def delete_item(self, location, user_id, **kwargs):
@@ -761,7 +796,9 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         Returns the newly published item.
         """
         store = self._verify_modulestore_support(location.course_key, 'publish')
-        return store.publish(location, user_id, **kwargs)
+        result = store.publish(location, user_id, **kwargs)
+        self._course_published(location.course_key)
+        return result
 
     @strip_key
     def unpublish(self, location, user_id, **kwargs):
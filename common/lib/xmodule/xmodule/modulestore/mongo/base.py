@@ -15,7 +15,6 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
 from uuid import uuid4
 
@@ -68,6 +67,9 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
     name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
 ))
 
+# how long, in seconds, an update of a course's cached metadata inheritance tree may hold its lock
+INHERITANCE_TREE_LOCK_TIMEOUT = 60
+
 # Allow us to call _from_deprecated_(son|string) throughout the file
 # pylint: disable=protected-access
 
@@ -357,6 +359,31 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         return xblock._edit_info.get('published_date')
 
 
+def _compute_inherited_metadata(results_by_url, url, metadata, metadata_to_inherit):
+    """
+    Record in metadata_to_inherit what the descendants of the block at url inherit,
+    given the block's inheritable metadata, including what it inherits.
+
+    Children which don't set any inheritable metadata share their parent's dict,
+    so only the blocks which change something get a copy.
+    """
+    # go through all the children and recurse, but only if we have
+    # in the result set. Remember results will not contain leaf nodes
+    for child in results_by_url[url].get('definition', {}).get('children', []):
+        if child in results_by_url:
+            child_metadata = results_by_url[child].get('metadata', {})
+            if child_metadata:
+                new_child_metadata = dict(metadata)
+                new_child_metadata.update(child_metadata)
+            else:
+                new_child_metadata = metadata
+            metadata_to_inherit[child] = new_child_metadata
+            _compute_inherited_metadata(results_by_url, child, new_child_metadata, metadata_to_inherit)
+        else:
+            # this is likely a leaf node, so let's record what metadata we need to inherit
+            metadata_to_inherit[child] = metadata
+
+
 # The only thing using this w/ wildcards is contentstore.mongo for asset retrieval
 def location_to_query(location, wildcard=True, tag='i4x'):
     """
@@ -583,6 +610,22 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             ('_id.course', course_id.course),
             ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
         ])
+        results_by_url = self._find_inheritance_records(course_id, query)
+
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
+        for url, result in results_by_url.iteritems():
+            if result['_id']['category'] == 'course':
+                _compute_inherited_metadata(results_by_url, url, result.get('metadata', {}), metadata_to_inherit)
+
+        return metadata_to_inherit
+
+    def _find_inheritance_records(self, course_id, query):
+        """
+        Return the Location, children, and inheritable metadata of the blocks matching query,
+        keyed by their published location url, with the children of their draft and
+        published versions combined.
+        """
         # we just want the Location, children, and inheritable metadata
         record_filter = {'_id': 1, 'definition.children': 1}
 
@@ -597,7 +640,6 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
         results_by_url = {}
-        root = None
 
         # now go through the results and order them by the location url
         for result in resultset:
@@ -610,39 +652,118 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
                 additional_children = result.get('definition', {}).get('children', [])
                 total_children = existing_children + additional_children
-                # use set to get rid of duplicates. We don't care about order; so, it shouldn't matter.
-                results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
+                # use list(set()) to get rid of duplicates. We don't care about order; so, it shouldn't matter.
+                results_by_url[location_url].setdefault('definition', {})['children'] = list(set(total_children))
             else:
                 results_by_url[location_url] = result
-            if location.category == 'course':
-                root = location_url
+        return results_by_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+    def _update_metadata_inheritance_tree(self, course_id, xblock):
+        """
+        Update the course's cached metadata inheritance tree for a change to xblock, only
+        recomputing the entries for xblock's subtree, and return the tree.
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
+        The cached tree is read, patched, and written back under a lock in the caching subsystem,
+        so that updates in other processes can't lose each other's changes. An update which can't
+        get the lock recomputes the tree in full instead, and marks the tree stale so that the
+        holder of the lock drops the tree it patched.
+        """
+        course_id = self.fill_in_run(course_id)
+        location = as_published(xblock.scope_ids.usage_id)
+        if location.category not in BLOCK_TYPES_WITH_CHILDREN:
+            # the tree only depends on the metadata and children of containers
+            return self._get_cached_metadata_inheritance_tree(course_id)
+
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is None:
+            # there's no shared tree to patch
+            return self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+
+        tree_key = unicode(course_id)
+        lock_key = u'{}.update_lock'.format(course_id)
+        stale_key = u'{}.stale'.format(course_id)
+        # cache.add fails if the key already exists
+        if not cache.add(lock_key, True, INHERITANCE_TREE_LOCK_TIMEOUT):
+            cache.set(stale_key, True, INHERITANCE_TREE_LOCK_TIMEOUT)
+            return self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+        try:
+            tree = cache.get(tree_key)
+            if tree:
+                tree = self._patch_metadata_inheritance_tree(course_id, tree, location)
+            if not tree:
+                return self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cache.set(tree_key, tree)
+            if cache.get(stale_key):
+                # another process changed the course meanwhile, which this tree may not reflect
+                cache.delete(tree_key)
+                cache.delete(stale_key)
+        finally:
+            cache.delete(lock_key)
 
-        if root is not None:
-            _compute_inherited_metadata(root)
+        if self.request_cache is not None:
+            if 'metadata_inheritance' not in self.request_cache.data:
+                self.request_cache.data['metadata_inheritance'] = {}
+            self.request_cache.data['metadata_inheritance'][tree_key] = tree
+        return tree
 
-        return metadata_to_inherit
+    def _patch_metadata_inheritance_tree(self, course_id, tree, location):
+        """
+        Recompute the entries of the metadata inheritance tree for the subtree of the container at
+        location, the published revision of the one which changed, in place. Return the tree, or
+        None if it has to be recomputed in full.
+        """
+        # find the metadata the container inherits
+        if location.category == 'course':
+            parent_metadata = {}
+        else:
+            parent = self._get_raw_parent_location(location, ModuleStoreEnum.RevisionOption.draft_preferred)
+            if parent is None:
+                # orphans aren't in the tree
+                return tree
+            parent = as_published(parent)
+            if unicode(parent) in tree:
+                parent_metadata = tree[unicode(parent)]
+            elif parent.category == 'course':
+                parent_metadata = self._find_inheritance_records(
+                    course_id, {'_id': parent.to_deprecated_son()}
+                ).get(unicode(parent), {}).get('metadata', {})
+            else:
+                # the parent isn't in the tree either, so start over
+                return None
+
+        # fetch the containers in the subtree, a level at a time
+        results_by_url = {}
+        level = [location]
+        while level:
+            query = {
+                '_id': {'$in': [
+                    as_func(child).to_deprecated_son() for child in level for as_func in [as_draft, as_published]
+                ]},
+                '_id.category': {'$in': BLOCK_TYPES_WITH_CHILDREN},
+            }
+            level_results = self._find_inheritance_records(course_id, query)
+            results_by_url.update(level_results)
+            level = [
+                course_id.make_usage_key_from_deprecated_string(child)
+                for result in level_results.itervalues()
+                for child in result.get('definition', {}).get('children', [])
+                if child not in results_by_url
+            ]
+
+        url = unicode(location)
+        if url not in results_by_url:
+            return tree
+        # use the same revision's metadata as computing the whole tree does
+        own_metadata = results_by_url[url].get('metadata', {})
+        if own_metadata:
+            metadata = dict(parent_metadata)
+            metadata.update(own_metadata)
+        else:
+            metadata = parent_metadata
+        if location.category != 'course':
+            tree[url] = metadata
+        _compute_inherited_metadata(results_by_url, url, metadata, tree)
+        return tree
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
@@ -685,18 +806,24 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, updated_xblock=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given updated_xblock, the only block which changed, only the part of the tree
+        under it is recomputed.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
             # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            if updated_xblock is not None:
+                cached_metadata = self._update_metadata_inheritance_tree(course_id, updated_xblock)
+            else:
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -836,6 +963,20 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         )
         return [course for course in base_list if not isinstance(course, ErrorDescriptor)]
 
+    @autoretry_read()
+    def get_course_keys(self):
+        """
+        Returns the keys of the courses, from their ids alone.
+        """
+        return [
+            SlashSeparatedCourseKey(course['_id']['org'], course['_id']['course'], course['_id']['name'])
+            for course in self.collection.find({'_id.category': 'course'}, {'_id': 1})
+            if not (  # TODO kill this
+                course['_id']['org'] == 'edx' and
+                course['_id']['course'] == 'templates'
+            )
+        ]
+
     def _find_one(self, location):
         '''Look for a given location in the collection. If the item is not present, raise
         ItemNotFoundError.
@@ -1257,7 +1398,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, updated_xblock=xblock
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -1,5 +1,43 @@
 from .exceptions import (ItemNotFoundError, NoPathToItem)
 
+# The most courses to keep the paths of in _course_paths
+MAX_CACHED_COURSE_PATHS = 100
+
+# The paths of the blocks of the courses path_to_location has looked in, as
+# {course_id: (course version, {usage key: (course_id, chapter, section, position)})}
+_course_paths = {}
+
+
+def course_version(course):
+    """
+    Return a string that changes whenever anything in the course is changed or
+    published, or None if the course's modulestore doesn't track that.
+    """
+    course_entry = getattr(course.runtime, 'course_entry', None)
+    if course_entry is not None:
+        # split: the version of the course's structure, which is different on every branch
+        return unicode(course_entry.structure['_id'])
+    if hasattr(course.runtime, 'get_subtree_edited_on'):
+        # old mongo: every change to a block is recorded on its ancestors, but the
+        # drafts and the published blocks share the course
+        edited_on = course.runtime.get_subtree_edited_on(course)
+        if edited_on is not None:
+            branch = getattr(course.runtime.modulestore, 'get_branch_setting', lambda: None)()
+            return u'{}.{}'.format(branch, edited_on.isoformat())
+    return None
+
+
+def _version_agnostic(key):
+    """
+    Return the key without its version or branch, as the blocks of every version of
+    a course share the cached paths.
+    """
+    if hasattr(key, 'version_agnostic'):
+        key = key.version_agnostic()
+    if hasattr(key, 'for_branch'):
+        key = key.for_branch(None)
+    return key
+
 
 def path_to_location(modulestore, usage_key):
     '''
@@ -22,8 +60,78 @@ def path_to_location(modulestore, usage_key):
 
     If the section is a sequential or vertical, position will be the children index
     of this location under that sequence.
+
+    The paths of every block in a course are found together, and kept until the
+    course's version changes, so only the first lookup in each version of a
+    course walks the course.
     '''
 
+    with modulestore.bulk_operations(usage_key.course_key):
+        if not modulestore.has_item(usage_key):
+            raise ItemNotFoundError(usage_key)
+
+        course = modulestore.get_course(usage_key.course_key)
+        version = course_version(course) if course is not None else None
+        if version is None:
+            return _search_path_to_location(modulestore, usage_key)
+
+        course_id = _version_agnostic(course.id)
+        cached = _course_paths.get(course_id)
+        if cached is None or cached[0] != version:
+            if len(_course_paths) >= MAX_CACHED_COURSE_PATHS:
+                _course_paths.clear()
+            course = modulestore.get_course(course_id, depth=None)
+            cached = (version, _paths_in_course(course_id, course))
+            _course_paths[course_id] = cached
+
+        path = cached[1].get(_version_agnostic(usage_key))
+        if path is None:
+            raise NoPathToItem(usage_key)
+        return path
+
+
+def _paths_in_course(course_id, course):
+    """
+    Return a dict from the usage key of every block in the course to its
+    (course_id, chapter, section, position) path, as _search_path_to_location
+    would find it, in one walk over the course.
+    """
+    paths = {_version_agnostic(course.location): (course_id, None, None, None)}
+    # Each block on the stack comes with the names of its chapter and section,
+    # its depth below the course, and the positions of it and its ancestors
+    # in the sequences below the section
+    stack = [(course, None, None, 0, ())]
+    while stack:
+        block, chapter, section, depth, positions = stack.pop()
+        if not block.has_children:
+            continue
+
+        is_sequence = depth >= 2 and block.location.block_type in ('sequential', 'videosequence')
+        # this calls get_children rather than just children b/c old mongo includes private children
+        # in children but not in get_children
+        for index, child in enumerate(block.get_children(), 1):
+            child_key = _version_agnostic(child.location)
+            if child_key in paths:
+                # a block with more than one parent keeps its first path
+                continue
+
+            child_chapter = child.location.name if depth == 0 else chapter
+            child_section = child.location.name if depth == 1 else section
+            # positions are 1-indexed, and should be strings to be consistent with
+            # url parsing.
+            child_positions = positions + (str(index),) if is_sequence else positions
+            position = "_".join(child_positions) if depth >= 2 else None
+            paths[child_key] = (course_id, child_chapter, child_section, position)
+            stack.append((child, child_chapter, child_section, depth + 1, child_positions))
+    return paths
+
+
+def _search_path_to_location(modulestore, usage_key):
+    """
+    Find the path to the location by climbing from it to the course, for the
+    courses whose versions aren't known. See path_to_location.
+    """
+
     def flatten(xs):
         '''Convert lisp-style (a, (b, (c, ()))) list into a python list.
         Not a general flatten function. '''
@@ -68,40 +176,36 @@ def path_to_location(modulestore, usage_key):
             newpath = (next_usage, path)
             queue.append((parent, newpath))
 
-    with modulestore.bulk_operations(usage_key.course_key):
-        if not modulestore.has_item(usage_key):
-            raise ItemNotFoundError(usage_key)
-
-        path = find_path_to_course()
-        if path is None:
-            raise NoPathToItem(usage_key)
-
-        n = len(path)
-        course_id = path[0].course_key
-        # pull out the location names
-        chapter = path[1].name if n > 1 else None
-        section = path[2].name if n > 2 else None
-        # Figure out the position
-        position = None
-
-        # This block of code will find the position of a module within a nested tree
-        # of modules. If a problem is on tab 2 of a sequence that's on tab 3 of a
-        # sequence, the resulting position is 3_2. However, no positional modules
-        # (e.g. sequential and videosequence) currently deal with this form of
-        # representing nested positions. This needs to happen before jumping to a
-        # module nested in more than one positional module will work.
-        if n > 3:
-            position_list = []
-            for path_index in range(2, n - 1):
-                category = path[path_index].block_type
-                if category == 'sequential' or category == 'videosequence':
-                    section_desc = modulestore.get_item(path[path_index])
-                    # this calls get_children rather than just children b/c old mongo includes private children
-                    # in children but not in get_children
-                    child_locs = [c.location for c in section_desc.get_children()]
-                    # positions are 1-indexed, and should be strings to be consistent with
-                    # url parsing.
-                    position_list.append(str(child_locs.index(path[path_index + 1]) + 1))
-            position = "_".join(position_list)
-
-        return (course_id, chapter, section, position)
+    path = find_path_to_course()
+    if path is None:
+        raise NoPathToItem(usage_key)
+
+    n = len(path)
+    course_id = path[0].course_key
+    # pull out the location names
+    chapter = path[1].name if n > 1 else None
+    section = path[2].name if n > 2 else None
+    # Figure out the position
+    position = None
+
+    # This block of code will find the position of a module within a nested tree
+    # of modules. If a problem is on tab 2 of a sequence that's on tab 3 of a
+    # sequence, the resulting position is 3_2. However, no positional modules
+    # (e.g. sequential and videosequence) currently deal with this form of
+    # representing nested positions. This needs to happen before jumping to a
+    # module nested in more than one positional module will work.
+    if n > 3:
+        position_list = []
+        for path_index in range(2, n - 1):
+            category = path[path_index].block_type
+            if category == 'sequential' or category == 'videosequence':
+                section_desc = modulestore.get_item(path[path_index])
+                # this calls get_children rather than just children b/c old mongo includes private children
+                # in children but not in get_children
+                child_locs = [c.location for c in section_desc.get_children()]
+                # positions are 1-indexed, and should be strings to be consistent with
+                # url parsing.
+                position_list.append(str(child_locs.index(path[path_index + 1]) + 1))
+        position = "_".join(position_list)
+
+    return (course_id, chapter, section, position)
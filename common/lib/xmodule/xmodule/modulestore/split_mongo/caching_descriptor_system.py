@@ -71,6 +71,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
+        # definitions fetched for the blocks in module_data keyed by definition id
+        self.definitions = {}
+        # (subtree_edited_on, subtree_edited_by) of the blocks in module_data keyed by BlockKey
+        self.subtree_edit_info = {}
 
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
@@ -140,6 +144,23 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return json_data
 
+    def get_definition(self, course_key, definition_id):
+        """
+        Return the definition for a lazily loaded block. The first time any block's definition
+        is needed, fetches the definitions of all the blocks in module_data which don't have
+        them yet in one batch so that accessing each block's content doesn't cost a query per block.
+        """
+        if definition_id not in self.definitions:
+            definition_ids = set(
+                block['definition'] for block in self.module_data.itervalues()
+                if 'definition' in block and not block.get('definition_loaded', False)
+            )
+            definition_ids.difference_update(self.definitions)
+            definition_ids.add(definition_id)
+            for definition in self.modulestore.get_definitions(course_key, list(definition_ids)):
+                self.definitions[definition['_id']] = definition
+        return self.definitions.get(definition_id)
+
     # xblock's runtime does not always pass enough contextual information to figure out
     # which named container (course x branch) or which parent is requesting an item. Because split allows
     # a many:1 mapping from named containers to structures and because item's identities encode
@@ -169,7 +190,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         if definition_id is not None and not json_data.get('definition_loaded', False):
             definition_loader = DefinitionLazyLoader(
-                self.modulestore,
+                self,
                 course_key,
                 block_key.type,
                 definition_id,
@@ -262,12 +283,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         See :class: cms.lib.xblock.runtime.EditInfoRuntimeMixin
         """
         if not hasattr(xblock, '_subtree_edited_by'):
-            json_data = self.module_data[BlockKey.from_usage_key(xblock.location)]
-            if '_subtree_edited_by' not in json_data.setdefault('edit_info', {}):
-                self._compute_subtree_edited_internal(
-                    xblock.location.block_id, json_data, xblock.location.course_key
-                )
-            setattr(xblock, '_subtree_edited_by', json_data['edit_info']['_subtree_edited_by'])
+            __, edited_by = self._get_subtree_edit_info(
+                BlockKey.from_usage_key(xblock.location), xblock.location.course_key
+            )
+            setattr(xblock, '_subtree_edited_by', edited_by)
 
         return getattr(xblock, '_subtree_edited_by')
 
@@ -276,12 +295,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         See :class: cms.lib.xblock.runtime.EditInfoRuntimeMixin
         """
         if not hasattr(xblock, '_subtree_edited_on'):
-            json_data = self.module_data[BlockKey.from_usage_key(xblock.location)]
-            if '_subtree_edited_on' not in json_data.setdefault('edit_info', {}):
-                self._compute_subtree_edited_internal(
-                    xblock.location.block_id, json_data, xblock.location.course_key
-                )
-            setattr(xblock, '_subtree_edited_on', json_data['edit_info']['_subtree_edited_on'])
+            edited_on, __ = self._get_subtree_edit_info(
+                BlockKey.from_usage_key(xblock.location), xblock.location.course_key
+            )
+            setattr(xblock, '_subtree_edited_on', edited_on)
 
         return getattr(xblock, '_subtree_edited_on')
 
@@ -303,20 +320,21 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return getattr(xblock, '_published_on', None)
 
-    def _compute_subtree_edited_internal(self, block_id, json_data, course_key):
+    def _get_subtree_edit_info(self, block_key, course_key):
         """
         Recurse the subtree finding the max edited_on date and its concomitant edited_by. Cache it
+        in this runtime rather than in the block's json as the json may be shared (see StructureCache).
         """
-        max_date = json_data['edit_info']['edited_on']
-        max_by = json_data['edit_info']['edited_by']
-
-        for child in json_data.get('fields', {}).get('children', []):
-            child_data = self.get_module_data(BlockKey(*child), course_key)
-            if '_subtree_edited_on' not in json_data.setdefault('edit_info', {}):
-                self._compute_subtree_edited_internal(child, child_data, course_key)
-            if child_data['edit_info']['_subtree_edited_on'] > max_date:
-                max_date = child_data['edit_info']['_subtree_edited_on']
-                max_by = child_data['edit_info']['_subtree_edited_by']
-
-        json_data['edit_info']['_subtree_edited_on'] = max_date
-        json_data['edit_info']['_subtree_edited_by'] = max_by
+        if block_key not in self.subtree_edit_info:
+            json_data = self.get_module_data(block_key, course_key)
+            max_date = json_data['edit_info']['edited_on']
+            max_by = json_data['edit_info']['edited_by']
+
+            for child in json_data.get('fields', {}).get('children', []):
+                child_date, child_by = self._get_subtree_edit_info(BlockKey(*child), course_key)
+                if child_date > max_date:
+                    max_date = child_date
+                    max_by = child_by
+
+            self.subtree_edit_info[block_key] = (max_date, max_by)
+        return self.subtree_edit_info[block_key]
@@ -9,13 +9,14 @@ class DefinitionLazyLoader(object):
     object doesn't force access during init but waits until client wants the
     definition. Only works if the modulestore is a split mongo store.
     """
-    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter):
+    def __init__(self, definition_source, course_key, block_type, definition_id, field_converter):
         """
         Simple placeholder for yet-to-be-fetched data
-        :param modulestore: the pymongo db connection with the definitions
+        :param definition_source: anything w/ a get_definition(course_key, definition_id) method: the
+            modulestore or a runtime which fetches definitions in batches
         :param definition_locator: the id of the record in the above to fetch
         """
-        self.modulestore = modulestore
+        self.definition_source = definition_source
         self.course_key = course_key
         self.definition_locator = DefinitionLocator(block_type, definition_id)
         self.field_converter = field_converter
@@ -28,5 +29,5 @@ class DefinitionLazyLoader(object):
         # get_definition may return a cached value perhaps from another course or code path
         # so, we copy the result here so that updates don't cross-pollinate nor change the cached
         # value in such a way that we can't tell that the definition's been updated.
-        definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
+        definition = self.definition_source.get_definition(self.course_key, self.definition_locator.definition_id)
         return copy.deepcopy(definition)
@@ -2,6 +2,11 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import re
+import cPickle as pickle
+import logging
+import threading
+import zlib
+from collections import OrderedDict
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 import time
@@ -11,12 +16,14 @@ from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 from contracts import check
 from functools import wraps
-from pymongo.errors import AutoReconnect
+from pymongo.errors import AutoReconnect, BulkWriteError
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore.split_mongo import BlockKey
 import datetime
 import pytz
 
+log = logging.getLogger(__name__)
+
 
 def structure_from_mongo(structure):
     """
@@ -69,17 +76,182 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(object):
+    """
+    A thread-safe LRU cache of decoded structures keyed by structure '_id'.
+
+    Structures never change once they have an '_id'; so, entries never go stale and the
+    cache can be shared by every thread and modulestore instance in the process which reads
+    the same structures collection (see :meth:`get_shared`). The size is bounded by the total
+    number of blocks in the cached structures rather than by the number of structures as
+    structure sizes vary by orders of magnitude.
+
+    If given a ``second_tier`` (anything w/ django cache's ``get``, ``set``, and ``delete``, e.g., memcached),
+    structures are also stored there as compressed pickles so that other processes don't have
+    to refetch & decode them from mongo.
+
+    The structures returned are shared: callers must copy a structure before changing it
+    (as :meth:`SplitBulkWriteMixin.version_structure` does).
+    """
+    DEFAULT_MAX_BLOCKS = 50000
+
+    _shared_caches = {}
+    _shared_caches_lock = threading.Lock()
+
+    def __init__(self, max_blocks=DEFAULT_MAX_BLOCKS, second_tier=None, key_prefix=''):
+        self.max_blocks = max_blocks
+        self.second_tier = second_tier
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._structures = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.second_tier_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def get_shared(cls, name, max_blocks=DEFAULT_MAX_BLOCKS, second_tier=None):
+        """
+        Return the process-wide cache for the structures collection identified by name creating it
+        if necessary. The first caller's configuration wins.
+        """
+        with cls._shared_caches_lock:
+            cache = cls._shared_caches.get(name)
+            if cache is None:
+                cache = cls(max_blocks, second_tier, key_prefix=u'{}.'.format(name))
+                cls._shared_caches[name] = cache
+            return cache
+
+    def _second_tier_key(self, structure_id):
+        """
+        The key for the structure in the second tier cache
+        """
+        return u'split_structure.{}{}'.format(self.key_prefix, structure_id)
+
+    def get(self, structure_id):
+        """
+        Return the cached structure or None
+        """
+        with self._lock:
+            structure = self._structures.pop(structure_id, None)
+            if structure is not None:
+                # move to the most recently used end
+                self._structures[structure_id] = structure
+                self.hits += 1
+                return structure
+
+        if self.second_tier is not None:
+            try:
+                compressed_pickled_data = self.second_tier.get(self._second_tier_key(structure_id))
+            except Exception:  # pylint: disable=broad-except
+                log.warning("Failed to read structure %s from the second tier cache", structure_id, exc_info=True)
+                compressed_pickled_data = None
+            if compressed_pickled_data is not None:
+                structure = pickle.loads(zlib.decompress(compressed_pickled_data))
+                with self._lock:
+                    self.second_tier_hits += 1
+                self._add(structure_id, structure)
+                return structure
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, structure_id, structure):
+        """
+        Cache the structure (which must be in the decoded format returned by structure_from_mongo)
+        """
+        self._add(structure_id, structure)
+        if self.second_tier is not None:
+            try:
+                self.second_tier.set(
+                    self._second_tier_key(structure_id),
+                    zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL), 1),
+                    None
+                )
+            except Exception:  # pylint: disable=broad-except
+                log.warning("Failed to write structure %s to the second tier cache", structure_id, exc_info=True)
+
+    def _add(self, structure_id, structure):
+        """
+        Add the structure to the local tier evicting the least recently used ones to make room.
+        """
+        size = len(structure['blocks'])
+        if size > self.max_blocks:
+            return
+        with self._lock:
+            old_structure = self._structures.pop(structure_id, None)
+            if old_structure is not None:
+                self.size -= len(old_structure['blocks'])
+            while self._structures and self.size + size > self.max_blocks:
+                __, evicted = self._structures.popitem(last=False)
+                self.size -= len(evicted['blocks'])
+                self.evictions += 1
+            self._structures[structure_id] = structure
+            self.size += size
+
+    def discard(self, structure_id):
+        """
+        Remove the structure from both tiers if it's there
+        """
+        with self._lock:
+            structure = self._structures.pop(structure_id, None)
+            if structure is not None:
+                self.size -= len(structure['blocks'])
+        if self.second_tier is not None:
+            try:
+                self.second_tier.delete(self._second_tier_key(structure_id))
+            except Exception:  # pylint: disable=broad-except
+                log.warning("Failed to delete structure %s from the second tier cache", structure_id, exc_info=True)
+
+    def clear(self):
+        """
+        Empty the local tier. Intended for tests and for dropping the underlying db.
+        """
+        with self._lock:
+            self._structures.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        Return a dict of the cache's size and counters
+        """
+        with self._lock:
+            lookups = self.hits + self.second_tier_hits + self.misses
+            return {
+                'structures': len(self._structures),
+                'blocks': self.size,
+                'max_blocks': self.max_blocks,
+                'hits': self.hits,
+                'second_tier_hits': self.second_tier_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': float(self.hits + self.second_tier_hits) / lookups if lookups else 0.0,
+            }
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
+    # the max number of ids to put in any one '$in' query
+    DEFINITION_CHUNK_SIZE = 500
+    # the max number of definitions to insert with any one bulk write
+    DEFINITION_INSERT_CHUNK_SIZE = 1000
+    # the codes of the errors mongo reports for inserting a duplicate key
+    DUPLICATE_KEY_ERROR_CODES = (11000, 11001)
+
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        :param structure_cache: a :class:`StructureCache` to consult before fetching structures
         """
+        self.structure_cache = structure_cache
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -121,7 +293,15 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            structure = self.structure_cache.get(key)
+            if structure is not None:
+                return structure
+
+        structure = structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -131,7 +311,24 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        if self.structure_cache is None:
+            return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+
+        structures = []
+        missing_ids = []
+        for structure_id in ids:
+            structure = self.structure_cache.get(structure_id)
+            if structure is None:
+                missing_ids.append(structure_id)
+            else:
+                structures.append(structure)
+
+        if missing_ids:
+            for structure in self.structures.find({'_id': {'$in': missing_ids}}):
+                structure = structure_from_mongo(structure)
+                self.structure_cache.set(structure['_id'], structure)
+                structures.append(structure)
+        return structures
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
@@ -173,6 +370,9 @@ class MongoConnection(object):
         Insert a new structure into the database.
         """
         self.structures.insert(structure_to_mongo(structure))
+        if self.structure_cache is not None:
+            # only a structure which was edited in place could be cached under this id
+            self.structure_cache.discard(structure['_id'])
 
     def get_course_index(self, key, ignore_case=False):
         """
@@ -254,11 +454,17 @@ class MongoConnection(object):
         """
         return self.definitions.find_one({'_id': key})
 
+    @autoretry_read()
     def get_definitions(self, definitions):
         """
-        Retrieve all definitions listed in `definitions`.
+        Retrieve all definitions listed in `definitions` using one query per DEFINITION_CHUNK_SIZE ids.
         """
-        return self.definitions.find({'$in': {'_id': definitions}})
+        results = []
+        for start in xrange(0, len(definitions), self.DEFINITION_CHUNK_SIZE):
+            results.extend(
+                self.definitions.find({'_id': {'$in': definitions[start:start + self.DEFINITION_CHUNK_SIZE]}})
+            )
+        return results
 
     def insert_definition(self, definition):
         """
@@ -266,6 +472,29 @@ class MongoConnection(object):
         """
         self.definitions.insert(definition)
 
+    def insert_definitions(self, definitions):
+        """
+        Create the definitions in the db, using one unordered bulk write per
+        DEFINITION_INSERT_CHUNK_SIZE definitions.
+
+        Definitions which are already in the db are skipped: the store is append
+        only, so they can't be any different.
+        """
+        for start in xrange(0, len(definitions), self.DEFINITION_INSERT_CHUNK_SIZE):
+            bulk = self.definitions.initialize_unordered_bulk_op()
+            for definition in definitions[start:start + self.DEFINITION_INSERT_CHUNK_SIZE]:
+                bulk.insert(definition)
+            try:
+                bulk.execute()
+            except BulkWriteError as exc:
+                errors = [
+                    error for error in exc.details.get('writeErrors', [])
+                    if error['code'] not in self.DUPLICATE_KEY_ERROR_CODES
+                ]
+                if errors or exc.details.get('writeConcernErrors'):
+                    raise
+                log.debug("Attempted to insert %d duplicate definitions", len(exc.details['writeErrors']))
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -75,10 +75,10 @@ from xmodule.modulestore import (
 
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError, StructureCache
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
@@ -238,14 +238,16 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                 # append only, so if it's already been written, we can just keep going.
                 log.debug("Attempted to insert duplicate structure %s", _id)
 
-        for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db:
-            try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id])
-            except DuplicateKeyError:
-                # We may not have looked up this definition inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate definition %s", _id)
+        # Write the new definitions together, as importing a course makes one per block.
+        # We may not have looked up some of them inside this bulk operation, and thus
+        # didn't realize that they were already in the database, which insert_definitions allows.
+        new_definitions = [
+            bulk_write_record.definitions[_id]
+            for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db
+            if bulk_write_record.definitions[_id] is not None
+        ]
+        if new_definitions:
+            self.db_connection.insert_definitions(new_definitions)
 
         if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
             if bulk_write_record.initial_index is None:
@@ -376,7 +378,8 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         Return all definitions that specified in ``ids``.
 
         If a definition with the same id is in both the cache and the database,
-        the cached version will be preferred.
+        the cached version will be preferred. Definitions fetched from the database are
+        added to the cache if a bulk operation is active.
 
         Arguments:
             course_key (:class:`.CourseKey`): The course that these definitions are being loaded
@@ -388,13 +391,18 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         bulk_write_record = self._get_bulk_ops_record(course_key)
         if bulk_write_record.active:
-            for definition in bulk_write_record.definitions.values():
-                definition_id = definition.get('_id')
-                if definition_id in ids:
+            for definition_id in list(ids):
+                definition = bulk_write_record.definitions.get(definition_id)
+                if definition is not None:
                     ids.remove(definition_id)
                     definitions.append(definition)
 
-        definitions.extend(self.db_connection.get_definitions(list(ids)))
+        db_definitions = self.db_connection.get_definitions(list(ids))
+        if bulk_write_record.active:
+            for definition in db_definitions:
+                bulk_write_record.definitions[definition['_id']] = definition
+                bulk_write_record.definitions_in_db.add(definition['_id'])
+        definitions.extend(db_definitions)
         return definitions
 
     def update_definition(self, course_key, definition):
@@ -570,18 +578,36 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
     # version) but those functions will have an optional arg for setting these.
     SEARCH_TARGET_DICT = ['wiki_slug']
 
+    # the number of structures whose parent index each thread keeps (see _get_parent_index)
+    PARENT_INDEX_CACHE_SIZE = 20
+
     def __init__(self, contentstore, doc_store_config, fs_root, render_template,
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None,
-                 services=None, **kwargs):
+                 services=None,
+                 structure_cache_max_blocks=0,
+                 structure_cache_subsystem=None,
+                 **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache_max_blocks: the total number of blocks the process-wide structure cache
+            may hold (0, the default, disables the cache; see StructureCache.DEFAULT_MAX_BLOCKS)
+        :param structure_cache_subsystem: an optional shared cache (e.g., django's) for the structure cache
+            to use as a second tier
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        if structure_cache_max_blocks:
+            structure_cache = StructureCache.get_shared(
+                u'{}.{}'.format(doc_store_config.get('db'), doc_store_config.get('collection')),
+                structure_cache_max_blocks,
+                structure_cache_subsystem,
+            )
+        else:
+            structure_cache = None
+        self.db_connection = MongoConnection(structure_cache=structure_cache, **doc_store_config)
         self.db = self.db_connection.database
 
         # Code review question: How should I expire entries?
@@ -624,6 +650,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # drop the assets
         super(SplitMongoModuleStore, self)._drop_database()
 
+        if self.db_connection.structure_cache is not None:
+            self.db_connection.structure_cache.clear()
+
         connection = self.db.connection
         connection.drop_database(self.db.name)
         connection.close()
@@ -663,15 +692,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 definitions = {definition['_id']: definition
                                for definition in descendent_definitions}
 
-                for block in new_module_data.itervalues():
+                for block_key, block in new_module_data.items():
                     if block['definition'] in definitions:
                         converted_fields = self.convert_references_to_keys(
                             course_key, system.load_block_type(block['block_type']),
                             definitions[block['definition']].get('fields'),
                             system.course_entry.structure['blocks'],
                         )
+                        # copy rather than update the block as the structure may be shared (see StructureCache)
+                        block = dict(block)
+                        block['fields'] = dict(block['fields'])
                         block['fields'].update(converted_fields)
                         block['definition_loaded'] = True
+                        new_module_data[block_key] = block
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -849,6 +882,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # get the blocks for each course index (s/b the root)
         return self._get_structures_for_branch_and_locator(branch, self._create_course_locator, **kwargs)
 
+    def get_course_keys(self, branch):
+        """
+        Returns the keys of the courses which have the named branch, from their course indexes alone.
+        """
+        return [
+            self._create_course_locator(course_index, None)
+            for course_index in self.find_matching_course_indexes(branch)
+        ]
+
     def get_libraries(self, branch="library", **kwargs):
         """
         Returns a list of "library" root blocks matching any given qualifiers.
@@ -982,18 +1024,33 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         def _block_matches_all(block_json):
             """
-            Check that the block matches all the criteria
+            Check that the block matches all the criteria which don't require loading any additional data
             """
-            # do the checks which don't require loading any additional data
-            if (
+            return (
                 self._block_matches(block_json, qualifiers) and
                 self._block_matches(block_json.get('fields', {}), settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_json['definition'])
-                    return self._block_matches(definition_block.get('fields', {}), content)
-                else:
-                    return True
+            )
+
+        def _filter_by_content(block_keys):
+            """
+            Return the block_keys whose definitions match content. Fetches all the candidates' definitions
+            in one batch rather than one at a time.
+            """
+            if not content:
+                return block_keys
+            blocks = course.structure['blocks']
+            definitions = {
+                definition['_id']: definition
+                for definition in self.get_definitions(
+                    course_locator, [blocks[block_key]['definition'] for block_key in block_keys]
+                )
+            }
+            return [
+                block_key for block_key in block_keys
+                if self._block_matches(
+                    definitions.get(blocks[block_key]['definition'], {}).get('fields', {}), content
+                )
+            ]
 
         if settings is None:
             settings = {}
@@ -1005,7 +1062,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 if block_name == block_id.id and _block_matches_all(block):
                     block_ids.append(block_id)
 
-            return self._load_items(course, block_ids, lazy=True, **kwargs)
+            return self._load_items(course, _filter_by_content(block_ids), lazy=True, **kwargs)
 
         if 'category' in qualifiers:
             qualifiers['block_type'] = qualifiers.pop('category')
@@ -1016,6 +1073,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         for block_id, value in course.structure['blocks'].iteritems():
             if _block_matches_all(value):
                 items.append(block_id)
+        items = _filter_by_content(items)
 
         if len(items) > 0:
             return self._load_items(course, items, 0, lazy=True, **kwargs)
@@ -1461,7 +1519,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 raise ItemNotFoundError(parent_usage_key)
 
             parent = new_structure['blocks'][block_id]
-            parent['fields'].setdefault('children', []).append(BlockKey.from_usage_key(xblock.location))
+            child_key = BlockKey.from_usage_key(xblock.location)
+            parent['fields'].setdefault('children', []).append(child_key)
+            self._reindex_children(self._cached_parent_index(new_structure), block_id, [], [child_key])
             if parent['edit_info']['update_version'] != new_structure['_id']:
                 # if the parent hadn't been previously changed in this bulk transaction, indicate that it's
                 # part of the bulk transaction
@@ -1604,6 +1664,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             root_block = draft_structure['blocks'][draft_structure['root']]
             if block_fields is not None:
                 root_block['fields'].update(self._serialize_fields(root_category, block_fields))
+                self._drop_parent_index(draft_structure)
             if definition_fields is not None:
                 old_def = self.get_definition(locator, root_block['definition'])
                 new_fields = old_def['fields']
@@ -1737,6 +1798,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             if is_updated:
                 new_structure = self.version_structure(course_key, original_structure, user_id)
                 block_data = self._get_block_from_structure(new_structure, block_key)
+                self._reindex_children(
+                    self._cached_parent_index(new_structure), block_key,
+                    block_data['fields'].get('children', []), settings.get('children', [])
+                )
 
                 block_data["definition"] = definition_locator.definition_id
                 block_data["fields"] = settings
@@ -1854,6 +1919,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             is_updated = self._persist_subdag(course_key, xblock, user_id, new_structure['blocks'], new_id)
 
             if is_updated:
+                # _persist_subdag works directly on the blocks; so, recompute the parent index on demand
+                self._drop_parent_index(new_structure)
                 self.update_structure(course_key, new_structure)
 
                 # update the index entry if appropriate
@@ -2012,6 +2079,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             # iterate over subtree list filtering out blacklist.
             orphans = set()
             destination_blocks = destination_structure['blocks']
+            # build it now so that orphan detection below doesn't rescan the destination per orphan
+            destination_parent_index = self._get_parent_index(destination_structure)
             for subtree_root in subtree_list:
                 if BlockKey.from_usage_key(subtree_root) != source_structure['root']:
                     # find the parents and put root in the right sequence
@@ -2019,6 +2088,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     if parent is not None:  # may be a detached category xblock
                         if parent not in destination_blocks:
                             raise ItemNotFoundError(parent)
+                        old_children = destination_blocks[parent]['fields']['children']
                         orphans.update(
                             self._sync_children(
                                 source_structure['blocks'][parent],
@@ -2026,6 +2096,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                                 BlockKey.from_usage_key(subtree_root)
                             )
                         )
+                        self._reindex_children(
+                            destination_parent_index, parent,
+                            old_children, destination_blocks[parent]['fields']['children']
+                        )
                 # update/create the subtree and its children in destination (skipping blacklist)
                 orphans.update(
                     self._copy_subdag(
@@ -2033,7 +2107,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                         BlockKey.from_usage_key(subtree_root),
                         source_structure['blocks'],
                         destination_blocks,
-                        blacklist
+                        blacklist,
+                        destination_parent_index,
                     )
                 )
             # remove any remaining orphans
@@ -2079,13 +2154,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             if parent_block_key:
                 parent_block = new_blocks[parent_block_key]
                 parent_block['fields']['children'].remove(block_key)
+                self._reindex_children(self._cached_parent_index(new_structure), parent_block_key, [block_key], [])
                 parent_block['edit_info']['edited_on'] = datetime.datetime.now(UTC)
                 parent_block['edit_info']['edited_by'] = user_id
                 parent_block['edit_info']['previous_version'] = parent_block['edit_info']['update_version']
                 parent_block['edit_info']['update_version'] = new_id
                 self.decache_block(usage_locator.course_key, new_id, parent_block_key)
 
-            self._remove_subtree(BlockKey.from_usage_key(usage_locator), new_blocks)
+            self._remove_subtree(
+                BlockKey.from_usage_key(usage_locator), new_blocks, self._cached_parent_index(new_structure)
+            )
 
             # update index if appropriate and structures
             self.update_structure(usage_locator.course_key, new_structure)
@@ -2100,12 +2178,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return result
 
     @contract(block_key=BlockKey, blocks='dict(BlockKey: dict)')
-    def _remove_subtree(self, block_key, blocks):
+    def _remove_subtree(self, block_key, blocks, parent_index=None):
         """
         Remove the subtree rooted at block_key
+
+        :param parent_index: the structure's parent index if it has one. The descendants' entries get
+        removed from it; the caller is responsible for block_key's own entry.
         """
-        for child in blocks[block_key]['fields'].get('children', []):
-            self._remove_subtree(BlockKey(*child), blocks)
+        children = blocks[block_key]['fields'].get('children', [])
+        for child in children:
+            self._remove_subtree(BlockKey(*child), blocks, parent_index)
+        self._reindex_children(parent_index, block_key, children, [])
         del blocks[block_key]
 
     def delete_course(self, course_key, user_id):
@@ -2365,13 +2448,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         :param course_locator: the course to clean
         """
-        original_structure = self._lookup_course(course_locator).structure
+        # copy the structure as it may be shared (see StructureCache)
+        original_structure = copy.deepcopy(self._lookup_course(course_locator).structure)
         for block in original_structure['blocks'].itervalues():
             if 'fields' in block and 'children' in block['fields']:
                 block['fields']["children"] = [
                     block_id for block_id in block['fields']["children"]
                     if block_id in original_structure['blocks']
                 ]
+        self._drop_parent_index(original_structure)
         self.update_structure(course_locator, original_structure)
 
     def convert_references_to_keys(self, course_key, xblock_class, jsonfields, blocks):
@@ -2566,10 +2651,88 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         Given a structure, find block_key's parent in that structure. Note returns
         the encoded format for parent
         """
-        for parent_block_key, value in structure['blocks'].iteritems():
-            if block_key in value['fields'].get('children', []):
+        parent_index = self._cached_parent_index(structure)
+        if parent_index is not None:
+            parent_block_key = parent_index.get(block_key)
+            if parent_block_key is None:
+                # only the root has no parent unless the block is an orphan
+                is_current = block_key == structure.get('root')
+            else:
+                parent_block = structure['blocks'].get(parent_block_key)
+                is_current = parent_block is not None and block_key in parent_block['fields'].get('children', [])
+            if is_current:
                 return parent_block_key
-        return None
+        # either there's no index yet or someone changed the children w/o maintaining it. (Re)compute it.
+        return self._build_parent_index(structure).get(block_key)
+
+    def _parent_indexes(self):
+        """
+        Return this thread's LRU map of structure '_id' to the structure's parent index. The indexes are
+        kept here rather than in the structures as structures may be shared by threads (see StructureCache).
+        """
+        parent_indexes = getattr(self.thread_cache, 'parent_indexes', None)
+        if parent_indexes is None:
+            parent_indexes = self.thread_cache.parent_indexes = OrderedDict()
+        return parent_indexes
+
+    def _cached_parent_index(self, structure):
+        """
+        Return the structure's parent index if this thread has computed it; otherwise, None.
+        """
+        parent_indexes = self._parent_indexes()
+        parent_index = parent_indexes.pop(structure['_id'], None)
+        if parent_index is not None:
+            # move to the most recently used end
+            parent_indexes[structure['_id']] = parent_index
+        return parent_index
+
+    def _build_parent_index(self, structure):
+        """
+        Compute and cache the map of child BlockKey to parent BlockKey for the structure.
+        """
+        parent_index = {}
+        for parent_block_key, value in structure['blocks'].iteritems():
+            for child in value['fields'].get('children', []):
+                parent_index[BlockKey(*child)] = parent_block_key
+        parent_indexes = self._parent_indexes()
+        parent_indexes.pop(structure['_id'], None)
+        while len(parent_indexes) >= self.PARENT_INDEX_CACHE_SIZE:
+            parent_indexes.popitem(last=False)
+        parent_indexes[structure['_id']] = parent_index
+        return parent_index
+
+    def _get_parent_index(self, structure):
+        """
+        Return the map of child BlockKey to parent BlockKey for the structure, computing it
+        the first time it's needed. The map is never persisted. Methods which change
+        children must keep it up to date (see :meth:`_reindex_children`) or drop it
+        (see :meth:`_drop_parent_index`).
+        """
+        parent_index = self._cached_parent_index(structure)
+        if parent_index is None:
+            parent_index = self._build_parent_index(structure)
+        return parent_index
+
+    def _drop_parent_index(self, structure):
+        """
+        Forget the structure's parent index so that it's recomputed when next needed.
+        """
+        self._parent_indexes().pop(structure['_id'], None)
+
+    @staticmethod
+    def _reindex_children(parent_index, parent_block_key, old_children, new_children):
+        """
+        Update parent_index to reflect parent_block_key's children changing from old_children to
+        new_children. Does nothing if parent_index is None (the index hasn't been computed).
+        """
+        if parent_index is None:
+            return
+        for child in old_children:
+            child = BlockKey(*child)
+            if parent_index.get(child) == parent_block_key:
+                del parent_index[child]
+        for child in new_children:
+            parent_index[BlockKey(*child)] = parent_block_key
 
     def _sync_children(self, source_parent, destination_parent, new_child):
         """
@@ -2592,16 +2755,21 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         destination_blocks="dict(BlockKey: *)",
         blacklist="list(BlockKey) | str",
     )
-    def _copy_subdag(self, user_id, destination_version, block_key, source_blocks, destination_blocks, blacklist):
+    def _copy_subdag(
+        self, user_id, destination_version, block_key, source_blocks, destination_blocks, blacklist, parent_index=None
+    ):
         """
         Update destination_blocks for the sub-dag rooted at block_key to be like the one in
         source_blocks excluding blacklist.
 
+        :param parent_index: the destination structure's parent index, if any, which will be kept in sync
+
         Return any newly discovered orphans (as a set)
         """
         orphans = set()
         destination_block = destination_blocks.get(block_key)
         new_block = source_blocks[block_key]
+        existing_children = []
         if destination_block:
             # reorder children to correspond to whatever order holds for source.
             # remove any which source no longer claims (put into orphans)
@@ -2639,13 +2807,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         # introduce new edit info field for tracing where copied/published blocks came
         destination_block['edit_info']['source_version'] = new_block['edit_info']['update_version']
+        self._reindex_children(
+            parent_index, block_key, existing_children, destination_block['fields'].get('children', [])
+        )
 
         if blacklist != EXCLUDE_ALL:
             for child in destination_block['fields'].get('children', []):
                 if child not in blacklist:
                     orphans.update(
                         self._copy_subdag(
-                            user_id, destination_version, BlockKey(*child), source_blocks, destination_blocks, blacklist
+                            user_id, destination_version, BlockKey(*child), source_blocks, destination_blocks,
+                            blacklist, parent_index
                         )
                     )
         destination_blocks[block_key] = destination_block
@@ -2669,8 +2841,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         Delete the orphan and any of its descendants which no longer have parents.
         """
         if self._get_parent_from_structure(orphan, structure) is None:
-            for child in structure['blocks'][orphan]['fields'].get('children', []):
+            children = structure['blocks'][orphan]['fields'].get('children', [])
+            for child in children:
                 self._delete_if_true_orphan(BlockKey(*child), structure)
+            self._reindex_children(self._cached_parent_index(structure), orphan, children, [])
             del structure['blocks'][orphan]
 
     def _new_block(self, user_id, category, block_fields, definition_id, new_id, raw=False):
@@ -2710,6 +2884,14 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         Encodes the block id before accessing it in the structure to ensure it can
         be a json dict key.
         """
+        parent_index = self._cached_parent_index(structure)
+        if parent_index is not None:
+            old_content = structure['blocks'].get(block_key)
+            self._reindex_children(
+                parent_index, block_key,
+                old_content['fields'].get('children', []) if old_content is not None else [],
+                content['fields'].get('children', [])
+            )
         structure['blocks'][block_key] = content
 
     @autoretry_read()
@@ -82,6 +82,18 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         else:
             raise InsufficientSpecificationError()
 
+    def get_course_keys(self):
+        """
+        Returns the keys of all the courses on the Draft or Published branch depending on the branch setting.
+        """
+        branch_setting = self.get_branch_setting()
+        if branch_setting == ModuleStoreEnum.Branch.draft_preferred:
+            return super(DraftVersioningModuleStore, self).get_course_keys(ModuleStoreEnum.BranchName.draft)
+        elif branch_setting == ModuleStoreEnum.Branch.published_only:
+            return super(DraftVersioningModuleStore, self).get_course_keys(ModuleStoreEnum.BranchName.published)
+        else:
+            raise InsufficientSpecificationError()
+
     def _auto_publish_no_children(self, location, category, user_id, **kwargs):
         """
         Publishes item if the category is DIRECT_ONLY. This assumes another method has checked that
@@ -346,7 +358,9 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
             new_structure = self.version_structure(draft_course_key, draft_course_structure, user_id)
 
             # remove the block and its descendants from the new structure
-            self._remove_subtree(BlockKey.from_usage_key(location), new_structure['blocks'])
+            self._remove_subtree(
+                BlockKey.from_usage_key(location), new_structure['blocks'], self._cached_parent_index(new_structure)
+            )
 
             # copy over the block and its descendants from the published branch
             def copy_from_published(root_block_id):
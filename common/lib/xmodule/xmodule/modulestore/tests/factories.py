@@ -320,6 +320,11 @@ def mongo_uses_error_check(store):
     return False
 
 
+# The pymongo.message functions which write. mongo < 2.6 uses insert, update, delete and
+# _do_batched_insert. >= 2.6 _do_batched_write
+MONGO_SEND_METHODS = ['insert', 'update', 'delete', '_do_batched_write_command', '_do_batched_insert', ]
+
+
 @contextmanager
 def check_mongo_calls(num_finds=0, num_sends=None):
     """
@@ -340,8 +345,7 @@ def check_mongo_calls(num_finds=0, num_sends=None):
         if num_sends is not None:
             with check_sum_of_calls(
                 pymongo.message,
-                # mongo < 2.6 uses insert, update, delete and _do_batched_insert. >= 2.6 _do_batched_write
-                ['insert', 'update', 'delete', '_do_batched_write_command', '_do_batched_insert', ],
+                MONGO_SEND_METHODS,
                 num_sends,
                 num_sends
             ):
@@ -65,16 +65,40 @@ class MemoryCache(object):
         """
         return self._data.get(key, default)
 
-    def set(self, key, value):
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
         """
         Set a key in the cache.
 
         Args:
             key: The key to update.
             value: The value change the key to.
+            timeout: Ignored.
         """
         self._data[key] = value
 
+    def add(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        """
+        Set a key in the cache if it isn't set already, and return whether it was set.
+
+        Args:
+            key: The key to add.
+            value: The value to give the key.
+            timeout: Ignored.
+        """
+        if key in self._data:
+            return False
+        self._data[key] = value
+        return True
+
+    def delete(self, key):
+        """
+        Remove a key from the cache, if it's there.
+
+        Args:
+            key: The key to remove.
+        """
+        self._data.pop(key, None)
+
 
 class MongoModulestoreBuilder(object):
     """
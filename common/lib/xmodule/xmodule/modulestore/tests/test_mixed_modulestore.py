@@ -8,6 +8,7 @@ import ddt
 from importlib import import_module
 import itertools
 import mimetypes
+from mock import patch
 from uuid import uuid4
 
 # Mixed modulestore depends on django, so we'll manually configure some django settings
@@ -36,6 +37,7 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.draft_and_published import UnsupportedRevisionError, ModuleStoreDraftAndPublished
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateCourseError, ReferentialIntegrityError, NoPathToItem
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore import search
 from xmodule.modulestore.search import path_to_location
 from xmodule.modulestore.tests.factories import check_mongo_calls, check_exact_number_of_calls, \
     mongo_uses_error_check
@@ -838,6 +840,16 @@ class TestMixedModuleStore(CourseComparisonTest):
             published_courses = self.store.get_courses(remove_branch=True)
         self.assertEquals([c.id for c in draft_courses], [c.id for c in published_courses])
 
+    @ddt.data('draft', 'split')
+    def test_get_course_keys(self, default_ms):
+        self.initdb(default_ms)
+        course_keys = self.store.get_course_keys()
+        self.assertItemsEqual(
+            course_keys,
+            [self.store._clean_course_id_for_mapping(course.id) for course in self.store.get_courses()]  # pylint: disable=protected-access
+        )
+        self.assertEqual(len(course_keys), 3)
+
     def test_xml_get_courses(self):
         """
         Test that the xml modulestore only loaded the courses from the maps.
@@ -979,25 +991,18 @@ class TestMixedModuleStore(CourseComparisonTest):
             (child_to_delete_location, None, ModuleStoreEnum.RevisionOption.published_only),
         ])
 
-    # Draft:
-    #   Problem path:
-    #    1. Get problem
-    #    2-3. count matches definition.children called 2x?
-    #    4. get parent via definition.children query
-    #    5-7. 2 counts and 1 get grandparent via definition.children
-    #    8-10. ditto for great-grandparent
-    #    11-13. ditto for next ancestor
-    #    14. fail count query looking for parent of course (unnecessary)
-    #    15. get course record direct query (not via definition.children) (already fetched in 13)
-    #    16. get items for inheritance computation
-    #    17. get vertical (parent of problem)
-    #    18. get items for inheritance computation (why? caching should handle)
-    #    19-20. get vertical_x1b (? why? this is the only ref in trace) & items for inheritance computation
-    #   Chapter path: get chapter, count parents 2x, get parents, count non-existent grandparents
-    # Split: active_versions & structure
-    @ddt.data(('draft', [20, 5], 0), ('split', [2, 2], 0))
+    # The first lookup walks the whole course, with no inheritance tree, course runtime or
+    # course paths cached yet:
+    #   Draft: 1. get problem (has_item) 2. get course (to find its version)
+    #      3. get course for the walk 4-7. get each level of the course's descendants
+    #      8. get items for inheritance computation
+    #   Split: active_versions, structure, course definition (to load course wiki string)
+    # Later lookups in the same version of the course use the cached paths:
+    #   Draft: get chapter (has_item), get course (to find its version)
+    #   Split: active_versions & structure
+    @ddt.data(('draft', 8, 2), ('split', 3, 2))
     @ddt.unpack
-    def test_path_to_location(self, default_ms, num_finds, num_sends):
+    def test_path_to_location(self, default_ms, walk_finds, num_finds):
         """
         Make sure that path_to_location works
         """
@@ -1007,17 +1012,24 @@ class TestMixedModuleStore(CourseComparisonTest):
         with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
             self._create_block_hierarchy()
 
-            should_work = (
-                (self.problem_x1a_2,
-                 (course_key, u"Chapter_x", u"Sequential_x1", '1')),
-                (self.chapter_x,
-                 (course_key, "Chapter_x", None, None)),
-            )
-
-            for location, expected in should_work:
-                # each iteration has different find count, pop this iter's find count
-                with check_mongo_calls(num_finds.pop(0), num_sends):
-                    self.assertEqual(path_to_location(self.store, location), expected)
+            store = self.store._get_modulestore_for_courseid(course_key)  # pylint: disable=protected-access
+            if hasattr(store, '_clear_cache'):
+                # drop the course runtimes (and the definitions they fetched) made while creating the blocks
+                store._clear_cache()  # pylint: disable=protected-access
+            with patch.object(store, 'metadata_inheritance_cache_subsystem', None), \
+                    patch.object(store, 'request_cache', None), \
+                    patch.dict(search._course_paths, clear=True):  # pylint: disable=protected-access
+                # finds the paths of the whole course
+                with check_mongo_calls(walk_finds, 0):
+                    self.assertEqual(
+                        path_to_location(self.store, self.problem_x1a_2),
+                        (course_key, u"Chapter_x", u"Sequential_x1", '1')
+                    )
+                # uses the paths found above
+                with check_mongo_calls(num_finds, 0):
+                    self.assertEqual(
+                        path_to_location(self.store, self.chapter_x), (course_key, "Chapter_x", None, None)
+                    )
 
         not_found = (
             course_key.make_usage_key('video', 'WelcomeX'),
@@ -1039,6 +1051,13 @@ class TestMixedModuleStore(CourseComparisonTest):
         with self.assertRaises(NoPathToItem):
             path_to_location(self.store, orphan)
 
+        # Changing the course changes its version, so new blocks are found
+        chapter = self.store.create_child(self.user_id, self.course.location, 'chapter', block_id='NewChapter')
+        self.assertEqual(
+            path_to_location(self.store, chapter.location),
+            (course_key, 'NewChapter', None, None)
+        )
+
     def test_xml_path_to_location(self):
         """
         Make sure that path_to_location works: should be passed a modulestore
@@ -1490,6 +1509,32 @@ class TestMixedModuleStore(CourseComparisonTest):
         # Verify that others have unchanged edit info
         check_node(sibling.location, None, after_create, self.user_id, None, after_create, self.user_id)
 
+    def test_subtree_edit_info_structure_cache(self):
+        """
+        Tests that split's subtree edit info is computed afresh for each version of a course when
+        the versions' structures come from the process-wide structure cache
+        """
+        self.options = dict(self.options, stores=[
+            dict(store, OPTIONS=dict(store['OPTIONS'], structure_cache_max_blocks=1000))
+            if store['NAME'] == 'split' else store
+            for store in self.options['stores']
+        ])
+        self.initdb('split')
+
+        test_course = self.store.create_course('testx', 'GreekHero', 'test_run', self.user_id)
+        component = self.store.create_child(self.user_id, test_course.location, 'vertical')
+        course_edited_on = self.store.get_course(test_course.id).subtree_edited_on
+        self.assertEqual(self.user_id, self.store.get_course(test_course.id).subtree_edited_by)
+
+        editing_user = self.user_id - 2
+        component = self.store.get_item(component.location)
+        component.display_name = 'Changed Display Name'
+        self.store.update_item(component, editing_user)
+
+        course = self.store.get_course(test_course.id)
+        self.assertLess(course_edited_on, course.subtree_edited_on)
+        self.assertEqual(editing_user, course.subtree_edited_by)
+
     @ddt.data('draft', 'split')
     def test_update_edit_info(self, default_ms):
         """
@@ -41,6 +41,7 @@ from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
 from xmodule.modulestore.mongo.base import as_draft
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 from xmodule.modulestore.edit_info import EditInfoMixin
 
 log = logging.getLogger(__name__)
@@ -597,6 +598,79 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
 
         return locations
 
+    def test_update_metadata_inheritance_tree(self):
+        """
+        Tests that updating a block recomputes the inheritance of its subtree, and
+        gives the same tree as recomputing it all.
+        """
+        locations = self._create_test_tree('update_inheritance')
+        course_key = locations['grandparent'].course_key
+        course = self.draft_store.get_course(course_key)
+        course.children.append(locations['grandparent'])
+        self.draft_store.update_item(course, self.dummy_user)
+
+        grandparent = self.draft_store.get_item(locations['grandparent'])
+        grandparent.due = datetime(2030, 1, 1, tzinfo=UTC)
+        self.draft_store.update_item(grandparent, self.dummy_user)
+
+        tree = self.draft_store._get_cached_metadata_inheritance_tree(course_key)
+        self.assertEqual(tree, self.draft_store._compute_metadata_inheritance_tree(course_key))
+        self.assertEqual(tree[unicode(locations['child'])]['due'], '2030-01-01T00:00:00Z')
+        # the blocks which don't set anything share their parent's metadata
+        self.assertIs(tree[unicode(locations['child'])], tree[unicode(locations['parent'])])
+
+    def test_update_metadata_inheritance_tree_cached(self):
+        """
+        Tests that updating a block patches the tree in the caching subsystem, and releases the lock.
+        """
+        locations = self._create_test_tree('update_inheritance_cached')
+        course_key = locations['grandparent'].course_key
+        course = self.draft_store.get_course(course_key)
+        course.children.append(locations['grandparent'])
+        self.draft_store.update_item(course, self.dummy_user)
+
+        cache = MemoryCache()
+        self.draft_store.metadata_inheritance_cache_subsystem = cache
+        try:
+            self.draft_store._get_cached_metadata_inheritance_tree(course_key, force_refresh=True)
+            grandparent = self.draft_store.get_item(locations['grandparent'])
+            grandparent.due = datetime(2030, 1, 1, tzinfo=UTC)
+            self.draft_store.update_item(grandparent, self.dummy_user)
+        finally:
+            self.draft_store.metadata_inheritance_cache_subsystem = None
+
+        tree = cache.get(unicode(course_key))
+        self.assertEqual(tree, self.draft_store._compute_metadata_inheritance_tree(course_key))
+        self.assertEqual(tree[unicode(locations['child'])]['due'], '2030-01-01T00:00:00Z')
+        self.assertIsNone(cache.get(u'{}.update_lock'.format(course_key)))
+
+    def test_update_metadata_inheritance_tree_locked(self):
+        """
+        Tests that an update which finds another one in progress recomputes the whole tree, and marks
+        the tree stale so that the other update's tree gets dropped.
+        """
+        locations = self._create_test_tree('update_inheritance_locked')
+        course_key = locations['grandparent'].course_key
+        course = self.draft_store.get_course(course_key)
+        course.children.append(locations['grandparent'])
+        self.draft_store.update_item(course, self.dummy_user)
+
+        cache = MemoryCache()
+        cache.set(unicode(course_key), {'stale': 'tree'})
+        cache.add(u'{}.update_lock'.format(course_key), True)
+        self.draft_store.metadata_inheritance_cache_subsystem = cache
+        try:
+            grandparent = self.draft_store.get_item(locations['grandparent'])
+            grandparent.due = datetime(2030, 1, 1, tzinfo=UTC)
+            self.draft_store.update_item(grandparent, self.dummy_user)
+        finally:
+            self.draft_store.metadata_inheritance_cache_subsystem = None
+
+        self.assertEqual(
+            cache.get(unicode(course_key)), self.draft_store._compute_metadata_inheritance_tree(course_key)
+        )
+        self.assertTrue(cache.get(u'{}.stale'.format(course_key)))
+
     def test_migrate_published_info(self):
         """
         Tests that blocks that were storing published_date and published_by through CMSBlockMixin are loaded correctly
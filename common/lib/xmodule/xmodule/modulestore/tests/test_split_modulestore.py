@@ -1,6 +1,7 @@
 """
     Test split modulestore w/o using any django stuff.
 """
+import copy
 import datetime
 from importlib import import_module
 from path import path
@@ -1373,6 +1374,48 @@ class TestItemCrud(SplitModuleTest):
                         check_subtree(sub)
         check_subtree(nodes[0])
 
+    def test_parent_index_in_bulk_operation(self):
+        """
+        Test that the cached parent index stays in sync w/ edits made w/in one bulk operation
+        """
+        course = modulestore().create_course('testx', 'parent_index', 'run', self.user_id, BRANCH_NAME_DRAFT)
+        course_key = course.id.version_agnostic().for_branch(BRANCH_NAME_DRAFT)
+        root = course.location.version_agnostic().for_branch(BRANCH_NAME_DRAFT)
+        with modulestore().bulk_operations(course_key):
+            chapter = modulestore().create_child(self.user_id, root, 'chapter', block_id='chapter1')
+            # compute the index before adding more children
+            self.assertEqual(modulestore().get_parent_location(chapter.location).block_id, root.block_id)
+            vertical = modulestore().create_child(self.user_id, chapter.location, 'vertical', block_id='vert1')
+            problem = modulestore().create_child(self.user_id, vertical.location, 'problem', block_id='problem1')
+            self.assertEqual(modulestore().get_parent_location(vertical.location).block_id, 'chapter1')
+            self.assertEqual(modulestore().get_parent_location(problem.location).block_id, 'vert1')
+
+            modulestore().delete_item(vertical.location.version_agnostic(), self.user_id)
+            self.assertIsNone(modulestore().get_parent_location(vertical.location.version_agnostic()))
+            self.assertIsNone(modulestore().get_parent_location(problem.location.version_agnostic()))
+            self.assertEqual(
+                modulestore().get_parent_location(chapter.location.version_agnostic()).block_id, root.block_id
+            )
+
+    def test_parent_index_not_in_structure(self):
+        """
+        Test that the parent index isn't stored in the (possibly shared) structure and is rebuilt
+        when a child was added w/o maintaining it
+        """
+        course = modulestore().create_course('testx', 'parent_miss', 'run', self.user_id, BRANCH_NAME_DRAFT)
+        root = course.location.version_agnostic().for_branch(BRANCH_NAME_DRAFT)
+        chapter = modulestore().create_child(self.user_id, root, 'chapter', block_id='chapter1')
+        structure = modulestore()._lookup_course(chapter.location.course_key).structure  # pylint: disable=protected-access
+        self.assertIsNone(modulestore().get_parent_location(root))
+        self.assertNotIn('parent_index', structure)
+
+        # add a child behind the index's back (to a copy as the structure may be cached)
+        structure = copy.deepcopy(structure)
+        new_child = BlockKey('chapter', 'chapter2')
+        structure['blocks'][BlockKey.from_usage_key(root)]['fields']['children'].append(new_child)
+        parent = modulestore()._get_parent_from_structure(new_child, structure)  # pylint: disable=protected-access
+        self.assertEqual(parent, BlockKey.from_usage_key(root))
+
     def create_course_for_deletion(self):
         """
         Create a course we can delete
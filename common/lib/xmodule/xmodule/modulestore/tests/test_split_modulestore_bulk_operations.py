@@ -2,7 +2,8 @@ import copy
 import ddt
 import unittest
 from bson.objectid import ObjectId
-from mock import MagicMock, Mock, call
+from mock import MagicMock, Mock, call, patch
+from pymongo.errors import BulkWriteError
 from xmodule.modulestore.split_mongo.split import SplitBulkWriteMixin
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
 
@@ -154,7 +155,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_definition(self.definition),
+            call.insert_definitions([self.definition]),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.definition['_id']}},
                 from_index=original_index
@@ -171,16 +172,10 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [
-                call.insert_definition(self.definition),
-                call.insert_definition(other_definition),
-                call.update_course_index(
-                    {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
-                    from_index=original_index
-                )
-            ],
-            self.conn.mock_calls
+        self.assertItemsEqual([self.definition, other_definition], self.conn.insert_definitions.call_args[0][0])
+        self.conn.update_course_index.assert_called_once_with(
+            {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
+            from_index=original_index
         )
 
     def test_write_definition_on_close(self):
@@ -190,7 +185,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key, self.definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_definition(self.definition))
+        self.assertConnCalls(call.insert_definitions([self.definition]))
 
     def test_write_multiple_definitions_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -201,10 +196,10 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [call.insert_definition(self.definition), call.insert_definition(other_definition)],
-            self.conn.mock_calls
-        )
+        # the definitions are written together
+        self.assertEqual(self.conn.insert_definitions.call_count, 1)
+        self.assertItemsEqual([self.definition, other_definition], self.conn.insert_definitions.call_args[0][0])
+        self.assertFalse(self.conn.insert_definition.called)
 
     def test_write_index_and_structure_on_close(self):
         original_index = {'versions': {}}
@@ -415,6 +410,18 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
             else:
                 self.assertNotIn(db_definition(_id), results)
 
+    def test_get_definitions_caches_db_definitions(self):
+        # Definitions fetched in a batch during a bulk operation shouldn't be refetched one at a time
+        db_definitions = [{'db': 'definition', '_id': _id} for _id in (1, 2)]
+        self.bulk._begin_bulk_operation(self.course_key)
+        self.conn.get_definitions.return_value = db_definitions
+        self.bulk.get_definitions(self.course_key, [1, 2])
+        self.assertEqual(self.bulk.get_definition(self.course_key, 2), db_definitions[1])
+        self.assertFalse(self.conn.get_definition.called)
+        # and aren't written back at the end of the bulk operation
+        self.bulk._end_bulk_operation(self.course_key)
+        self.assertFalse(self.conn.insert_definitions.called)
+
     def test_no_bulk_find_structures_derived_from(self):
         ids = [Mock(name='id')]
         self.conn.find_structures_derived_from.return_value = [MagicMock(name='result')]
@@ -679,3 +686,31 @@ class TestBulkWriteMixinOpenAfterPrevTransaction(TestBulkWriteMixinOpen, TestBul
     Test that operations on with an open transaction aren't affected by a previously executed transaction
     """
     pass
+
+
+class TestInsertDefinitions(unittest.TestCase):
+    """
+    Tests of writing many definitions at once with MongoConnection.insert_definitions
+    """
+    def setUp(self):
+        super(TestInsertDefinitions, self).setUp()
+        self.conn = MongoConnection.__new__(MongoConnection)
+        self.conn.definitions = MagicMock(name='definitions')
+        self.bulk_op = self.conn.definitions.initialize_unordered_bulk_op.return_value
+        self.definitions = [{'a': 'definition', '_id': ObjectId()} for _ in range(5)]
+
+    def test_insert_in_chunks(self):
+        with patch.object(MongoConnection, 'DEFINITION_INSERT_CHUNK_SIZE', 2):
+            self.conn.insert_definitions(self.definitions)
+        self.assertEqual(self.bulk_op.execute.call_count, 3)
+        self.assertEqual([args[0] for args, _ in self.bulk_op.insert.call_args_list], self.definitions)
+        self.assertFalse(self.conn.definitions.insert.called)
+
+    def test_duplicates_skipped(self):
+        self.bulk_op.execute.side_effect = BulkWriteError({'writeErrors': [{'code': 11000}], 'writeConcernErrors': []})
+        self.conn.insert_definitions(self.definitions)
+
+    def test_other_errors_raised(self):
+        self.bulk_op.execute.side_effect = BulkWriteError({'writeErrors': [{'code': 2}], 'writeConcernErrors': []})
+        with self.assertRaises(BulkWriteError):
+            self.conn.insert_definitions(self.definitions)
@@ -0,0 +1,124 @@
+"""
+Tests for the split modulestore's process-wide structure cache
+"""
+import unittest
+from bson.objectid import ObjectId
+from mock import MagicMock
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache, MongoConnection
+
+
+def make_structure(num_blocks):
+    """
+    Make a decoded structure w/ the given number of blocks
+    """
+    blocks = {
+        BlockKey('html', 'html{}'.format(index)): {'block_type': 'html', 'fields': {}, 'edit_info': {}}
+        for index in range(num_blocks)
+    }
+    return {'_id': ObjectId(), 'root': BlockKey('html', 'html0'), 'blocks': blocks}
+
+
+class DictCache(dict):
+    """
+    A minimal stand in for a django cache
+    """
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument,arguments-differ
+        self[key] = value
+
+    def delete(self, key):
+        """
+        Remove the key if it's there
+        """
+        self.pop(key, None)
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Test the LRU behavior and the counters of StructureCache
+    """
+    def test_get_set(self):
+        cache = StructureCache(max_blocks=10)
+        structure = make_structure(3)
+        self.assertIsNone(cache.get(structure['_id']))
+        cache.set(structure['_id'], structure)
+        self.assertIs(cache.get(structure['_id']), structure)
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['blocks'], 3)
+
+    def test_eviction_by_blocks(self):
+        cache = StructureCache(max_blocks=10)
+        first, second, third = make_structure(4), make_structure(4), make_structure(4)
+        cache.set(first['_id'], first)
+        cache.set(second['_id'], second)
+        # touch first so that second is the least recently used
+        cache.get(first['_id'])
+        cache.set(third['_id'], third)
+        self.assertIsNone(cache.get(second['_id']))
+        self.assertIs(cache.get(first['_id']), first)
+        self.assertIs(cache.get(third['_id']), third)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.size, 8)
+
+    def test_too_big(self):
+        cache = StructureCache(max_blocks=2)
+        structure = make_structure(3)
+        cache.set(structure['_id'], structure)
+        self.assertIsNone(cache.get(structure['_id']))
+        self.assertEqual(cache.size, 0)
+
+    def test_second_tier(self):
+        second_tier = DictCache()
+        structure = make_structure(3)
+        StructureCache(max_blocks=10, second_tier=second_tier).set(structure['_id'], structure)
+
+        # a new process' cache only has the second tier to go on
+        cache = StructureCache(max_blocks=10, second_tier=second_tier)
+        cached = cache.get(structure['_id'])
+        self.assertEqual(cached, structure)
+        self.assertIsNot(cached, structure)
+        self.assertEqual(cache.second_tier_hits, 1)
+        # and now it's in the local tier
+        self.assertIs(cache.get(structure['_id']), cached)
+        self.assertEqual(cache.hits, 1)
+
+    def test_discard(self):
+        second_tier = DictCache()
+        cache = StructureCache(max_blocks=10, second_tier=second_tier)
+        structure = make_structure(3)
+        cache.set(structure['_id'], structure)
+        cache.discard(structure['_id'])
+        self.assertIsNone(cache.get(structure['_id']))
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(second_tier, {})
+
+    def test_get_shared(self):
+        cache = StructureCache.get_shared('test_db.test_collection')
+        self.assertIs(StructureCache.get_shared('test_db.test_collection'), cache)
+        self.assertIsNot(StructureCache.get_shared('test_db.other_collection'), cache)
+
+
+class TestMongoConnectionStructureCache(unittest.TestCase):
+    """
+    Test that MongoConnection consults its structure cache
+    """
+    def setUp(self):
+        super(TestMongoConnectionStructureCache, self).setUp()
+        self.connection = MongoConnection.__new__(MongoConnection)
+        self.connection.structures = MagicMock(name='structures')
+        self.connection.structure_cache = StructureCache(max_blocks=100)
+
+    def test_get_structure_once(self):
+        structure_id = ObjectId()
+        self.connection.structures.find_one.return_value = {
+            '_id': structure_id,
+            'root': ['course', 'course'],
+            'blocks': [{'block_type': 'course', 'block_id': 'course', 'fields': {}}],
+        }
+        first = self.connection.get_structure(structure_id)
+        second = self.connection.get_structure(structure_id)
+        self.assertIs(first, second)
+        self.assertEqual(self.connection.structures.find_one.call_count, 1)
@@ -5,6 +5,8 @@ to a course.
 import re
 import random
 import json
+import Queue
+import threading
 from time import sleep
 
 import dogstats_wrapper as dog_stats_api
@@ -445,25 +447,17 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    connection = None
     try:
-        connection = get_connection()
-        connection.open()
-
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
 
-        while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
-            # This is convenient for retries, which will need to send to those who haven't
-            # yet been emailed, but not send to those who have already been sent to.
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
+        def _create_email_message(recipient):
+            """Renders the email to a recipient."""
+            email_context['email'] = recipient['email']
+            email_context['name'] = recipient['profile__name']
+            email_context['user_id'] = recipient['pk']
             email_context['course_id'] = course_email.course_id
 
             # Construct message content using templates and context:
@@ -475,54 +469,56 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                 subject,
                 plaintext_msg,
                 from_addr,
-                [email],
-                connection=connection
+                [recipient['email']],
             )
             email_msg.attach_alternative(html_msg, 'text/html')
-
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
-
-            try:
-                log.debug('Email with id %s to be sent to %s', email_id, email)
-
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
+            return email_msg
+
+        # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+        # but if a task has been retried for rate-limiting reasons, then we sleep
+        # for a period of time between all emails within this task.  Choice of
+        # the value depends on the number of workers that might be sending email in
+        # parallel, and what the SES throttle rate is.
+        throttle = subtask_status.retried_nomax > 0
+
+        num_connections = min(settings.BULK_EMAIL_SEND_CONNECTIONS, len(to_list))
+        if num_connections > 1:
+            # Render all of the emails first, then send them over several connections at once.
+            email_msgs = [(index, _create_email_message(recipient)) for index, recipient in enumerate(to_list)]
+            sent, send_exception = _send_email_messages_concurrently(
+                email_msgs, num_connections, throttle, task_id, email_id, course_title
+            )
+            num_sent = len([index for index in sent if sent[index]])
+            subtask_status.increment(succeeded=num_sent, failed=len(sent) - num_sent)
+            # Keep only the recipients that weren't processed, so that a retry sends to them.
+            to_list[:] = [recipient for index, recipient in enumerate(to_list) if index not in sent]
+            if send_exception is not None:
+                raise send_exception  # pylint: disable=raising-bad-type
+
+        else:
+            connection = get_connection()
+            connection.open()
+
+            while to_list:
+                # Render the email to the user at the end of the list.
+                # At the end of processing this user, they will be popped off of the to_list.
+                # That way, the to_list will always contain the recipients remaining to be emailed.
+                # This is convenient for retries, which will need to send to those who haven't
+                # yet been emailed, but not send to those who have already been sent to.
+                email_msg = _create_email_message(to_list[-1])
+
+                if throttle:
+                    sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+
+                if _send_email_message(connection, email_msg, task_id, email_id, course_title):
+                    subtask_status.increment(succeeded=1)
                 else:
-                    # This will fall through and not retry the message.
-                    log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
-
-            else:
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
-                else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            to_list.pop()
+                # Pop the user that was emailed off the end of the list only once they have
+                # successfully been processed.  (That way, if there were a failure that
+                # needed to be retried, the user is still on the list.)
+                to_list.pop()
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -578,7 +574,103 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if connection is not None:
+            connection.close()
+
+
+def _send_email_message(connection, email_msg, task_id, email_id, course_title):
+    """
+    Sends one email over an open connection.
+
+    Returns True if the email was sent, and False if it could not be delivered to its
+    recipient, which should not be retried.  Errors that should retry or fail the
+    whole subtask are raised.
+    """
+    email = email_msg.to[0]
+    try:
+        log.debug('Email with id %s to be sent to %s', email_id, email)
+
+        with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
+            connection.send_messages([email_msg])
+
+    except SMTPDataError as exc:
+        # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
+        if exc.smtp_code >= 400 and exc.smtp_code < 500:
+            # This will cause the outer handler to catch the exception and retry the entire task.
+            raise exc
+        else:
+            # This will fall through and not retry the message.
+            log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
+            dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+            return False
+
+    except SINGLE_EMAIL_FAILURE_ERRORS as exc:
+        # This will fall through and not retry the message.
+        log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
+        dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+        return False
+
+    else:
+        dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+        if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+            log.info('Email with id %s sent to %s', email_id, email)
+        else:
+            log.debug('Email with id %s sent to %s', email_id, email)
+        return True
+
+
+def _send_email_messages_concurrently(email_msgs, num_connections, throttle, task_id, email_id, course_title):
+    """
+    Sends rendered emails over a pool of `num_connections` connections at once.
+
+    `email_msgs` is a list of (index, email) pairs, where the index identifies the
+    recipient.  Each connection is used by its own thread, which takes the next email
+    from a shared queue, so that waiting on the mail server for one email doesn't hold
+    up the others.  If `throttle` is set, each connection waits between its emails
+    so that, together, they send no faster than a single throttled connection would.
+
+    Once an email raises an error that should retry or fail the whole subtask,
+    no more emails are started.
+
+    Returns a tuple of two values:
+      * First value is a dict from the index of each email that was processed to
+        whether it was sent (True) or could not be delivered (False).
+
+      * Second value is the first error that stopped the sending, or None.
+    """
+    pending = Queue.Queue()
+    for email_msg in email_msgs:
+        pending.put(email_msg)
+    sent = {}
+    errors = []
+    stop = threading.Event()
+
+    def _send_pending():
+        """Sends emails from the queue over a new connection until it is empty, or sending stops."""
+        connection = get_connection()
+        try:
+            connection.open()
+            while not stop.is_set():
+                try:
+                    index, email_msg = pending.get_nowait()
+                except Queue.Empty:
+                    return
+                if throttle:
+                    sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS * num_connections)
+                sent[index] = _send_email_message(connection, email_msg, task_id, email_id, course_title)
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+            stop.set()
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=_send_pending) for _ in xrange(num_connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sent, errors[0] if errors else None
 
 
 def _get_current_task():
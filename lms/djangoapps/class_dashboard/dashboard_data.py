@@ -1,15 +1,20 @@
 """
 Computes the data to display on the Instructor Dashboard
 """
+from datetime import timedelta
 from util.json_request import JsonResponse
 import json
 
 from courseware import models
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Count
+from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.inheritance import own_metadata
+from xmodule.modulestore.search import course_version
 from instructor_analytics.csvs import create_csv_response
 
 from opaque_keys.edx.locations import Location
@@ -17,6 +22,160 @@ from opaque_keys.edx.locations import Location
 # Used to limit the length of list displayed to the screen.
 MAX_SCREEN_LIST_LENGTH = 250
 
+# Seconds to cache the layout of a version of a course for.
+LAYOUT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds an update of a course's rollups may take before another may start.
+ROLLUP_LOCK_TIMEOUT = 60 * 5
+
+# StudentModules modified shortly before an update of the rollups started may
+# only have been committed after it, so the next update sums them again.
+ROLLUP_MODIFIED_OVERLAP = timedelta(minutes=1)
+
+# If more modules than this have changed, all of a course's rollups are summed
+# again, by a background task.
+ROLLUP_MAX_CHANGED_MODULES = 500
+
+# The number of rollups to insert at a time.
+ROLLUPS_PER_INSERT = 100
+
+
+def _rollups_lock_key(course_id):
+    """ Get the cache key of the lock on updating the rollups of a course. """
+    return u'class_dashboard.update_rollups.{}'.format(course_id)
+
+
+def _rebuild_queued_key(course_id):
+    """ Get the cache key marking that summing all of a course's rollups has been queued. """
+    return u'class_dashboard.rebuild_rollups_queued.{}'.format(course_id)
+
+
+def update_rollups(course_id):
+    """
+    Bring the StudentModuleRollups of the course up to date with its StudentModules.
+
+    Only the modules with StudentModules that have been modified since the last
+    update, or deleted, are summed again. If the whole course has to be summed,
+    because it never has been or more than ROLLUP_MAX_CHANGED_MODULES modules
+    changed, that is left to a background task, and the rollups are used as
+    they are meanwhile.
+
+    If the course's rollups are already being updated, they are left to that update.
+    """
+    lock_key = _rollups_lock_key(course_id)
+    # cache.add fails if the key already exists
+    if not cache.add(lock_key, 'true', ROLLUP_LOCK_TIMEOUT):
+        return
+    try:
+        updated = _update_rollups(course_id)
+    finally:
+        cache.delete(lock_key)
+
+    if not updated and cache.add(_rebuild_queued_key(course_id), 'true', ROLLUP_LOCK_TIMEOUT):
+        # tasks imports this module
+        from class_dashboard.tasks import rebuild_course_rollups
+        rebuild_course_rollups.delay(unicode(course_id))
+
+
+def rebuild_rollups(course_id):
+    """
+    Sum all of the course's StudentModules into its StudentModuleRollups again.
+
+    Returns False, having done nothing, if the course's rollups are already
+    being updated.
+    """
+    lock_key = _rollups_lock_key(course_id)
+    if not cache.add(lock_key, 'true', ROLLUP_LOCK_TIMEOUT):
+        return False
+    try:
+        _update_rollups(course_id, rebuild=True)
+    finally:
+        cache.delete(lock_key)
+        cache.delete(_rebuild_queued_key(course_id))
+    return True
+
+
+@transaction.commit_on_success
+def _update_rollups(course_id, rebuild=False):
+    """
+    Sum the StudentModules of the course's changed modules into its rollups, or of
+    all its modules if `rebuild` is set.
+
+    Returns False, having done nothing, if all of the course's modules have to be
+    summed but `rebuild` isn't set.
+    """
+    started = now()
+    student_modules = models.StudentModule.objects.filter(
+        course_id=course_id,
+        module_type__in=models.StudentModuleRollup.MODULE_TYPES,
+    )
+    rollups = models.StudentModuleRollup.objects.filter(course_id=course_id)
+
+    # Only the stale markers read now are deleted, so the modules of StudentModules
+    # deleted during the update are summed again by the next one
+    stale_markers = list(rollups.filter(stale=True).values_list('id', 'module_state_key'))
+
+    try:
+        last_update = models.StudentModuleRollupUpdate.objects.get(course_id=course_id)
+    except models.StudentModuleRollupUpdate.DoesNotExist:
+        last_update = models.StudentModuleRollupUpdate(course_id=course_id)
+        changed = None
+    else:
+        changed = set(student_modules.filter(
+            modified__gte=last_update.modified,
+        ).values_list('module_state_key', flat=True).distinct())
+        changed.update(module_state_key for __, module_state_key in stale_markers)
+        if len(changed) > ROLLUP_MAX_CHANGED_MODULES:
+            changed = None
+
+    if changed is None and not rebuild:
+        return False
+
+    sums = rollups.filter(stale=False)
+    if changed is not None and not rebuild:
+        changed = [course_id.make_usage_key_from_deprecated_string(key) for key in changed]
+        student_modules = student_modules.filter(module_state_key__in=changed)
+        sums = sums.filter(module_state_key__in=changed)
+    sums.delete()
+    models.StudentModuleRollup.objects.filter(id__in=[marker_id for marker_id, __ in stale_markers]).delete()
+
+    # Aggregate queries on studentmodule table for grade data for problems,
+    # and for "opening a subsection" data
+    problem_query = student_modules.filter(
+        module_type__exact="problem",
+        grade__isnull=False,
+    ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade')).order_by()
+    sequential_query = student_modules.filter(
+        module_type__exact="sequential",
+    ).values('module_state_key').annotate(count_sequential=Count('module_state_key')).order_by()
+
+    new_rollups = [
+        models.StudentModuleRollup(
+            course_id=course_id,
+            module_type='problem',
+            module_state_key=row['module_state_key'],
+            grade=row['grade'],
+            max_grade=row['max_grade'],
+            count=row['count_grade'],
+        )
+        for row in problem_query
+    ]
+    new_rollups.extend(
+        models.StudentModuleRollup(
+            course_id=course_id,
+            module_type='sequential',
+            module_state_key=row['module_state_key'],
+            count=row['count_sequential'],
+        )
+        for row in sequential_query
+    )
+    for start in xrange(0, len(new_rollups), ROLLUPS_PER_INSERT):
+        models.StudentModuleRollup.objects.bulk_create(new_rollups[start:start + ROLLUPS_PER_INSERT])
+
+    last_update.modified = started - ROLLUP_MODIFIED_OVERLAP
+    last_update.save()
+    return True
+
 
 def get_problem_grade_distribution(course_id):
     """
@@ -31,13 +190,14 @@ def get_problem_grade_distribution(course_id):
       'total_student_count' where the key is problem 'module_id' and the value is number of students
         attempting the problem
     """
+    update_rollups(course_id)
 
-    # Aggregate query on studentmodule table for grade data for all problems in course
-    db_query = models.StudentModule.objects.filter(
+    # Grade data for all problems in course
+    db_query = models.StudentModuleRollup.objects.filter(
         course_id__exact=course_id,
-        grade__isnull=False,
+        stale=False,
         module_type__exact="problem",
-    ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
+    ).values('module_state_key', 'grade', 'max_grade', 'count')
 
     prob_grade_distrib = {}
     total_student_count = {}
@@ -48,7 +208,7 @@ def get_problem_grade_distribution(course_id):
 
         # Build set of grade distributions for each problem that has student responses
         if curr_problem in prob_grade_distrib:
-            prob_grade_distrib[curr_problem]['grade_distrib'].append((row['grade'], row['count_grade']))
+            prob_grade_distrib[curr_problem]['grade_distrib'].append((row['grade'], row['count']))
 
             if (prob_grade_distrib[curr_problem]['max_grade'] != row['max_grade']) and \
                     (prob_grade_distrib[curr_problem]['max_grade'] < row['max_grade']):
@@ -57,11 +217,11 @@ def get_problem_grade_distribution(course_id):
         else:
             prob_grade_distrib[curr_problem] = {
                 'max_grade': row['max_grade'],
-                'grade_distrib': [(row['grade'], row['count_grade'])]
+                'grade_distrib': [(row['grade'], row['count'])]
             }
 
         # Build set of total students attempting each problem
-        total_student_count[curr_problem] = total_student_count.get(curr_problem, 0) + row['count_grade']
+        total_student_count[curr_problem] = total_student_count.get(curr_problem, 0) + row['count']
 
     return prob_grade_distrib, total_student_count
 
@@ -74,18 +234,20 @@ def get_sequential_open_distrib(course_id):
 
     Outputs a dict mapping the 'module_id' to the number of students that have opened that subsection/sequential.
     """
+    update_rollups(course_id)
 
-    # Aggregate query on studentmodule table for "opening a subsection" data
-    db_query = models.StudentModule.objects.filter(
+    # "opening a subsection" data
+    db_query = models.StudentModuleRollup.objects.filter(
         course_id__exact=course_id,
+        stale=False,
         module_type__exact="sequential",
-    ).values('module_state_key').annotate(count_sequential=Count('module_state_key'))
+    ).values('module_state_key', 'count')
 
     # Build set of "opened" data for each subsection that has "opened" data
     sequential_open_distrib = {}
     for row in db_query:
         row_loc = course_id.make_usage_key_from_deprecated_string(row['module_state_key'])
-        sequential_open_distrib[row_loc] = row['count_sequential']
+        sequential_open_distrib[row_loc] = row['count']
 
     return sequential_open_distrib
 
@@ -104,18 +266,20 @@ def get_problem_set_grade_distrib(course_id, problem_set):
       'max_grade' - the maximum grade possible for the course
       'grade_distrib' - array of tuples (`grade`,`count`) ordered by `grade`
     """
+    update_rollups(course_id)
 
-    # Aggregate query on studentmodule table for grade data for set of problems in course
-    db_query = models.StudentModule.objects.filter(
+    # Grade data for set of problems in course
+    db_query = models.StudentModuleRollup.objects.filter(
         course_id__exact=course_id,
-        grade__isnull=False,
+        stale=False,
         module_type__exact="problem",
         module_state_key__in=problem_set,
     ).values(
         'module_state_key',
         'grade',
         'max_grade',
-    ).annotate(count_grade=Count('grade')).order_by('module_state_key', 'grade')
+        'count',
+    ).order_by('module_state_key', 'grade')
 
     prob_grade_distrib = {}
 
@@ -129,7 +293,7 @@ def get_problem_set_grade_distrib(course_id, problem_set):
             }
 
         curr_grade_distrib = prob_grade_distrib[row_loc]
-        curr_grade_distrib['grade_distrib'].append((row['grade'], row['count_grade']))
+        curr_grade_distrib['grade_distrib'].append((row['grade'], row['count']))
 
         if curr_grade_distrib['max_grade'] < row['max_grade']:
             curr_grade_distrib['max_grade'] = row['max_grade']
@@ -137,6 +301,58 @@ def get_problem_set_grade_distrib(course_id, problem_set):
     return prob_grade_distrib
 
 
+def get_course_layout(course_id):
+    """
+    Returns the sections, subsections, units and problems of the course that the
+    dashboard displays, without loading the course's blocks unless its version
+    has changed.
+
+    `course_id` the course ID for the course interested in
+
+    Returns an array of dicts in the order of the sections. Each dict has:
+      'display_name' - display name for the section
+      'subsections' - array of dicts in the order of the subsections, each with:
+        'module_url' - the subsection's location, as a deprecated string
+        'display_name' - display name for the subsection
+        'units' - array in the order of the units of an array for each unit of
+          its problems, as dicts with 'module_url' and 'display_name'
+    """
+    course = modulestore().get_course(course_id)
+    version = course_version(course)
+    cache_key = u'class_dashboard.course_layout.{}.{}'.format(course_id, version)
+    layout = cache.get(cache_key) if version is not None else None
+    if layout is None:
+        # Retrieve course object down to problems
+        course = modulestore().get_course(course_id, depth=4)
+        layout = [
+            {
+                'display_name': own_metadata(section).get('display_name', ''),
+                'subsections': [
+                    {
+                        'module_url': subsection.location.to_deprecated_string(),
+                        'display_name': own_metadata(subsection).get('display_name', ''),
+                        'units': [
+                            [
+                                {
+                                    'module_url': child.location.to_deprecated_string(),
+                                    'display_name': own_metadata(child).get('display_name', ''),
+                                }
+                                for child in unit.get_children()
+                                if child.location.category == 'problem'
+                            ]
+                            for unit in subsection.get_children()
+                        ],
+                    }
+                    for subsection in section.get_children()
+                ],
+            }
+            for section in course.get_children()
+        ]
+        if version is not None:
+            cache.set(cache_key, layout, LAYOUT_CACHE_TIMEOUT)
+    return layout
+
+
 def get_d3_problem_grade_distrib(course_id):
     """
     Returns problem grade distribution information for each section, data already in format for d3 function.
@@ -151,77 +367,74 @@ def get_d3_problem_grade_distrib(course_id):
     prob_grade_distrib, total_student_count = get_problem_grade_distribution(course_id)
     d3_data = []
 
-    # Retrieve course object down to problems
-    course = modulestore().get_course(course_id, depth=4)
-
     # Iterate through sections, subsections, units, problems
-    for section in course.get_children():
+    for section in get_course_layout(course_id):
         curr_section = {}
-        curr_section['display_name'] = own_metadata(section).get('display_name', '')
+        curr_section['display_name'] = section['display_name']
         data = []
         c_subsection = 0
-        for subsection in section.get_children():
+        for subsection in section['subsections']:
             c_subsection += 1
             c_unit = 0
-            for unit in subsection.get_children():
+            for unit in subsection['units']:
                 c_unit += 1
                 c_problem = 0
-                for child in unit.get_children():
+                for child in unit:
 
                     # Student data is at the problem level
-                    if child.location.category == 'problem':
-                        c_problem += 1
-                        stack_data = []
-
-                        # Construct label to display for this problem
-                        label = "P{0}.{1}.{2}".format(c_subsection, c_unit, c_problem)
-
-                        # Only problems in prob_grade_distrib have had a student submission.
-                        if child.location in prob_grade_distrib:
-
-                            # Get max_grade, grade_distribution for this problem
-                            problem_info = prob_grade_distrib[child.location]
-
-                            # Get problem_name for tooltip
-                            problem_name = own_metadata(child).get('display_name', '')
-
-                            # Compute percent of this grade over max_grade
-                            max_grade = float(problem_info['max_grade'])
-                            for (grade, count_grade) in problem_info['grade_distrib']:
-                                percent = 0.0
-                                if max_grade > 0:
-                                    percent = round((grade * 100.0) / max_grade, 1)
-
-                                # Compute percent of students with this grade
-                                student_count_percent = 0
-                                if total_student_count.get(child.location, 0) > 0:
-                                    student_count_percent = count_grade * 100 / total_student_count[child.location]
-
-                                # Tooltip parameters for problem in grade distribution view
-                                tooltip = {
-                                    'type': 'problem',
-                                    'label': label,
-                                    'problem_name': problem_name,
-                                    'count_grade': count_grade,
-                                    'percent': percent,
-                                    'grade': grade,
-                                    'max_grade': max_grade,
-                                    'student_count_percent': student_count_percent,
-                                }
-
-                                # Construct data to be sent to d3
-                                stack_data.append({
-                                    'color': percent,
-                                    'value': count_grade,
-                                    'tooltip': tooltip,
-                                    'module_url': child.location.to_deprecated_string(),
-                                })
-
-                        problem = {
-                            'xValue': label,
-                            'stackData': stack_data,
-                        }
-                        data.append(problem)
+                    c_problem += 1
+                    stack_data = []
+                    location = course_id.make_usage_key_from_deprecated_string(child['module_url'])
+
+                    # Construct label to display for this problem
+                    label = "P{0}.{1}.{2}".format(c_subsection, c_unit, c_problem)
+
+                    # Only problems in prob_grade_distrib have had a student submission.
+                    if location in prob_grade_distrib:
+
+                        # Get max_grade, grade_distribution for this problem
+                        problem_info = prob_grade_distrib[location]
+
+                        # Get problem_name for tooltip
+                        problem_name = child['display_name']
+
+                        # Compute percent of this grade over max_grade
+                        max_grade = float(problem_info['max_grade'])
+                        for (grade, count_grade) in problem_info['grade_distrib']:
+                            percent = 0.0
+                            if max_grade > 0:
+                                percent = round((grade * 100.0) / max_grade, 1)
+
+                            # Compute percent of students with this grade
+                            student_count_percent = 0
+                            if total_student_count.get(location, 0) > 0:
+                                student_count_percent = count_grade * 100 / total_student_count[location]
+
+                            # Tooltip parameters for problem in grade distribution view
+                            tooltip = {
+                                'type': 'problem',
+                                'label': label,
+                                'problem_name': problem_name,
+                                'count_grade': count_grade,
+                                'percent': percent,
+                                'grade': grade,
+                                'max_grade': max_grade,
+                                'student_count_percent': student_count_percent,
+                            }
+
+                            # Construct data to be sent to d3
+                            stack_data.append({
+                                'color': percent,
+                                'value': count_grade,
+                                'tooltip': tooltip,
+                                'module_url': child['module_url'],
+                            })
+
+                    problem = {
+                        'xValue': label,
+                        'stackData': stack_data,
+                    }
+                    data.append(problem)
         curr_section['data'] = data
 
         d3_data.append(curr_section)
@@ -243,24 +456,22 @@ def get_d3_sequential_open_distrib(course_id):
 
     d3_data = []
 
-    # Retrieve course object down to subsection
-    course = modulestore().get_course(course_id, depth=2)
-
     # Iterate through sections, subsections
-    for section in course.get_children():
+    for section in get_course_layout(course_id):
         curr_section = {}
-        curr_section['display_name'] = own_metadata(section).get('display_name', '')
+        curr_section['display_name'] = section['display_name']
         data = []
         c_subsection = 0
 
         # Construct data for each subsection to be sent to d3
-        for subsection in section.get_children():
+        for subsection in section['subsections']:
             c_subsection += 1
-            subsection_name = own_metadata(subsection).get('display_name', '')
+            subsection_name = subsection['display_name']
+            location = course_id.make_usage_key_from_deprecated_string(subsection['module_url'])
 
             num_students = 0
-            if subsection.location in sequential_open_distrib:
-                num_students = sequential_open_distrib[subsection.location]
+            if location in sequential_open_distrib:
+                num_students = sequential_open_distrib[location]
 
             stack_data = []
 
@@ -276,7 +487,7 @@ def get_d3_sequential_open_distrib(course_id):
                 'color': 0,
                 'value': num_students,
                 'tooltip': tooltip,
-                'module_url': subsection.location.to_deprecated_string(),
+                'module_url': subsection['module_url'],
             })
             subsection = {
                 'xValue': "SS {0}".format(c_subsection),
@@ -313,27 +524,24 @@ def get_d3_section_grade_distrib(course_id, section):
         'tooltip' - (Optional) Text to display on mouse hover
     """
 
-    # Retrieve course object down to problems
-    course = modulestore().get_course(course_id, depth=4)
-
     problem_set = []
     problem_info = {}
     c_subsection = 0
-    for subsection in course.get_children()[section].get_children():
+    for subsection in get_course_layout(course_id)[section]['subsections']:
         c_subsection += 1
         c_unit = 0
-        for unit in subsection.get_children():
+        for unit in subsection['units']:
             c_unit += 1
             c_problem = 0
-            for child in unit.get_children():
-                if (child.location.category == 'problem'):
-                    c_problem += 1
-                    problem_set.append(child.location)
-                    problem_info[child.location] = {
-                        'id': child.location.to_deprecated_string(),
-                        'x_value': "P{0}.{1}.{2}".format(c_subsection, c_unit, c_problem),
-                        'display_name': own_metadata(child).get('display_name', ''),
-                    }
+            for child in unit:
+                c_problem += 1
+                location = course_id.make_usage_key_from_deprecated_string(child['module_url'])
+                problem_set.append(location)
+                problem_info[location] = {
+                    'id': child['module_url'],
+                    'x_value': "P{0}.{1}.{2}".format(c_subsection, c_unit, c_problem),
+                    'display_name': child['display_name'],
+                }
 
     # Retrieve grade distribution for these problems
     grade_distrib = get_problem_set_grade_distrib(course_id, problem_set)
@@ -385,15 +593,7 @@ def get_section_display_name(course_id):
     The ith string in the array is the display name of the ith section in the course.
     """
 
-    course = modulestore().get_course(course_id, depth=4)
-
-    section_display_name = [""] * len(course.get_children())
-    i = 0
-    for section in course.get_children():
-        section_display_name[i] = own_metadata(section).get('display_name', '')
-        i += 1
-
-    return section_display_name
+    return [section['display_name'] for section in get_course_layout(course_id)]
 
 
 def get_array_section_has_problem(course_id):
@@ -405,25 +605,10 @@ def get_array_section_has_problem(course_id):
     The ith value in the array is true if the ith section in the course contains problems and false otherwise.
     """
 
-    course = modulestore().get_course(course_id, depth=4)
-
-    b_section_has_problem = [False] * len(course.get_children())
-    i = 0
-    for section in course.get_children():
-        for subsection in section.get_children():
-            for unit in subsection.get_children():
-                for child in unit.get_children():
-                    if child.location.category == 'problem':
-                        b_section_has_problem[i] = True
-                        break  # out of child loop
-                if b_section_has_problem[i]:
-                    break  # out of unit loop
-            if b_section_has_problem[i]:
-                break  # out of subsection loop
-
-        i += 1
-
-    return b_section_has_problem
+    return [
+        any(unit for subsection in section['subsections'] for unit in subsection['units'])
+        for section in get_course_layout(course_id)
+    ]
 
 
 def get_students_opened_subsection(request, csv=False):
@@ -0,0 +1,18 @@
+"""
+Background tasks for the class dashboard.
+"""
+from django.conf import settings
+from celery import task
+from opaque_keys.edx.keys import CourseKey
+
+from class_dashboard.dashboard_data import rebuild_rollups
+
+
+@task(default_retry_delay=60, max_retries=5, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def rebuild_course_rollups(course_id):
+    """
+    Sum all of the StudentModules of the course with id `course_id` into its
+    StudentModuleRollups again, retrying if its rollups are already being updated.
+    """
+    if not rebuild_rollups(CourseKey.from_string(course_id)):
+        raise rebuild_course_rollups.retry()
@@ -4,6 +4,7 @@ Tests for class dashboard (Metrics tab in instructor dashboard)
 
 import json
 
+from django.core.cache import cache
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
@@ -11,6 +12,7 @@ from mock import patch
 
 from capa.tests.response_xml_factory import StringResponseXMLFactory
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
+from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory, AdminFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -21,7 +23,9 @@ from class_dashboard.dashboard_data import (get_problem_grade_distribution, get_
                                             get_d3_sequential_open_distrib, get_d3_section_grade_distrib,
                                             get_section_display_name, get_array_section_has_problem,
                                             get_students_opened_subsection, get_students_problem_grades,
+                                            get_course_layout,
                                             )
+from class_dashboard.tasks import rebuild_course_rollups
 from class_dashboard.views import has_instructor_access_for_class
 
 USER_COUNT = 11
@@ -35,6 +39,7 @@ class TestGetProblemGradeDistribution(ModuleStoreTestCase):
 
     def setUp(self):
 
+        cache.clear()
         self.request_factory = RequestFactory()
         self.instructor = AdminFactory.create()
         self.client.login(username=self.instructor.username, password='test')
@@ -127,6 +132,69 @@ class TestGetProblemGradeDistribution(ModuleStoreTestCase):
                 sum_attempts += item[1]
             self.assertEquals(USER_COUNT, sum_attempts)
 
+    def test_rollups_updated(self):
+        __, total_student_count = get_problem_grade_distribution(self.course.id)
+        self.assertEquals(USER_COUNT, total_student_count[self.item.location])
+
+        # a new student's module and a changed grade are both counted
+        StudentModuleFactory.create(
+            grade=1,
+            max_grade=1,
+            course_id=self.course.id,
+            module_state_key=self.item.location,
+        )
+        module = StudentModule.objects.get(student=self.users[0], module_state_key=self.item.location)
+        module.grade = 1
+        module.save()
+
+        prob_grade_distrib, total_student_count = get_problem_grade_distribution(self.course.id)
+        self.assertEquals(USER_COUNT + 1, total_student_count[self.item.location])
+        grade_distrib = prob_grade_distrib[self.item.location]['grade_distrib']
+        self.assertEquals(3, sum(count for grade, count in grade_distrib if grade == 1))
+
+    def test_rollups_updated_after_delete(self):
+        get_problem_grade_distribution(self.course.id)
+        StudentModule.objects.get(student=self.users[0], module_state_key=self.item.location).delete()
+
+        __, total_student_count = get_problem_grade_distribution(self.course.id)
+        self.assertEquals(USER_COUNT - 1, total_student_count[self.item.location])
+
+    def test_rollups_updated_after_locked_delete(self):
+        get_problem_grade_distribution(self.course.id)
+
+        # a module deleted while another update holds the lock is left to the next update
+        lock_key = u'class_dashboard.update_rollups.{}'.format(self.course.id)
+        cache.add(lock_key, 'true')
+        StudentModule.objects.get(student=self.users[0], module_state_key=self.item.location).delete()
+        __, total_student_count = get_problem_grade_distribution(self.course.id)
+        self.assertEquals(USER_COUNT, total_student_count[self.item.location])
+
+        cache.delete(lock_key)
+        __, total_student_count = get_problem_grade_distribution(self.course.id)
+        self.assertEquals(USER_COUNT - 1, total_student_count[self.item.location])
+
+    def test_rollups_built_by_task(self):
+        with patch('class_dashboard.tasks.rebuild_course_rollups.delay') as mock_delay:
+            __, total_student_count = get_problem_grade_distribution(self.course.id)
+            self.assertEquals({}, total_student_count)
+            get_problem_grade_distribution(self.course.id)
+        # the first update of the rollups is queued, once
+        mock_delay.assert_called_once_with(unicode(self.course.id))
+
+        rebuild_course_rollups(unicode(self.course.id))
+        __, total_student_count = get_problem_grade_distribution(self.course.id)
+        self.assertEquals(USER_COUNT, total_student_count[self.item.location])
+
+    def test_course_layout_cached(self):
+        layout = get_course_layout(self.course.id)
+        self.assertEquals(u"test factory section omega \u03a9", layout[0]['display_name'])
+        self.assertEquals(USER_COUNT - 1, len(layout[0]['subsections'][0]['units'][0]))
+
+        # the second time, the layout is read back without walking the course
+        with patch('class_dashboard.dashboard_data.own_metadata') as mock_own_metadata:
+            self.assertEquals(layout, get_course_layout(self.course.id))
+        self.assertFalse(mock_own_metadata.called)
+
     def test_get_d3_problem_grade_distrib(self):
 
         d3_data = get_d3_problem_grade_distrib(self.course.id)
@@ -1,32 +1,50 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from itertools import islice
 import json
 import random
 import logging
+import time
 
 from contextlib import contextmanager
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count, Max
 from django.test.client import RequestFactory
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, chunks
 from student.models import anonymous_id_for_user
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.modulestore.search import course_version
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .models import StudentModule, cached_grades_key
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
 
 log = logging.getLogger("edx.courseware")
 
+# Seconds to use a student's cached grades in a course for. Grades also depend on
+# dates, like when sections are released, and on the student's roles and cohorts,
+# which don't change the course version or the student's StudentModules, so cached
+# grades are only used in the time bucket of this length that they were cached in.
+GRADE_CACHE_TIMEOUT = 15 * 60
+
+# The most course versions to remember whether they have always recalculated grades for
+MAX_ALWAYS_RECALCULATED_VERSIONS = 100
+
+# Whether courses have descriptors with always_recalculate_grades, as
+# {(course_id, course version): bool}
+_always_recalculated_by_version = {}
+
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):
     """
@@ -141,17 +159,165 @@ def answer_distributions(course_key):
     return answer_counts
 
 
+class StudentModuleGradeCache(object):
+    """
+    The StudentModule information which grading one student in one course needs, preloaded
+    so that a batch of students can be graded w/o the per section and per problem queries
+    which :func:`_grade` and :func:`get_score` otherwise make.
+
+    Locations are keyed by their database representation (see :meth:`location_key`).
+    """
+    def __init__(self, loaded_keys=frozenset()):
+        # keys of the locations which were loaded
+        self.loaded_keys = loaded_keys
+        # keys of the locations for which the student has a StudentModule in any course
+        self.locations_with_state = set()
+        # location key -> the student's StudentModule in this course
+        self.student_modules = {}
+
+    @staticmethod
+    def location_key(location):
+        """
+        Return the string to which StudentModule.module_state_key compares the location in queries
+        """
+        return StudentModule._meta.get_field('module_state_key').get_prep_value(location)  # pylint: disable=protected-access
+
+    def covers(self, location):
+        """
+        Whether the StudentModules for this location were loaded
+        """
+        return self.location_key(location) in self.loaded_keys
+
+    def has_state(self, location):
+        """
+        Whether the student has a StudentModule for this location (not necessarily in this course)
+        """
+        return self.location_key(location) in self.locations_with_state
+
+    def get_student_module(self, location):
+        """
+        Return the student's StudentModule for location in this course or None
+        """
+        return self.student_modules.get(self.location_key(location))
+
+    @classmethod
+    def for_students(cls, course_id, student_ids, locations, chunk_size=500):
+        """
+        Return a dict of student id -> StudentModuleGradeCache for the given locations
+        loading the StudentModules for all the students in one query per chunk_size locations.
+
+        Only the grade related columns are loaded.
+        """
+        loaded_keys = frozenset(cls.location_key(location) for location in locations)
+        caches = {student_id: cls(loaded_keys) for student_id in student_ids}
+        for location_chunk in chunks(locations, chunk_size):
+            student_modules = StudentModule.objects.filter(
+                student_id__in=student_ids,
+                module_state_key__in=location_chunk,
+            ).only('student', 'course_id', 'module_state_key', 'grade', 'max_grade')
+            for student_module in student_modules:
+                cache = caches[student_module.student_id]
+                key = unicode(student_module.module_state_key)
+                cache.locations_with_state.add(key)
+                if student_module.course_id == course_id:
+                    cache.student_modules[key] = student_module
+        return caches
+
+
+def graded_locations(course):
+    """
+    Return the locations of all the descriptors in the course's grading context
+    """
+    locations = set()
+    for sections in course.grading_context['graded_sections'].itervalues():
+        for section in sections:
+            locations.update(descriptor.location for descriptor in section['xmoduledescriptors'])
+    return locations
+
+
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, student_module_cache=None, use_cache=True):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
+
+    Unless keep_raw_scores is set or use_cache isn't, the grade is cached until
+    the student's scores or the course change.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        if keep_raw_scores or not use_cache:
+            return _grade(student, request, course, keep_raw_scores, student_module_cache)
+        return _cached_grades(
+            'grade', student, course,
+            lambda submissions_scores: _grade(
+                student, request, course, keep_raw_scores, student_module_cache, submissions_scores
+            )
+        )
+
+
+def _cached_grades(kind, student, course, compute):
+    """
+    Return compute(submissions_scores), the student's `kind` grades in the course,
+    from the cache if they were cached for this version of the course, in the same
+    time bucket, while the student had the same scores from the submissions API and
+    the same StudentModules.
+
+    The grades of courses with problems that are scored outside of the LMS (see
+    always_recalculate_grades) are always computed.
+    """
+    submissions_scores = sub_api.get_scores(
+        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+    )
+    version = course_version(course)
+    if version is None or student.id is None or settings.GENERATE_PROFILE_SCORES:
+        return compute(submissions_scores)
+    if _has_always_recalculated_grades(course, version):
+        return compute(submissions_scores)
+
+    # Any change to the student's StudentModules changes how many there are or when
+    # the last of them was modified, whether or not the cached grades were deleted
+    modules = StudentModule.objects.filter(student_id=student.id, course_id=course.id).aggregate(
+        count=Count('id'), modified=Max('modified')
+    )
+    inputs = (
+        version,
+        int(time.time()) // GRADE_CACHE_TIMEOUT,
+        submissions_scores,
+        modules['count'],
+        modules['modified'],
+    )
+    cache_key = cached_grades_key(kind, student.id, course.id)
+    cached = cache.get(cache_key)
+    if cached is not None and cached['inputs'] == inputs:
+        return cached['grades']
+
+    grades = compute(submissions_scores)
+    if grades is not None:
+        cache.set(cache_key, {'inputs': inputs, 'grades': grades}, GRADE_CACHE_TIMEOUT)
+    return grades
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _has_always_recalculated_grades(course, version):
+    """
+    Return whether any of the course's descriptors has grades that are updated
+    independently of interaction with the LMS, remembering it for the course version.
+    """
+    key = (course.id, version)
+    if key not in _always_recalculated_by_version:
+        if len(_always_recalculated_by_version) >= MAX_ALWAYS_RECALCULATED_VERSIONS:
+            _always_recalculated_by_version.clear()
+
+        always_recalculated = False
+        stack = [course]
+        while stack and not always_recalculated:
+            descriptor = stack.pop()
+            always_recalculated = bool(getattr(descriptor, 'always_recalculate_grades', False))
+            stack.extend(descriptor.get_children())
+        _always_recalculated_by_version[key] = always_recalculated
+    return _always_recalculated_by_version[key]
+
+
+def _grade(student, request, course, keep_raw_scores, student_module_cache=None, submissions_scores=None):
     """
     Unwrapped version of "grade"
 
@@ -169,6 +335,10 @@ def _grade(student, request, course, keep_raw_scores):
       make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - student_module_cache : an optional StudentModuleGradeCache holding the student's
+      StudentModules for all the graded locations (see iterate_grades_for)
+    - submissions_scores : the student's scores from the submissions API, if they
+      have already been fetched
 
     More information on the format is in the docstring for CourseGrader.
     """
@@ -178,9 +348,10 @@ def _grade(student, request, course, keep_raw_scores):
     # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
     # scores that were registered with the submissions API, which for the moment
     # means only openassessment (edx-ora2)
-    submissions_scores = sub_api.get_scores(
-        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
-    )
+    if submissions_scores is None:
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+        )
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -208,13 +379,19 @@ def _grade(student, request, course, keep_raw_scores):
                 )
 
             if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
+                if student_module_cache is not None:
+                    should_grade_section = any(
+                        student_module_cache.has_state(descriptor.location)
+                        for descriptor in section['xmoduledescriptors']
+                    )
+                else:
+                    with manual_transaction():
+                        should_grade_section = StudentModule.objects.filter(
+                            student=student,
+                            module_state_key__in=[
+                                descriptor.location for descriptor in section['xmoduledescriptors']
+                            ]
+                        ).exists()
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
@@ -232,7 +409,8 @@ def _grade(student, request, course, keep_raw_scores):
                 for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
 
                     (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+                        student_module_cache=student_module_cache,
                     )
                     if correct is None and total is None:
                         continue
@@ -310,15 +488,20 @@ def progress_summary(student, request, course):
     """
     Wraps "_progress_summary" with the manual_transaction context manager just
     in case there are unanticipated errors.
+
+    The summary is cached until the student's scores or the course change.
     """
     with manual_transaction():
-        return _progress_summary(student, request, course)
+        return _cached_grades(
+            'progress', student, course,
+            lambda submissions_scores: _progress_summary(student, request, course, submissions_scores)
+        )
 
 
 # TODO: This method is not very good. It was written in the old course style and
 # then converted over and performance is not good. Once the progress page is redesigned
 # to not have the progress summary this method should be deleted (so it won't be copied).
-def _progress_summary(student, request, course):
+def _progress_summary(student, request, course, submissions_scores=None):
     """
     Unwrapped version of "progress_summary".
 
@@ -334,6 +517,8 @@ def _progress_summary(student, request, course):
     Arguments:
         student: A User object for the student to grade
         course: A Descriptor containing the course to grade
+        submissions_scores: the student's scores from the submissions API, if they
+            have already been fetched
 
     If the student does not have access to load the course module, this function
     will return None.
@@ -350,7 +535,10 @@ def _progress_summary(student, request, course):
             # This student must not have access to the course.
             return None
 
-    submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
+    if submissions_scores is None:
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+        )
 
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
@@ -407,7 +595,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_module_cache=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -421,6 +609,8 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_module_cache: An optional StudentModuleGradeCache for the user. If it covers
+           problem_descriptor's location, the StudentModule is looked up in it rather than queried.
     """
     scores_cache = scores_cache or {}
 
@@ -447,14 +637,17 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_module_cache is not None and student_module_cache.covers(problem_descriptor.location):
+        student_module = student_module_cache.get_student_module(problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
@@ -500,11 +693,18 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+def iterate_grades_for(course_id, students, student_chunk_size=100):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
 
+    Students are graded in chunks of student_chunk_size: the StudentModules of
+    all the graded locations for a whole chunk are loaded in a few queries up
+    front rather than queried section by section and problem by problem.
+    The gradesets are the same as grade() returns, but are neither read from
+    nor added to the grade cache, as checking it costs a query per student
+    and each student is graded once.
+
     If an error occurred, gradeset will be an empty dict and err_msg will be an
     exception message. If there was no error, err_msg is an empty string.
 
@@ -525,25 +725,41 @@ def iterate_grades_for(course_id, students):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course_id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    locations = graded_locations(course)
+    students = iter(students)
+    while True:
+        student_chunk = list(islice(students, student_chunk_size))
+        if not student_chunk:
+            break
+
+        with manual_transaction():
+            student_module_caches = StudentModuleGradeCache.for_students(
+                course.id, [student.id for student in student_chunk], locations
+            )
+
+        for student in student_chunk:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade(
+                        student, request, course,
+                        student_module_cache=student_module_caches[student.id],
+                        use_cache=False,
+                    )
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course_id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
@@ -3,13 +3,17 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+import sys
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
 from itertools import chain
 from .models import (
     StudentModule,
+    StudentModuleHistory,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
-    XModuleStudentInfoField
+    XModuleStudentInfoField,
+    invalidate_cached_grades,
 )
 import logging
 from opaque_keys.edx.keys import CourseKey
@@ -17,6 +21,7 @@ from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.asides import AsideUsageKeyV1
 
 from django.db import DatabaseError
+from django.utils.timezone import now
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
@@ -64,6 +69,9 @@ class FieldDataCache(object):
         self.cache = {}
         self.descriptors = descriptors
         self.select_for_update = select_for_update
+        # (model class, pk) -> (field object, names of the fields changed in it), while
+        # a unit of work is in progress, else None
+        self._pending_writes = None
 
         if asides is None:
             self.asides = []
@@ -306,6 +314,110 @@ class FieldDataCache(object):
         return field_object
 
 
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Put off saving field objects until the end of the block, then save each one once,
+        and save the StudentModuleHistory entries for them together.
+
+        Raises KeyValueMultiSaveError at the end of the block if any of them couldn't be saved.
+        If the block raises an exception, what it changed before is still saved, but its
+        exception is the one raised.
+        """
+        if self._pending_writes is not None:
+            # already in a unit of work, which will save everything at its end
+            yield
+            return
+
+        self._pending_writes = OrderedDict()
+        try:
+            yield
+        except Exception:
+            exc_info = sys.exc_info()
+            pending_writes, self._pending_writes = self._pending_writes, None
+            try:
+                self._write(pending_writes.values())
+            except Exception:  # pylint: disable=broad-except
+                log.exception(u"Couldn't save the changes of a unit of work which failed")
+            raise exc_info[0], exc_info[1], exc_info[2]
+        pending_writes, self._pending_writes = self._pending_writes, None
+        self._write(pending_writes.values())
+
+    def save_field_object(self, field_object, field_names):
+        """
+        Save field_object, which has had the fields named field_names changed, now, or
+        at the end of the unit of work in progress.
+        """
+        if self._pending_writes is None:
+            field_object.save()
+        else:
+            key = (type(field_object), field_object.pk)
+            if key in self._pending_writes:
+                field_names = self._pending_writes[key][1] + list(field_names)
+            self._pending_writes[key] = (field_object, list(field_names))
+
+    def forget_field_object(self, field_object):
+        """
+        Don't save field_object at the end of the unit of work in progress, if any,
+        because it has been deleted.
+        """
+        if self._pending_writes is not None:
+            self._pending_writes.pop((type(field_object), field_object.pk), None)
+
+    def _write(self, pending_writes):
+        """
+        Save each of pending_writes, a list of (field object, names of fields changed in it),
+        with an UPDATE of just the columns the KeyValueStore writes, then save history
+        for the StudentModules with one INSERT.
+
+        Field objects always exist in the database already, as find_or_create creates them.
+        """
+        saved_fields = []
+        history_entries = []
+        modified = now()
+        for field_object, field_names in pending_writes:
+            if isinstance(field_object, StudentModule):
+                values = {
+                    'state': field_object.state,
+                    'grade': field_object.grade,
+                    'max_grade': field_object.max_grade,
+                    'done': field_object.done,
+                }
+            else:
+                values = {'value': field_object.value}
+            try:
+                type(field_object).objects.filter(pk=field_object.pk).update(modified=modified, **values)
+            except DatabaseError:
+                log.exception('Error saving fields %r', field_names)
+                raise KeyValueMultiSaveError(saved_fields)
+            field_object.modified = modified
+            saved_fields.extend(field_names)
+
+            if isinstance(field_object, StudentModule):
+                # an UPDATE doesn't send post_save, which would do this
+                invalidate_cached_grades(field_object.student_id, field_object.course_id)
+
+            if (
+                    isinstance(field_object, StudentModule) and
+                    field_object.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES
+            ):
+                history_entries.append(StudentModuleHistory(
+                    student_module=field_object,
+                    version=None,
+                    created=modified,
+                    state=field_object.state,
+                    grade=field_object.grade,
+                    max_grade=field_object.max_grade,
+                ))
+
+        if history_entries:
+            try:
+                StudentModuleHistory.objects.bulk_create(history_entries)
+            except DatabaseError:
+                log.exception('Error saving history for fields %r', saved_fields)
+                raise KeyValueMultiSaveError(saved_fields)
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -388,8 +500,11 @@ class DjangoKeyValueStore(KeyValueStore):
 
         for field_object in field_objects:
             try:
-                # Save the field object that we made above
-                field_object.save()
+                # Save the field object that we made above, now or at the end of the unit of work
+                self._field_data_cache.save_field_object(
+                    field_object,
+                    [field.field_name for field in field_objects[field_object]]
+                )
                 # If save is successful on this scope, add the saved fields to
                 # the list of successful saves
                 saved_fields.extend([field.field_name for field in field_objects[field_object]])
@@ -409,8 +524,9 @@ class DjangoKeyValueStore(KeyValueStore):
             state = json.loads(field_object.state)
             del state[key.field_name]
             field_object.state = json.dumps(state)
-            field_object.save()
+            self._field_data_cache.save_field_object(field_object, [key.field_name])
         else:
+            self._field_data_cache.forget_field_object(field_object)
             field_object.delete()
 
     def has(self, key):
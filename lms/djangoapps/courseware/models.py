@@ -14,8 +14,9 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField
@@ -91,6 +92,98 @@ class StudentModule(models.Model):
         return unicode(repr(self))
 
 
+# The kinds of grades courseware.grades caches for each student and course
+CACHED_GRADE_KINDS = ('grade', 'progress')
+
+
+def cached_grades_key(kind, user_id, course_id):
+    """
+    Return the cache key of the `kind` grades of the user in the course.
+    """
+    return u'courseware.grades.{}.{}.{}'.format(kind, user_id, course_id)
+
+
+def invalidate_cached_grades(user_id, course_id):
+    """
+    Forget the grades of the user in the course that courseware.grades has cached,
+    as the user's state in the course has changed.
+
+    courseware.grades checks the user's StudentModules before using cached grades
+    anyway, so this only frees them sooner. It can run before the change is
+    committed, and so can't keep grades from being cached from the old state.
+    """
+    cache.delete_many([cached_grades_key(kind, user_id, course_id) for kind in CACHED_GRADE_KINDS])
+
+
+@receiver(post_save, sender=StudentModule)
+@receiver(post_delete, sender=StudentModule)
+def _invalidate_cached_grades(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the cached grades of the student whose StudentModule was saved or deleted.
+    """
+    invalidate_cached_grades(instance.student_id, instance.course_id)
+
+
+class StudentModuleRollup(models.Model):
+    """
+    The number of students in a course with each grade and max_grade on one of
+    its problems, or who have opened one of its sequentials (with no grade),
+    summed from their StudentModules for the class dashboard, which keeps them
+    up to date (see class_dashboard.dashboard_data.update_rollups).
+    """
+    # The module types that are rolled up
+    MODULE_TYPES = ('problem', 'sequential')
+
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_type = models.CharField(max_length=32)
+    module_state_key = LocationKeyField(max_length=255, db_index=True, db_column='module_id')
+    grade = models.FloatField(null=True, blank=True)
+    max_grade = models.FloatField(null=True, blank=True)
+    count = models.IntegerField()
+
+    # Set on a marker added when a StudentModule of the module has been deleted,
+    # so the module must be summed again; markers aren't counted themselves
+    stale = models.BooleanField(default=False)
+
+    def __unicode__(self):
+        return u"[StudentModuleRollup] {}: {} {}/{} = {}".format(
+            self.course_id, self.module_state_key, self.grade, self.max_grade, self.count
+        )
+
+
+class StudentModuleRollupUpdate(models.Model):
+    """
+    When the StudentModuleRollups of a course were last brought up to date.
+    """
+    course_id = CourseKeyField(max_length=255, unique=True)
+
+    # StudentModules modified since this may not have been rolled up yet
+    modified = models.DateTimeField()
+
+    def __unicode__(self):
+        return u"[StudentModuleRollupUpdate] {}: {}".format(self.course_id, self.modified)
+
+
+@receiver(post_delete, sender=StudentModule)
+def _mark_rollups_stale(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Mark the rollups of the module of a deleted StudentModule as stale, as they
+    can't be found to be out of date from the modified dates of the StudentModules.
+
+    The mark is a row of its own rather than a flag on the rollups, so an update
+    of the rollups that is already running can't clear it without summing the
+    module again.
+    """
+    if instance.module_type in StudentModuleRollup.MODULE_TYPES:
+        StudentModuleRollup.objects.create(
+            course_id=instance.course_id,
+            module_type=instance.module_type,
+            module_state_key=instance.module_state_key,
+            count=0,
+            stale=True,
+        )
+
+
 class StudentModuleHistory(models.Model):
     """Keeps a complete history of state changes for a given XModule for a given
     Student. Right now, we restrict this to problems so that the table doesn't
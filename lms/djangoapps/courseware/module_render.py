@@ -17,6 +17,7 @@ from django.core.urlresolvers import reverse
 from django.http import Http404, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
+from capa.safe_exec import LocalCache
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access, get_user_role
 from courseware.masquerade import setup_masquerade
@@ -57,6 +58,9 @@ from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
 
 log = logging.getLogger(__name__)
 
+# The results of safe_exec, kept in this process in front of the shared cache
+SAFE_EXEC_CACHE = LocalCache(cache)
+
 
 if settings.XQUEUE_INTERFACE.get('basic_auth') is not None:
     REQUESTS_AUTH = HTTPBasicAuth(*settings.XQUEUE_INTERFACE['basic_auth'])
@@ -360,8 +364,8 @@ def get_module_system_for_user(user, field_data_cache,
         # Update the grades
         student_module.grade = event.get('value')
         student_module.max_grade = event.get('max_value')
-        # Save all changes to the underlying KeyValueStore
-        student_module.save()
+        # Save all changes to the underlying KeyValueStore, now or at the end of the handler
+        field_data_cache.save_field_object(student_module, ['grade'])
 
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
@@ -535,7 +539,7 @@ def get_module_system_for_user(user, field_data_cache,
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=SAFE_EXEC_CACHE,
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -786,7 +790,9 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, user):
     req = django_to_webob_request(request)
     try:
         with tracker.get_tracker().context(tracking_context_name, tracking_context):
-            resp = instance.handle(handler, req, suffix)
+            # save the changes the handler makes together, once it's done
+            with field_data_cache.unit_of_work():
+                resp = instance.handle(handler, req, suffix)
 
     except NoSuchHandlerError:
         log.exception("XBlock %s attempted to access missing handler %r", instance, handler)
@@ -2,18 +2,21 @@
 Test grade calculation.
 """
 from django.http import Http404
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from mock import patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 from courseware.grades import grade, iterate_grades_for
+from courseware.tests.factories import StudentModuleFactory
+from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, student_module_cache=None, use_cache=True):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -24,7 +27,10 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(
+        student, request, course,
+        keep_raw_scores=keep_raw_scores, student_module_cache=student_module_cache, use_cache=use_cache
+    )
 
 
 @override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
@@ -105,6 +111,60 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_same_as_grade(self):
+        """
+        Grading in chunks from preloaded StudentModules gives the same gradesets as grade()
+        """
+        chapter = ItemFactory.create(parent_location=self.course.location, category='chapter')
+        sequential = ItemFactory.create(
+            parent_location=chapter.location,
+            category='sequential',
+            metadata={'graded': True, 'format': 'Homework'}
+        )
+        problems = [
+            ItemFactory.create(parent_location=sequential.location, category='problem')
+            for __ in range(3)
+        ]
+        # student1 answered everything, student2 one problem and the others nothing
+        for problem in problems:
+            StudentModuleFactory.create(
+                student=self.students[0],
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                grade=1,
+                max_grade=1,
+            )
+        StudentModuleFactory.create(
+            student=self.students[1],
+            course_id=self.course.id,
+            module_state_key=problems[0].location,
+            grade=0,
+            max_grade=1,
+        )
+
+        course = modulestore().get_course(self.course.id)
+        # use a chunk size which doesn't divide the number of students
+        gradeset_results = list(iterate_grades_for(self.course.id, self.students, student_chunk_size=2))
+        self.assertEqual([student for student, __, __ in gradeset_results], self.students)
+        for student, gradeset, err_msg in gradeset_results:
+            self.assertEqual(err_msg, "")
+            request = RequestFactory().get('/')
+            request.user = student
+            request.session = {}
+            self.assertEqual(gradeset, grade(student, request, course))
+        self.assertEqual(gradeset_results[0][1]['percent'], 1.0)
+
+    def test_grade_cache_not_used(self):
+        """
+        Grading a whole course doesn't check or fill the grade cache student by student
+        """
+        with patch('courseware.grades.cache') as mock_cache:
+            all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students)
+        self.assertEqual(len(all_gradesets), len(self.students))
+        self.assertEqual(len(all_errors), 0)
+        self.assertFalse(mock_cache.get.called)
+        self.assertFalse(mock_cache.set.called)
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
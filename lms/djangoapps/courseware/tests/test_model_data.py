@@ -7,7 +7,7 @@ from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
 from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -176,6 +176,43 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
                 self.kvs.set_many(kv_dict)
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
+    def test_unit_of_work(self):
+        "Test that changes made in a unit of work are saved together at its end"
+        history_count = StudentModuleHistory.objects.count()
+        with self.field_data_cache.unit_of_work():
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+            self.kvs.set(user_state_key('b_field'), 'newer_value')
+            self.assertEquals({'b_field': 'b_value', 'a_field': 'a_value'}, json.loads(StudentModule.objects.all()[0].state))
+            self.assertEquals(history_count, StudentModuleHistory.objects.count())
+
+        self.assertEquals({'b_field': 'newer_value', 'a_field': 'new_value'}, json.loads(StudentModule.objects.all()[0].state))
+        # the StudentModule was only saved once
+        self.assertEquals(history_count + 1, StudentModuleHistory.objects.count())
+
+    def test_unit_of_work_failure(self):
+        "Test failures when saving the changes made in a unit of work"
+        with patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError):
+            with self.assertRaises(KeyValueMultiSaveError) as exception_context:
+                with self.field_data_cache.unit_of_work():
+                    self.kvs.set_many(self.construct_kv_dict())
+        self.assertEquals(len(exception_context.exception.saved_field_names), 0)
+
+    def test_unit_of_work_error(self):
+        "Test that an error in a unit of work is raised, not one from saving its changes"
+        with patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError):
+            with self.assertRaises(ValueError):
+                with self.field_data_cache.unit_of_work():
+                    self.kvs.set_many(self.construct_kv_dict())
+                    raise ValueError()
+
+    def test_unit_of_work_error_saves(self):
+        "Test that the changes made in a unit of work before an error are saved"
+        with self.assertRaises(ValueError):
+            with self.field_data_cache.unit_of_work():
+                self.kvs.set(user_state_key('a_field'), 'new_value')
+                raise ValueError()
+        self.assertEquals({'b_field': 'b_value', 'a_field': 'new_value'}, json.loads(StudentModule.objects.all()[0].state))
+
 
 class TestMissingStudentModule(TestCase):
     def setUp(self):
@@ -63,6 +63,7 @@ class ModuleRenderTestCase(ModuleStoreTestCase, LoginEnrollmentTestCase):
         Set up the course and user context
         """
         super(ModuleRenderTestCase, self).setUp()
+        render.SAFE_EXEC_CACHE.clear()
 
         self.course_key = self.create_toy_course()
         self.toy_course = modulestore().get_course(self.course_key)
@@ -177,6 +178,26 @@ class ModuleRenderTestCase(ModuleStoreTestCase, LoginEnrollmentTestCase):
         self.assertEquals(403, response.status_code)
         self.assertEquals('Unauthenticated', response.content)
 
+    def test_safe_exec_cache_shared(self):
+        """
+        Test that the safe_exec results are kept across requests, in front of the shared cache
+        """
+        module_systems = []
+        for __ in range(2):
+            request = self.request_factory.get('')
+            request.user = self.mock_user
+            field_data_cache = FieldDataCache([self.toy_course], self.toy_course.id, self.mock_user)
+            module = render.get_module_for_descriptor(
+                self.mock_user, request, self.toy_course, field_data_cache, self.toy_course.id
+            )
+            module_systems.append(module.xmodule_runtime)
+
+        self.assertIs(render.SAFE_EXEC_CACHE, module_systems[0].cache)
+        self.assertIs(render.SAFE_EXEC_CACHE, module_systems[1].cache)
+        module_systems[0].cache.set('key', (None, {'a': 1}))
+        self.assertEqual((None, {'a': 1}), module_systems[1].cache.get('key'))
+        self.assertEqual(1, render.SAFE_EXEC_CACHE.stats()['hits'])
+
     @ddt.data('pure', 'vertical')
     @XBlock.register_temp_plugin(PureXBlock, identifier='pure')
     def test_rebinding_same_user(self, block_type):
@@ -4,6 +4,7 @@ Integration tests for submitting problem responses and getting grades.
 """
 import json
 import os
+import time
 from textwrap import dedent
 
 from django.conf import settings
@@ -19,6 +20,7 @@ from capa.tests.response_xml_factory import (
 )
 from courseware import grades
 from courseware.models import StudentModule
+from courseware.module_render import SAFE_EXEC_CACHE
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
@@ -43,6 +45,8 @@ class TestSubmittingProblems(ModuleStoreTestCase, LoginEnrollmentTestCase):
     def setUp(self):
 
         super(TestSubmittingProblems, self).setUp(create_user=False)
+        # safe_exec results are kept in the process, beyond each test's cache
+        SAFE_EXEC_CACHE.clear()
         # Create course
         self.course = CourseFactory.create(display_name=self.COURSE_NAME, number=self.COURSE_SLUG)
         assert self.course, "Couldn't load course %r" % self.COURSE_NAME
@@ -476,6 +480,54 @@ class TestCourseGrader(TestSubmittingProblems):
         self.check_grade_percent(0.67)
         self.assertEqual(self.get_grade_summary()['grade'], 'B')
 
+    def test_grade_cached(self):
+        """
+        Check that grades are cached until the student answers again.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+        self.assertEqual(sum(self.score_for_hw('homework')), 1.0)
+
+        # the course isn't graded again
+        with patch('courseware.grades._grade') as mock_grade:
+            with patch('courseware.grades._progress_summary') as mock_progress_summary:
+                self.check_grade_percent(0.33)
+                self.assertEqual(sum(self.score_for_hw('homework')), 1.0)
+        self.assertFalse(mock_grade.called)
+        self.assertFalse(mock_progress_summary.called)
+
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        self.check_grade_percent(0.67)
+        self.assertEqual(sum(self.score_for_hw('homework')), 2.0)
+
+    def test_grade_cached_checks_student_modules(self):
+        """
+        Check that cached grades aren't used once the student's state changes, even if
+        they weren't deleted when it did.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        with patch('courseware.models.invalidate_cached_grades'):
+            with patch('courseware.model_data.invalidate_cached_grades'):
+                self.submit_question_answer('p2', {'2_1': 'Correct'})
+        self.check_grade_percent(0.67)
+
+    def test_grade_cached_per_time_bucket(self):
+        """
+        Check that grades cached in an earlier time bucket aren't used.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        with patch('courseware.grades.time.time', return_value=time.time() + grades.GRADE_CACHE_TIMEOUT):
+            with patch('courseware.grades._grade', return_value={'percent': 0.33}) as mock_grade:
+                self.check_grade_percent(0.33)
+        self.assertTrue(mock_grade.called)
+
     def test_submissions_api_overrides_scores(self):
         """
         Check that answering incorrectly is graded properly.
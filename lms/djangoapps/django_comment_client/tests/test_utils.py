@@ -1,18 +1,23 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
+import httplib
 import json
+from StringIO import StringIO
 from pytz import UTC
 
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.utils import override_settings
+from django.utils import translation
 from edxmako import add_lookup
 import mock
+import requests
 
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from django_comment_client.tests.factories import RoleFactory
 from django_comment_client.tests.unicode import UnicodeTestMixin
 import django_comment_client.utils as utils
+import lms.lib.comment_client as cc
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
@@ -636,3 +641,40 @@ class RenderMustacheTests(TestCase):
         """
         add_lookup('main', '', package=__name__)
         self.assertEqual(utils.render_mustache('test.mustache', {}), 'Testing 1 2 3.\n')
+
+
+class PerformConcurrentlyTestCase(TestCase):
+    """
+    Test the comments service client's `perform_concurrently` and `get_session`.
+    """
+
+    def test_results_in_order(self):
+        self.assertEqual(
+            cc.utils.perform_concurrently(lambda: 1, lambda: 2, lambda: 3),
+            [1, 2, 3]
+        )
+
+    def test_exception_raised(self):
+        def fail():
+            raise cc.utils.CommentClientRequestError("dummy", 404)
+
+        with self.assertRaises(cc.utils.CommentClientRequestError):
+            cc.utils.perform_concurrently(lambda: 1, fail)
+
+    def test_language_passed_on(self):
+        with translation.override('eo'):
+            self.assertEqual(
+                cc.utils.perform_concurrently(translation.get_language, translation.get_language),
+                ['eo', 'eo']
+            )
+
+    def test_session_reused(self):
+        self.assertIs(cc.utils.get_session(), cc.utils.get_session())
+
+    def test_session_keeps_no_cookies(self):
+        session = cc.utils.get_session()
+        headers = httplib.HTTPMessage(StringIO('Set-Cookie: session=user1; Path=/\r\n\r\n'))
+        response = mock.Mock(_original_response=mock.Mock(msg=headers))
+        request = requests.Request('GET', 'http://localhost:4567/api/v1/users/1').prepare()
+        requests.cookies.extract_cookies_to_jar(session.cookies, request, response)
+        self.assertEqual(len(session.cookies), 0)
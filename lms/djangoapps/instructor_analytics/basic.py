@@ -172,40 +172,59 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
-    include_cohort_column = 'cohort' in features
+    students = _enrolled_students(course_key, features)
+    return [_extract_student(student, course_key, features) for student in students]
 
+
+def iter_enrolled_students_features(course_key, features, chunk_size=1000):
+    """
+    Yield the student features dictionaries that `enrolled_students_features`
+    returns, in the same order, loading only `chunk_size` students at a time.
+    """
+    students = _enrolled_students(course_key, features)
+    student_ids = list(students.values_list('id', flat=True))
+    for start in xrange(0, len(student_ids), chunk_size):
+        for student in students.filter(id__in=student_ids[start:start + chunk_size]):
+            yield _extract_student(student, course_key, features)
+
+
+def _enrolled_students(course_key, features):
+    """
+    Return a queryset of the students enrolled in the course, ordered by
+    username, which loads what `_extract_student` needs for the features.
+    """
     students = User.objects.filter(
         courseenrollment__course_id=course_key,
         courseenrollment__is_active=1,
     ).order_by('username').select_related('profile')
 
-    if include_cohort_column:
+    if 'cohort' in features:
         students = students.prefetch_related('course_groups')
-
-    def extract_student(student, features):
-        """ convert student to dictionary """
-        student_features = [x for x in STUDENT_FEATURES if x in features]
-        profile_features = [x for x in PROFILE_FEATURES if x in features]
-
-        student_dict = dict((feature, getattr(student, feature))
-                            for feature in student_features)
-        profile = student.profile
-        if profile is not None:
-            profile_dict = dict((feature, getattr(profile, feature))
-                                for feature in profile_features)
-            student_dict.update(profile_dict)
-
-        if include_cohort_column:
-            # Note that we use student.course_groups.all() here instead of
-            # student.course_groups.filter(). The latter creates a fresh query,
-            # therefore negating the performance gain from prefetch_related().
-            student_dict['cohort'] = next(
-                (cohort.name for cohort in student.course_groups.all() if cohort.course_id == course_key),
-                "[unassigned]"
-            )
-        return student_dict
-
-    return [extract_student(student, features) for student in students]
+    return students
+
+
+def _extract_student(student, course_key, features):
+    """ convert student to dictionary """
+    student_features = [x for x in STUDENT_FEATURES if x in features]
+    profile_features = [x for x in PROFILE_FEATURES if x in features]
+
+    student_dict = dict((feature, getattr(student, feature))
+                        for feature in student_features)
+    profile = student.profile
+    if profile is not None:
+        profile_dict = dict((feature, getattr(profile, feature))
+                            for feature in profile_features)
+        student_dict.update(profile_dict)
+
+    if 'cohort' in features:
+        # Note that we use student.course_groups.all() here instead of
+        # student.course_groups.filter(). The latter creates a fresh query,
+        # therefore negating the performance gain from prefetch_related().
+        student_dict['cohort'] = next(
+            (cohort.name for cohort in student.course_groups.all() if cohort.course_id == course_key),
+            "[unassigned]"
+        )
+    return student_dict
 
 
 def coupon_codes_features(features, coupons_list):
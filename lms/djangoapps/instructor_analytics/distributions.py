@@ -21,7 +21,9 @@ The distribution in a course for gender might look like:
 }
 """
 
-from django.db.models import Count
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
 from student.models import CourseEnrollment, UserProfile
 
 # choices with a restricted domain, e.g. level_of_education
@@ -36,6 +38,10 @@ DISPLAY_NAMES = {
     'year_of_birth': 'Year Of Birth',
 }
 
+# Seconds to cache a course's distributions for. They aren't used once the course's
+# active enrollments change, but profile edits only show up when they expire.
+DISTRIBUTIONS_CACHE_TIMEOUT = 60 * 5
+
 
 class ProfileDistribution(object):
     """
@@ -99,6 +105,7 @@ def profile_distribution(course_id, feature):
         )
 
     prd = ProfileDistribution(feature)
+    distribution = _course_distributions(course_id)[feature]
 
     if feature in _EASY_CHOICE_FEATURES:
         prd.type = 'EASY_CHOICE'
@@ -112,61 +119,59 @@ def profile_distribution(course_id, feature):
         choices = [(short, full)
                    for (short, full) in raw_choices] + [('no_data', 'No Data')]
 
-        def get_filter(feature, value):
-            """ Get the orm filter parameters for a feature. """
-            return {
-                'gender': {'user__profile__gender': value},
-                'level_of_education': {'user__profile__level_of_education': value},
-            }[feature]
-
-        def get_count(feature, value):
-            """ Get the count of enrolled students matching the feature value. """
-            return CourseEnrollment.objects.filter(
-                course_id=course_id,
-                is_active=True,
-                **get_filter(feature, value)
-            ).count()
-
-        distribution = {}
-        for (short, full) in choices:
-            # handle no data case
-            if short == 'no_data':
-                distribution['no_data'] = 0
-                distribution['no_data'] += get_count(feature, None)
-                distribution['no_data'] += get_count(feature, '')
-            else:
-                distribution[short] = get_count(feature, short)
-
-        prd.data = distribution
+        prd.data = dict((short, distribution.get(short, 0)) for (short, full) in choices)
         prd.choices_display_names = dict(choices)
     elif feature in _OPEN_CHOICE_FEATURES:
         prd.type = 'OPEN_CHOICE'
-        profiles = UserProfile.objects.filter(
-            user__courseenrollment__course_id=course_id,
-            user__courseenrollment__is_active=True
-        )
-        query_distribution = profiles.values(
-            feature).annotate(Count(feature)).order_by()
-        # query_distribution is of the form [{'featureval': 'value1', 'featureval__count': 4},
-        #    {'featureval': 'value2', 'featureval__count': 2}, ...]
+        prd.data = dict(distribution)
+
+    prd.validate()
+    return prd
 
-        distribution = dict((vald[feature], vald[feature + '__count'])
-                            for vald in query_distribution)
-        # distribution is of the form {'value1': 4, 'value2': 2, ...}
 
-        # change none to no_data for valid json key
-        if None in distribution:
-            # django does not properly count NULL values when using annotate Count
-            # so
-            #     distribution['no_data'] = distribution.pop(None)
-            # would always be 0.
+def _distributions_cache_key(course_id):
+    """ Get the cache key of the distributions of a course. """
+    return u'instructor_analytics.distributions.{}'.format(course_id)
 
-            # Correctly count null values
-            distribution['no_data'] = profiles.filter(
-                **{feature: None}
-            ).count()
 
-        prd.data = distribution
+def _course_distributions(course_id):
+    """
+    Get the distributions of the students enrolled in a course over all of
+    AVAILABLE_PROFILE_FEATURES, as a dict from feature to a dict from value to
+    the number of students with that value.
 
-    prd.validate()
-    return prd
+    Students with no value (None or '') for a feature are counted under 'no_data'.
+    """
+    enrollments = CourseEnrollment.objects.filter(course_id=course_id, is_active=True)
+    # Enrolling or unenrolling changes how many active enrollments there are, or
+    # which. This is much cheaper to check than grouping the students' profiles.
+    enrollments_key = enrollments.aggregate(count=Count('id'), id_sum=Sum('id'))
+
+    cache_key = _distributions_cache_key(course_id)
+    cached = cache.get(cache_key)
+    if cached is not None and cached['enrollments'] == enrollments_key:
+        return cached['distributions']
+
+    distributions = dict((feature, {}) for feature in AVAILABLE_PROFILE_FEATURES)
+
+    # Count the students with each combination of values at once, rather
+    # than querying for each feature, or each value of each feature
+    profile_fields = ['user__profile__' + feature for feature in AVAILABLE_PROFILE_FEATURES]
+    query_distribution = enrollments.values(*profile_fields).annotate(Count('id')).order_by()
+    # query_distribution is of the form [{'user__profile__gender': 'm', ..., 'id__count': 4}, ...]
+
+    for vald in query_distribution:
+        for feature, field in zip(AVAILABLE_PROFILE_FEATURES, profile_fields):
+            value = vald[field]
+            if value is None or value == '':
+                # no_data is used as the key instead of None/'' to adhere to the json spec
+                value = 'no_data'
+            distribution = distributions[feature]
+            distribution[value] = distribution.get(value, 0) + vald['id__count']
+
+    cache.set(
+        cache_key,
+        {'enrollments': enrollments_key, 'distributions': distributions},
+        DISTRIBUTIONS_CACHE_TIMEOUT
+    )
+    return distributions
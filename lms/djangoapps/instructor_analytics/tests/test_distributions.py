@@ -1,5 +1,6 @@
 """ Tests for analytics.distributions """
 
+from django.core.cache import cache
 from django.test import TestCase
 from nose.tools import raises
 from student.models import CourseEnrollment
@@ -13,6 +14,7 @@ class TestAnalyticsDistributions(TestCase):
     '''Test analytics distribution gathering.'''
 
     def setUp(self):
+        cache.clear()
         self.course_id = SlashSeparatedCourseKey('robot', 'course', 'id')
 
         self.users = [UserFactory(
@@ -60,6 +62,29 @@ class TestAnalyticsDistributions(TestCase):
         distribution = profile_distribution(self.course_id, "gender")
         self.assertEqual(distribution.data['m'], len(course_enrollments) - 1)
 
+    def test_distributions_queried_once(self):
+        # the enrollments are checked every time, but the profiles only grouped once
+        with self.assertNumQueries(len(AVAILABLE_PROFILE_FEATURES) + 1):
+            for feature in AVAILABLE_PROFILE_FEATURES:
+                profile_distribution(self.course_id, feature)
+        with self.assertNumQueries(1):
+            distribution = profile_distribution(self.course_id, 'level_of_education')
+        self.assertEqual(distribution.data['el'], len(self.users) / 3)
+
+    def test_new_enrollment_counted(self):
+        distribution = profile_distribution(self.course_id, 'year_of_birth')
+        self.assertNotIn(1990, distribution.data)
+        CourseEnrollment.enroll(UserFactory(profile__year_of_birth=1990), self.course_id)
+        distribution = profile_distribution(self.course_id, 'year_of_birth')
+        self.assertEqual(distribution.data[1990], 1)
+
+    def test_unenrollment_counted(self):
+        distribution = profile_distribution(self.course_id, 'year_of_birth')
+        self.assertEqual(distribution.data[1930], 1)
+        CourseEnrollment.unenroll(self.users[0], self.course_id)
+        distribution = profile_distribution(self.course_id, 'year_of_birth')
+        self.assertNotIn(1930, distribution.data)
+
     def test_level_of_education_count(self):
         course_enrollments = CourseEnrollment.objects.filter(
             course_id=self.course_id, user__profile__level_of_education='hs'
@@ -75,6 +100,7 @@ class TestAnalyticsDistributionsNoData(TestCase):
     '''Test analytics distribution gathering.'''
 
     def setUp(self):
+        cache.clear()
         self.course_id = SlashSeparatedCourseKey('robot', 'course', 'id')
 
         self.users = [UserFactory(
@@ -12,8 +12,10 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+from contextlib import contextmanager
 from cStringIO import StringIO
 from gzip import GzipFile
+from tempfile import NamedTemporaryFile
 from uuid import uuid4
 import csv
 import json
@@ -190,33 +192,78 @@ class InstructorTask(models.Model):
         return json.dumps({'message': 'Task revoked before running'})
 
 
+class InstructorSubtask(models.Model):
+    """
+    Stores the status of one subtask of an InstructorTask.
+
+    Each subtask updates only its own entry, so that subtasks don't have to lock
+    and rewrite the InstructorTask to record their progress.  The counts and
+    `state` are those of the subtask's SubtaskStatus.
+
+    `instructor_task` is the InstructorTask the subtask was created for.
+    `subtask_id` stores the id used by celery for the subtask.
+    """
+    instructor_task = models.ForeignKey(InstructorTask, db_index=True)
+    subtask_id = models.CharField(max_length=255, db_index=True)
+    state = models.CharField(max_length=50, db_index=True)
+    attempted = models.IntegerField(default=0)
+    succeeded = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    retried_nomax = models.IntegerField(default=0)
+    retried_withmax = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('instructor_task', 'subtask_id'),)
+
+    def __repr__(self):
+        return 'InstructorSubtask<%r>' % ({
+            'instructor_task_id': self.instructor_task_id,
+            'subtask_id': self.subtask_id,
+            'state': self.state,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Reports are written a row at a time through `rows_writer()`, so
+    that they never have to be held in memory whole.
     """
     @classmethod
-    def from_config(cls):
+    def from_config(cls, subdirectory=None):
         """
         Return one of the ReportStore subclasses depending on django
         configuration. Look at subclasses for expected configuration.
+
+        If `subdirectory` is given, the store keeps its files under that
+        subdirectory of the configured ROOT_PATH, out of sight of the
+        `links_for()` of the store w/o it.
         """
         storage_type = settings.GRADES_DOWNLOAD.get("STORAGE_TYPE")
         if storage_type.lower() == "s3":
-            return S3ReportStore.from_config()
+            return S3ReportStore.from_config(subdirectory)
         elif storage_type.lower() == "localfs":
-            return LocalFSReportStore.from_config()
+            return LocalFSReportStore.from_config(subdirectory)
+
+    def store_rows(self, course_id, filename, rows):
+        """
+        Given a `course_id`, `filename`, and `rows` (an iterable, e.g. a generator,
+        of rows, each an iterable of strings), write the rows out as a CSV file.
+        """
+        with self.rows_writer(course_id, filename) as writer:
+            writer.writerows(rows)
 
-    def _get_utf8_encoded_rows(self, rows):
+    def _get_utf8_decoded_rows(self, rows):
         """
-        Given a list of `rows` containing unicode strings, return a
-        new list of rows with those strings encoded as utf-8 for CSV
-        compatibility.
+        Given an iterable of `rows` read from a CSV written by `store_rows()`,
+        yield the rows with their utf-8 encoded strings decoded to unicode.
         """
         for row in rows:
-            yield [unicode(item).encode('utf-8') for item in row]
+            yield [item.decode('utf-8') for item in row]
 
 
 class S3ReportStore(ReportStore):
@@ -231,6 +278,10 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
+    # Bytes of compressed CSV to upload at a time; S3 requires all but the
+    # last part of a multipart upload to be at least 5 MB.
+    MULTIPART_CHUNK_SIZE = 5 * 1024 * 1024
+
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
 
@@ -242,7 +293,7 @@ class S3ReportStore(ReportStore):
         self.bucket = conn.get_bucket(bucket_name)
 
     @classmethod
-    def from_config(cls):
+    def from_config(cls, subdirectory=None):
         """
         The expected configuration for an `S3ReportStore` is to have a
         `GRADES_DOWNLOAD` dict in settings with the following fields::
@@ -256,9 +307,12 @@ class S3ReportStore(ReportStore):
         Since S3 access relies on boto, you must also define `AWS_ACCESS_KEY_ID`
         and `AWS_SECRET_ACCESS_KEY` in settings.
         """
+        root_path = settings.GRADES_DOWNLOAD['ROOT_PATH']
+        if subdirectory is not None:
+            root_path = "{}/{}".format(root_path, subdirectory)
         return cls(
             settings.GRADES_DOWNLOAD['BUCKET'],
-            settings.GRADES_DOWNLOAD['ROOT_PATH']
+            root_path
         )
 
     def key_for(self, course_id, filename):
@@ -305,22 +359,44 @@ class S3ReportStore(ReportStore):
             }
         )
 
-    def store_rows(self, course_id, filename, rows):
+    @contextmanager
+    def rows_writer(self, course_id, filename):
         """
-        Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        Return a context manager for a `ReportWriter` that writes a gzip'd csv
+        file with the given `course_id` and `filename`.
+
+        The compressed file is uploaded to S3 in parts of MULTIPART_CHUNK_SIZE
+        bytes as it is written, or with `store()` if it's no bigger than one
+        part. Either way the file only appears in S3 once the writer is closed
+        without an error.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        output_file = S3MultipartFile(self, course_id, filename)
+        gzip_file = GzipFile(fileobj=output_file, mode="wb")
+        try:
+            yield ReportWriter(gzip_file)
+            gzip_file.close()
+            output_file.close()
+        except Exception:
+            output_file.cancel()
+            raise
+
+    def read_rows(self, course_id, filename):
+        """
+        Return the list of rows stored by `store_rows()` for the given
+        `course_id` and `filename`, or an empty list if there is no such file.
+        """
+        key = self.key_for(course_id, filename)
+        if not key.exists():
+            return []
+        gzip_file = GzipFile(fileobj=StringIO(key.get_contents_as_string()), mode="rb")
+        return list(self._get_utf8_decoded_rows(csv.reader(gzip_file)))
 
-        self.store(course_id, filename, output_buffer)
+    def delete(self, course_id, filename):
+        """Delete the file stored for the given `course_id` and `filename`, if any."""
+        self.key_for(course_id, filename).delete()
 
     def links_for(self, course_id):
         """
@@ -354,7 +430,7 @@ class LocalFSReportStore(ReportStore):
             os.makedirs(root_path)
 
     @classmethod
-    def from_config(cls):
+    def from_config(cls, subdirectory=None):
         """
         Generate an instance of this object from Django settings. It assumes
         that there is a dict in settings named GRADES_DOWNLOAD and that it has
@@ -365,7 +441,10 @@ class LocalFSReportStore(ReportStore):
             STORAGE_TYPE : "localfs"
             ROOT_PATH : /tmp/edx/report-downloads/
         """
-        return cls(settings.GRADES_DOWNLOAD['ROOT_PATH'])
+        root_path = settings.GRADES_DOWNLOAD['ROOT_PATH']
+        if subdirectory is not None:
+            root_path = os.path.join(root_path, subdirectory)
+        return cls(root_path)
 
     def path_to(self, course_id, filename):
         """Return the full path to a given file for a given course."""
@@ -386,16 +465,48 @@ class LocalFSReportStore(ReportStore):
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
 
-    def store_rows(self, course_id, filename, rows):
+    @contextmanager
+    def rows_writer(self, course_id, filename):
+        """
+        Return a context manager for a `ReportWriter` that writes a csv file with
+        the given `course_id` and `filename`, overwriting anything that was
+        there previously.
+
+        The rows are written to a temporary file under `root_path`, which is
+        renamed to the report's filename once the writer is closed without an
+        error, so a partly written report is never seen.
+        """
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        temp_file = NamedTemporaryFile(dir=self.root_path, suffix='.csv.tmp', delete=False)
+        try:
+            yield ReportWriter(temp_file)
+        except Exception:
+            temp_file.close()
+            os.remove(temp_file.name)
+            raise
+        temp_file.close()
+        os.rename(temp_file.name, full_path)
+
+    def read_rows(self, course_id, filename):
         """
-        Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        Return the list of rows stored by `store_rows()` for the given
+        `course_id` and `filename`, or an empty list if there is no such file.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        if not os.path.exists(full_path):
+            return []
+        with open(full_path, "rb") as f:
+            return list(self._get_utf8_decoded_rows(csv.reader(f)))
 
-        self.store(course_id, filename, output_buffer)
+    def delete(self, course_id, filename):
+        """Delete the file stored for the given `course_id` and `filename`, if any."""
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
 
     def links_for(self, course_id):
         """
@@ -415,3 +526,78 @@ class LocalFSReportStore(ReportStore):
             (filename, ("file://" + urllib.quote(full_path)))
             for filename, full_path in files
         ]
+
+
+class ReportWriter(object):
+    """
+    Writes the rows of a report, each an iterable of strings, as CSV to a file,
+    encoding the strings as utf-8.
+    """
+    def __init__(self, output_file):
+        self.csvwriter = csv.writer(output_file)
+
+    def writerow(self, row):
+        """Write one row."""
+        self.csvwriter.writerow([unicode(item).encode('utf-8') for item in row])
+
+    def writerows(self, rows):
+        """Write each of `rows`, which may be any iterable of rows."""
+        for row in rows:
+            self.writerow(row)
+
+
+class S3MultipartFile(object):
+    """
+    A file-like object that uploads what is written to it to an `S3ReportStore`,
+    as a multipart upload of parts of the store's MULTIPART_CHUNK_SIZE bytes.
+
+    The file is written to S3 by `close()`; `cancel()` abandons it instead.
+    """
+    def __init__(self, report_store, course_id, filename):
+        self.report_store = report_store
+        self.course_id = course_id
+        self.filename = filename
+        self.buff = StringIO()
+        self.upload = None
+        self.num_parts = 0
+
+    def write(self, data):
+        """Write `data`, uploading a part if enough has been written."""
+        self.buff.write(data)
+        if self.buff.tell() >= self.report_store.MULTIPART_CHUNK_SIZE:
+            self._upload_part()
+
+    def flush(self):
+        """Nothing to do: parts are uploaded as soon as they're big enough."""
+        pass
+
+    def _upload_part(self):
+        """Upload what has been written since the last part as a new part."""
+        if self.upload is None:
+            key = self.report_store.key_for(self.course_id, self.filename)
+            self.upload = self.report_store.bucket.initiate_multipart_upload(
+                key.key,
+                headers={
+                    "Content-Encoding": "gzip",
+                    "Content-Type": "text/csv",
+                }
+            )
+        self.num_parts += 1
+        self.buff.seek(0)
+        self.upload.upload_part_from_file(self.buff, self.num_parts)
+        self.buff = StringIO()
+
+    def close(self):
+        """Finish writing the file to S3."""
+        if self.upload is None:
+            # It all fit in one part, so there's no need for a multipart upload
+            self.report_store.store(self.course_id, self.filename, self.buff)
+        else:
+            if self.buff.tell() > 0:
+                self._upload_part()
+            self.upload.complete_upload()
+
+    def cancel(self):
+        """Abandon the file, deleting any parts already uploaded."""
+        if self.upload is not None:
+            self.upload.cancel_upload()
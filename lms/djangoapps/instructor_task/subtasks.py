@@ -13,9 +13,10 @@ from celery.states import SUCCESS, READY_STATES, RETRY
 import dogstats_wrapper as dog_stats_api
 
 from django.db import transaction, DatabaseError
+from django.db.models import Count, Sum
 from django.core.cache import cache
 
-from instructor_task.models import InstructorTask, PROGRESS, QUEUING
+from instructor_task.models import InstructorTask, InstructorSubtask, PROGRESS, QUEUING
 
 TASK_LOG = get_task_logger(__name__)
 
@@ -24,6 +25,15 @@ SUBTASK_LOCK_EXPIRE = 60 * 10  # Lock expires in 10 minutes
 # Number of times to retry if a subtask update encounters a lock on the InstructorTask.
 # (These are recursive retries, so don't make this number too large.)
 MAX_DATABASE_LOCK_RETRIES = 5
+# Most seconds between updates of an InstructorTask's progress while its subtasks run.
+SUBTASK_PROGRESS_UPDATE_INTERVAL = 10
+# Number of InstructorSubtask entries to write with each insert.
+SUBTASK_ENTRIES_PER_INSERT = 50
+
+# Counts of a SubtaskStatus that are stored in its InstructorSubtask.
+SUBTASK_COUNTS = ['attempted', 'succeeded', 'failed', 'skipped', 'retried_nomax', 'retried_withmax']
+# Counts of a SubtaskStatus that are summed into the progress of its InstructorTask.
+PROGRESS_COUNTS = ['attempted', 'succeeded', 'failed', 'skipped']
 
 
 class DuplicateTaskException(Exception):
@@ -226,14 +236,13 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
     task_progress messages.
 
     The InstructorTask's "subtasks" field is also initialized.  This is also a JSON-serialized dict.
-    Keys include 'total', 'succeeded', 'retried', 'failed', which are counters for the number of
-    subtasks.  'Total' is set here to the total number, while the other three are initialized to zero.
+    Keys include 'total', 'succeeded', 'failed', which are counters for the number of
+    subtasks.  'Total' is set here to the total number, while the other two are initialized to zero.
     Once the counters for 'succeeded' and 'failed' match the 'total', the subtasks are done and
     the InstructorTask's "status" will be changed to SUCCESS.
 
-    The "subtasks" field also contains a 'status' key, that contains a dict that stores status
-    information for each subtask.  The value for each subtask (keyed by its task_id)
-    is its subtask status, as defined by SubtaskStatus.to_dict().
+    The status of each subtask is stored in an InstructorSubtask entry of its own, which is
+    created here with the subtask's initial status.
 
     This information needs to be set up in the InstructorTask before any of the subtasks start
     running.  If not, there is a chance that the subtasks could complete before the parent task
@@ -259,22 +268,85 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
 
     # Write out the subtasks information.
     num_subtasks = len(subtask_id_list)
-    # Note that may not be necessary to store initial value with all those zeroes!
-    # Write out as a dict, so it will go more smoothly into json.
-    subtask_status = {subtask_id: (SubtaskStatus.create(subtask_id)).to_dict() for subtask_id in subtask_id_list}
     subtask_dict = {
         'total': num_subtasks,
         'succeeded': 0,
         'failed': 0,
-        'status': subtask_status
     }
     entry.subtasks = json.dumps(subtask_dict)
 
-    # and save the entry immediately, before any subtasks actually start work:
+    # and save the entries immediately, before any subtasks actually start work:
+    _create_subtask_entries(entry, subtask_id_list)
     entry.save_now()
     return task_progress
 
 
+@transaction.autocommit
+def _create_subtask_entries(entry, subtask_id_list):
+    """
+    Writes an InstructorSubtask entry with the initial status of each of the subtasks of an
+    InstructorTask, ensuring they are committed.
+    """
+    for start in xrange(0, len(subtask_id_list), SUBTASK_ENTRIES_PER_INSERT):
+        InstructorSubtask.objects.bulk_create([
+            InstructorSubtask(instructor_task=entry, subtask_id=subtask_id, state=QUEUING)
+            for subtask_id in subtask_id_list[start:start + SUBTASK_ENTRIES_PER_INSERT]
+        ])
+
+
+def get_subtask_status(entry_id, subtask_id):
+    """
+    Returns the SubtaskStatus stored for a subtask of an InstructorTask, or None if the
+    InstructorTask has no such subtask.
+    """
+    try:
+        subtask = InstructorSubtask.objects.get(instructor_task__id=entry_id, subtask_id=subtask_id)
+    except InstructorSubtask.DoesNotExist:
+        return None
+    counts = {statname: getattr(subtask, statname) for statname in SUBTASK_COUNTS}
+    return SubtaskStatus.create(subtask_id, state=subtask.state, **counts)
+
+
+def update_progress_from_subtasks(entry):
+    """
+    Updates the progress of an InstructorTask from the status of its subtasks.
+
+    The values for 'attempted', 'succeeded', 'failed', 'skipped' in the InstructorTask's
+    "task_output" field are summed over the subtasks that are done, and the 'duration_ms'
+    value is updated with the current interval since the original InstructorTask started.
+    Note that this value is only approximate, since the subtask may be running on a
+    different server than the original task, so is subject to clock skew.
+
+    The counters for the number of subtasks that have 'succeeded' and 'failed' in the
+    InstructorTask's "subtasks" field are updated too.
+
+    The `entry` is updated in place, but is not saved.  Until one of its subtasks
+    is done, the progress already saved for the InstructorTask is left as it is.
+    """
+    done_subtasks = InstructorSubtask.objects.filter(instructor_task__id=entry.id, state__in=READY_STATES)
+    aggregates = [Sum(statname) for statname in PROGRESS_COUNTS] + [Count('id')]
+    totals = done_subtasks.aggregate(*aggregates)
+    if not totals['id__count']:
+        return
+    num_succeeded = done_subtasks.filter(state=SUCCESS).count()
+
+    task_progress = json.loads(entry.task_output)
+    for statname in PROGRESS_COUNTS:
+        task_progress[statname] = totals[statname + '__sum'] or 0
+
+    # Set the estimate of duration, but only if it
+    # increases.  Clock skew between time() returned by different machines
+    # may result in non-monotonic values for duration.
+    new_duration = int((time() - task_progress['start_time']) * 1000)
+    task_progress['duration_ms'] = max(task_progress['duration_ms'], new_duration)
+    entry.task_output = InstructorTask.create_output_for_success(task_progress)
+
+    subtask_dict = json.loads(entry.subtasks)
+    subtask_dict['succeeded'] = num_succeeded
+    subtask_dict['failed'] = totals['id__count'] - num_succeeded
+    entry.subtasks = json.dumps(subtask_dict)
+
+
 def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_queryset, item_fields, items_per_task):
     """
     Generates and queues subtasks to each execute a chunk of "items" generated by a queryset.
@@ -406,9 +478,8 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         raise DuplicateTaskException(msg)
 
     # Confirm that the InstructorTask knows about this particular subtask.
-    subtask_dict = json.loads(entry.subtasks)
-    subtask_status_info = subtask_dict['status']
-    if current_task_id not in subtask_status_info:
+    subtask_status = get_subtask_status(entry_id, current_task_id)
+    if subtask_status is None:
         format_str = "Unexpected task_id '{}': unable to find status for subtask of instructor task '{}': rejecting task {}"
         msg = format_str.format(current_task_id, entry, new_subtask_status)
         TASK_LOG.warning(msg)
@@ -417,7 +488,6 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
 
     # Confirm that the InstructorTask doesn't think that this subtask has already been
     # performed successfully.
-    subtask_status = SubtaskStatus.from_dict(subtask_status_info[current_task_id])
     subtask_state = subtask_status.state
     if subtask_state in READY_STATES:
         format_str = "Unexpected task_id '{}': already completed - status {} for subtask of instructor task '{}': rejecting task {}"
@@ -453,10 +523,10 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
 
 def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
     """
-    Update the status of the subtask in the parent InstructorTask object tracking its progress.
+    Update the status of the subtask, and the progress of the parent InstructorTask object.
 
-    Because select_for_update is used to lock the InstructorTask object while it is being updated,
-    multiple subtasks updating at the same time may time out while waiting for the lock.
+    Updating the database may time out, for instance if another subtask is saving
+    the parent InstructorTask at the same time.
     The actual update operation is surrounded by a try/except/else that permits the update to be
     retried if the transaction times out.
 
@@ -488,89 +558,73 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 @transaction.commit_manually
 def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     """
-    Update the status of the subtask in the parent InstructorTask object tracking its progress.
+    Update the status of the subtask, and the progress of the parent InstructorTask object.
 
-    Uses select_for_update to lock the InstructorTask object while it is being updated.
-    The operation is surrounded by a try/except/else that permit the manual transaction to be
-    committed on completion, or rolled back on error.
+    The subtask's InstructorSubtask entry is updated with the counts and state of
+    `new_subtask_status`.  Only that entry is written, so subtasks don't wait on each
+    other, or rewrite the status of every other subtask.
 
-    The InstructorTask's "task_output" field is updated.  This is a JSON-serialized dict.
-    Accumulates values for 'attempted', 'succeeded', 'failed', 'skipped' from `new_subtask_status`
-    into the corresponding values in the InstructorTask's task_output.  Also updates the 'duration_ms'
-    value with the current interval since the original InstructorTask started.  Note that this
-    value is only approximate, since the subtask may be running on a different server than the
-    original task, so is subject to clock skew.
-
-    The InstructorTask's "subtasks" field is also updated.  This is also a JSON-serialized dict.
-    Keys include 'total', 'succeeded', 'retried', 'failed', which are counters for the number of
-    subtasks.  'Total' is expected to have been set at the time the subtasks were created.
-    The other three counters are incremented depending on the value of `status`.  Once the counters
-    for 'succeeded' and 'failed' match the 'total', the subtasks are done and the InstructorTask's
-    "status" is changed to SUCCESS.
-
-    The "subtasks" field also contains a 'status' key, that contains a dict that stores status
-    information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
-    is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
-    about failure messages, progress made, etc.
+    The InstructorTask's "task_output" and "subtasks" fields are then brought up to date
+    with the status of all of its subtasks, as described in update_progress_from_subtasks(),
+    when this is the last subtask to be done.  Once all of the subtasks are done, the
+    InstructorTask's "status" is changed to SUCCESS.  While subtasks are still running, the
+    progress is only written at most every SUBTASK_PROGRESS_UPDATE_INTERVAL seconds.  Code
+    that reports the progress of a running task should call update_progress_from_subtasks()
+    itself to get it up to date.
+
+    Each operation is surrounded by a try/except/else that permit the manual transaction to be
+    committed on completion, or rolled back on error.
     """
     TASK_LOG.info("Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
 
     try:
-        entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
-        subtask_dict = json.loads(entry.subtasks)
-        subtask_status_info = subtask_dict['status']
-        if current_task_id not in subtask_status_info:
+        new_counts = {statname: getattr(new_subtask_status, statname) for statname in SUBTASK_COUNTS}
+        num_updated = InstructorSubtask.objects.filter(
+            instructor_task__id=entry_id,
+            subtask_id=current_task_id,
+        ).update(state=new_subtask_status.state, **new_counts)
+        if num_updated == 0:
             # unexpected error -- raise an exception
             format_str = "Unexpected task_id '{}': unable to update status for subtask of instructor task '{}'"
             msg = format_str.format(current_task_id, entry_id)
             TASK_LOG.warning(msg)
             raise ValueError(msg)
+    except Exception:
+        TASK_LOG.exception("Unexpected error while updating InstructorSubtask.")
+        transaction.rollback()
+        dog_stats_api.increment('instructor_task.subtask.update_exception')
+        raise
+    else:
+        transaction.commit()
 
-        # Update status:
-        subtask_status_info[current_task_id] = new_subtask_status.to_dict()
-
-        # Update the parent task progress.
-        # Set the estimate of duration, but only if it
-        # increases.  Clock skew between time() returned by different machines
-        # may result in non-monotonic values for duration.
-        task_progress = json.loads(entry.task_output)
-        start_time = task_progress['start_time']
-        prev_duration = task_progress['duration_ms']
-        new_duration = int((time() - start_time) * 1000)
-        task_progress['duration_ms'] = max(prev_duration, new_duration)
-
-        # Update counts only when subtask is done.
-        # In future, we can make this more responsive by updating status
-        # between retries, by comparing counts that change from previous
-        # retry.
-        new_state = new_subtask_status.state
-        if new_subtask_status is not None and new_state in READY_STATES:
-            for statname in ['attempted', 'succeeded', 'failed', 'skipped']:
-                task_progress[statname] += getattr(new_subtask_status, statname)
-
-        # Figure out if we're actually done (i.e. this is the last task to complete).
-        # This is easier if we just maintain a counter, rather than scanning the
-        # entire new_subtask_status dict.
-        if new_state == SUCCESS:
-            subtask_dict['succeeded'] += 1
-        elif new_state in READY_STATES:
-            subtask_dict['failed'] += 1
-        num_remaining = subtask_dict['total'] - subtask_dict['succeeded'] - subtask_dict['failed']
-
-        # If we're done with the last task, update the parent status to indicate that.
-        # At present, we mark the task as having succeeded.  In future, we should see
-        # if there was a catastrophic failure that occurred, and figure out how to
-        # report that here.
-        if num_remaining <= 0:
-            entry.task_state = SUCCESS
-        entry.subtasks = json.dumps(subtask_dict)
-        entry.task_output = InstructorTask.create_output_for_success(task_progress)
+    # Now that the subtask's status has been committed, a subtask that finishes after
+    # this one will see it.  So if no subtask is left running, this is the last to finish
+    # (or finished at the same time as the last, which updates the InstructorTask the same way).
+    try:
+        if new_subtask_status.state in READY_STATES:
+            is_last = not InstructorSubtask.objects.filter(
+                instructor_task__id=entry_id,
+            ).exclude(state__in=READY_STATES).exists()
+        else:
+            is_last = False
 
-        TASK_LOG.debug("about to save....")
-        entry.save()
-        TASK_LOG.info("Task output updated to %s for subtask %s of instructor task %d",
-                      entry.task_output, current_task_id, entry_id)
+        if is_last:
+            entry = InstructorTask.objects.get(pk=entry_id)
+            update_progress_from_subtasks(entry)
+            entry.task_state = SUCCESS
+            TASK_LOG.debug("about to save....")
+            entry.save()
+            TASK_LOG.info("Task output updated to %s for subtask %s of instructor task %d",
+                          entry.task_output, current_task_id, entry_id)
+        elif cache.add("subtask-progress-{}".format(entry_id), 'true', SUBTASK_PROGRESS_UPDATE_INTERVAL):
+            entry = InstructorTask.objects.get(pk=entry_id)
+            update_progress_from_subtasks(entry)
+            # Don't overwrite the output of a task that the last subtask has just finished.
+            InstructorTask.objects.filter(pk=entry_id, task_state=PROGRESS).update(
+                task_output=entry.task_output,
+                subtasks=entry.subtasks,
+            )
     except Exception:
         TASK_LOG.exception("Unexpected error while updating InstructorTask.")
         transaction.rollback()
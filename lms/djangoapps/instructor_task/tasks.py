@@ -31,6 +31,8 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    grade_students_for_grades_csv,
+    merge_grades_csv,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -140,10 +142,36 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, chunk_task=calculate_grades_csv_chunk)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_chunk(entry_id, chunk_index, student_ids, start_time, subtask_status_dict):
+    """
+    Grade one chunk of the students of a course for a grade report which
+    `calculate_grades_csv` has split into subtasks.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('graded')
+    return grade_students_for_grades_csv(
+        entry_id, chunk_index, student_ids, start_time, subtask_status_dict, action_name,
+        merge_task=merge_grades_csv_chunks
+    )
+
+
+@task(default_retry_delay=60, max_retries=5, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def merge_grades_csv_chunks(entry_id, start_time):
+    """
+    Merge the partial grade reports of the `calculate_grades_csv_chunk`
+    subtasks into the grade report, retrying if that fails.
+    """
+    try:
+        merge_grades_csv(entry_id, start_time)
+    except Exception as exc:  # pylint: disable=broad-except
+        raise merge_grades_csv_chunks.retry(exc=exc)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
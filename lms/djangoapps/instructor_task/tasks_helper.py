@@ -6,14 +6,17 @@ running state of a course.
 import json
 import urllib
 from datetime import datetime
+from itertools import count
 from time import time
 import unicodecsv
 
 from celery import Task, current_task
 from celery.utils.log import get_task_logger
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.storage import DefaultStorage
+from django.core.cache import cache
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
 from pytz import UTC
@@ -28,9 +31,15 @@ from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_analytics.basic import enrolled_students_features
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.basic import iter_enrolled_students_features
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+    SUBTASK_LOCK_EXPIRE,
+)
 from student.models import CourseEnrollment
 
 # define different loggers for use within tasks and on client side
@@ -44,6 +53,9 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# subdirectory of the report store in which grade report subtasks leave their partial CSVs
+GRADE_REPORT_PARTIALS_SUBDIRECTORY = 'partial'
+
 
 class BaseInstructorTask(Task):
     """
@@ -508,7 +520,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
 
     Arguments:
         rows: CSV data in the following format (first column may be a
-            header):
+            header), as any iterable of rows, so it can be a generator:
             [
                 [row1_colum1, row1_colum2, ...],
                 ...
@@ -528,33 +540,19 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     )
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def _grade_students(course_id, students, task_progress, err_rows, current_step=None, status_interval=100):
     """
-    For a given `course_id`, generate a grades CSV file for all students that
-    are enrolled, and store using a `ReportStore`. Once created, the files can
-    be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
+    Grade `students` in the course, counting them in `task_progress`, and yield
+    the grade report rows for them as they are graded. Unless no student could
+    be graded, the first row is the header. The rows for students who couldn't
+    be graded are appended to the list `err_rows` instead, without a header.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    If `current_step` is given, the task state is updated every `status_interval` students.
     """
-    start_time = time()
-    start_date = datetime.now(UTC)
-    status_interval = 100
-    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
-
-    # Loop over all our students and build our CSV lists in memory
     header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
         # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
+        if current_step is not None and task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
         task_progress.attempted += 1
 
@@ -564,7 +562,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             if not header:
                 # Encode the header row in utf-8 encoding in case there are unicode characters
                 header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
-                rows.append(["id", "email", "username", "grade"] + header)
+                yield ["id", "email", "username", "grade"] + header
 
             percents = {
                 section['label']: section.get('percent', 0.0)
@@ -579,27 +577,273 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append([student.id, student.email, student.username, gradeset['percent']] + row_percents)
+            yield [student.id, student.email, student.username, gradeset['percent']] + row_percents
         else:
             # An empty gradeset means we failed to grade a student.
             task_progress.failed += 1
             err_rows.append([student.id, student.username, err_msg])
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
 
-    # Perform the actual upload
+def _upload_grade_report(rows, err_rows, course_id, start_date):
+    """
+    Upload the grade report `rows` and, if there are any, the `err_rows` (w/o header).
+    """
     upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+    # If there are any error rows, write them out as well. If `rows` is a
+    # generator which collects them, they are all there now it has been used up.
+    if err_rows:
+        upload_csv_to_report_store([["id", "username", "error_msg"]] + err_rows, 'grade_report_err', course_id, start_date)
+
+
+def upload_grades_csv(_xmodule_instance_args, entry_id, course_id, _task_input, action_name, chunk_task=None):
+    """
+    For a given `course_id`, generate a grades CSV file for all students that
+    are enrolled, and store using a `ReportStore`. Once created, the files can
+    be accessed by instantiating another `ReportStore` (via
+    `ReportStore.from_config()`) and calling `link_for()` on it. Rows are
+    written out as students are graded, but the files only appear in the
+    ReportStore once they are complete.
+
+    If a `chunk_task` is given and more students are enrolled than
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK, the students are graded by
+    subtasks of `chunk_task` instead (see `queue_grades_csv_subtasks`).
+
+    As we start to add more CSV downloads, it will probably be worthwhile to
+    make a more general CSVDoc class instead of building out the rows like we
+    do here.
+    """
+    start_time = time()
+    start_date = datetime.now(UTC)
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    num_enrolled = enrolled_students.count()
+
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    if chunk_task is not None and students_per_task and num_enrolled > students_per_task:
+        return queue_grades_csv_subtasks(
+            chunk_task, entry_id, enrolled_students, students_per_task, start_time, action_name
+        )
+
+    task_progress = TaskProgress(action_name, num_enrolled, start_time)
+
+    # Grade our students as their rows are written out, so that neither the
+    # students nor their rows are all held in memory at once
+    current_step = {'step': 'Calculating Grades'}
+    err_rows = []
+    rows = _grade_students(course_id, enrolled_students.iterator(), task_progress, err_rows, current_step)
+    _upload_grade_report(rows, err_rows, course_id, start_date)
 
     # One last update before we close out...
+    current_step = {'step': 'Uploading CSVs'}
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _grade_report_partial_filenames(entry_id, chunk_index):
+    """
+    Return the names of the partial grades and errors CSVs of the `chunk_index`th subtask of the task.
+    """
+    return (
+        u"{}_grades_{}.csv".format(entry_id, chunk_index),
+        u"{}_errors_{}.csv".format(entry_id, chunk_index),
+    )
+
+
+def queue_grades_csv_subtasks(chunk_task, entry_id, enrolled_students, students_per_task, start_time, action_name):
+    """
+    Queue subtasks of `chunk_task` which each grade `students_per_task` of the
+    `enrolled_students` and leave their rows in partial CSVs in the report store.
+    The subtask which completes last merges the partial CSVs into the grade report
+    (see `grade_students_for_grades_csv`).
+
+    Each subtask is called with the arguments of `grade_students_for_grades_csv`
+    except for `action_name`, and should just call that.
+
+    Returns the task progress as stored in the InstructorTask, which the
+    subtasks then update as they complete.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, if subtasks have already been defined because this
+    # task was requeued, leave them to it rather than queueing a second set.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its grading subtasks! InstructorTask = %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    # number the subtasks so that the partial CSVs can be merged in enrollment order
+    chunk_indexes = count()
+
+    def _create_grades_csv_subtask(students, initial_subtask_status):
+        """Creates a subtask to grade a given list of students."""
+        return chunk_task.subtask(
+            (
+                entry_id,
+                next(chunk_indexes),
+                [student['pk'] for student in students],
+                start_time,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grades_csv_subtask,
+        enrolled_students.order_by('id'),
+        [],
+        students_per_task,
+    )
+
+
+def grade_students_for_grades_csv(entry_id, chunk_index, student_ids, start_time, subtask_status_dict, action_name,
+                                  merge_task=None):
+    """
+    Grade the students with the given `student_ids` for the grade report of the
+    InstructorTask `entry_id`, and store their rows as partial CSVs in the
+    report store. This is the work of the `chunk_index`th subtask queued by
+    `queue_grades_csv_subtasks`. If the subtask fails, each of its students
+    gets a row in the errors CSV instead.
+
+    The subtask which completes last then merges all the partial CSVs into the
+    grade report, named for `start_time`, the time the grade report was requested,
+    by queueing `merge_task` (see `merge_grades_csv`), or by merging them itself
+    if there is no `merge_task`. Note that the InstructorTask is marked as
+    succeeded as soon as that subtask has updated its status, so the report
+    appears shortly after.
+
+    Returns the subtask status as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    course_id = InstructorTask.objects.get(pk=entry_id).course_id
+    task_progress = TaskProgress(action_name, len(student_ids), time())
+    try:
+        students = User.objects.filter(id__in=student_ids).order_by('id')
+        err_rows = []
+        rows = _grade_students(course_id, students, task_progress, err_rows)
+
+        partials_store = ReportStore.from_config(GRADE_REPORT_PARTIALS_SUBDIRECTORY)
+        grades_filename, errors_filename = _grade_report_partial_filenames(entry_id, chunk_index)
+        partials_store.store_rows(course_id, grades_filename, rows)
+        partials_store.store_rows(course_id, errors_filename, err_rows)
+    except Exception:
+        TASK_LOG.exception(u"Grading subtask %s of instructor task %d failed unexpectedly!", current_task_id, entry_id)
+        # We don't know how many of the students' rows made it out, so count them all as failed.
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        _store_failed_grades_chunk(course_id, entry_id, chunk_index, student_ids)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        _merge_grades_csv_if_done(entry_id, start_time, merge_task)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    _merge_grades_csv_if_done(entry_id, start_time, merge_task)
+
+    # return status in a form that can be serialized by Celery into JSON:
+    return subtask_status.to_dict()
+
+
+def _store_failed_grades_chunk(course_id, entry_id, chunk_index, student_ids):
+    """
+    Replace whatever partial CSVs the failed `chunk_index`th subtask of the
+    InstructorTask `entry_id` stored with an error row for each of its
+    students, so that none of them go missing from the grade report.
+    """
+    partials_store = ReportStore.from_config(GRADE_REPORT_PARTIALS_SUBDIRECTORY)
+    grades_filename, errors_filename = _grade_report_partial_filenames(entry_id, chunk_index)
+    try:
+        usernames = dict(User.objects.filter(id__in=student_ids).values_list('id', 'username'))
+        partials_store.delete(course_id, grades_filename)
+        partials_store.store_rows(course_id, errors_filename, [
+            [student_id, usernames.get(student_id, ''), 'Grading subtask failed'] for student_id in student_ids
+        ])
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(
+            u"Could not report the students of failed grading subtask %d of instructor task %d", chunk_index, entry_id
+        )
+
+
+@transaction.autocommit
+def _merge_grades_csv_if_done(entry_id, start_time, merge_task=None):
+    """
+    If all the subtasks of the InstructorTask `entry_id` have completed, merge
+    their partial CSVs into the grade report, or queue `merge_task` to. A lock
+    makes sure that only one of the subtasks which see them all completed does
+    so. It's released if merging here fails, but left to expire otherwise, as
+    merging again after the partial CSVs are gone would lose the report.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if entry.task_state != SUCCESS:
+        return
+    lock_key = "grades-csv-merge-{}".format(entry_id)
+    # cache.add fails if the key already exists
+    if not cache.add(lock_key, 'true', SUBTASK_LOCK_EXPIRE):
+        return
+
+    if merge_task is not None:
+        # the merge task retries by itself if merging fails
+        merge_task.delay(entry_id, start_time)
+        return
+    try:
+        merge_grades_csv(entry_id, start_time)
+    except Exception:
+        cache.delete(lock_key)
+        raise
+
+
+def merge_grades_csv(entry_id, start_time):
+    """
+    Merge the partial CSVs of the completed subtasks of the InstructorTask
+    `entry_id` into the grade report, named for `start_time`, then delete them.
+    Merging may be retried until the partial CSVs have been deleted.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    partials_store = ReportStore.from_config(GRADE_REPORT_PARTIALS_SUBDIRECTORY)
+    num_chunks = json.loads(entry.subtasks)['total']
+    err_rows = []
+    rows = _merged_grade_rows(partials_store, course_id, entry_id, num_chunks, err_rows)
+    _upload_grade_report(rows, err_rows, course_id, datetime.fromtimestamp(start_time, UTC))
+
+    # The report is complete; so, don't fail (and retry) if some partial CSVs can't be deleted.
+    for chunk_index in xrange(num_chunks):
+        for filename in _grade_report_partial_filenames(entry_id, chunk_index):
+            try:
+                partials_store.delete(course_id, filename)
+            except Exception:  # pylint: disable=broad-except
+                TASK_LOG.exception(u"Could not delete partial grade report %s of instructor task %d", filename, entry_id)
+
+
+def _merged_grade_rows(partials_store, course_id, entry_id, num_chunks, err_rows):
+    """
+    Yield the rows of the partial grades CSVs of the `num_chunks` subtasks of
+    the InstructorTask `entry_id`, under a single header, reading one partial
+    CSV at a time. The rows of the partial errors CSVs are appended to the list
+    `err_rows`.
+    """
+    header = None
+    for chunk_index in xrange(num_chunks):
+        grades_filename, errors_filename = _grade_report_partial_filenames(entry_id, chunk_index)
+        chunk_rows = partials_store.read_rows(course_id, grades_filename)
+        if chunk_rows:
+            chunk_header, chunk_rows = chunk_rows[0], chunk_rows[1:]
+            if header is None:
+                header = chunk_header
+                yield header
+            if chunk_header != header:
+                # As when grading in one task, the first header applies to every row,
+                # with 0.0 for any section a student's gradeset didn't have.
+                for row in chunk_rows:
+                    percents = dict(zip(chunk_header[4:], row[4:]))
+                    row[4:] = [percents.get(label, 0.0) for label in header[4:]]
+            for row in chunk_rows:
+                yield row
+        err_rows.extend(partials_store.read_rows(course_id, errors_filename))
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -612,22 +856,22 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     current_step = {'step': 'Calculating Profile Info'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # compute the student features table and format it
+    # compute the student features table as it is uploaded
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
+    student_data = iter_enrolled_students_features(course_id, query_features)
 
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
+    def _rows():
+        """Yield the header, then a row for each student, counting them."""
+        yield query_features
+        for student_dict in student_data:
+            task_progress.attempted += 1
+            task_progress.succeeded += 1
+            yield [student_dict[feature] for feature in query_features if feature in student_dict]
 
-    rows.insert(0, header)
+    upload_csv_to_report_store(_rows(), 'student_profile_info', course_id, start_date)
+    task_progress.skipped = task_progress.total - task_progress.attempted
 
     current_step = {'step': 'Uploading CSV'}
-    task_progress.update_task_state(extra_meta=current_step)
-
-    # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
-
     return task_progress.update_task_state(extra_meta=current_step)
 
 
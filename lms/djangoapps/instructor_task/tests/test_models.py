@@ -3,9 +3,11 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
 import mock
 import time
 from datetime import datetime
+from uuid import uuid4
 from unittest import TestCase
 
 from instructor_task.models import LocalFSReportStore, S3ReportStore
@@ -23,6 +25,7 @@ class MockKey(object):
 
     def set_contents_from_string(self, contents, headers):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
+        self.contents = contents
         self.bucket.store_key(self)
 
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
@@ -30,10 +33,35 @@ class MockKey(object):
         return "http://fake-edx-s3.edx.org/"
 
 
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, bucket, key_name):
+        self.bucket = bucket
+        self.key_name = key_name
+        self.parts = []
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        assert part_num == len(self.parts) + 1
+        self.parts.append(fp.read())
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        key = MockKey(self.bucket)
+        key.key = self.key_name
+        key.contents = ''.join(self.parts)
+        self.bucket.store_key(key)
+
+    def cancel_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts = None
+
+
 class MockBucket(object):
     """ Mocking a boto S3 Bucket object. """
     def __init__(self, _name):
         self.keys = []
+        self.uploads = []
 
     def store_key(self, key):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
@@ -43,6 +71,12 @@ class MockBucket(object):
         """ Expected method on a Bucket object. """
         return self.keys
 
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        upload = MockMultiPartUpload(self, key_name)
+        self.uploads.append(upload)
+        return upload
+
 
 class MockS3Connection(object):
     """ Mocking a boto S3 Connection """
@@ -84,6 +118,22 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows_from_generator(self):
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', ([i, u'r\xe9sum\xe9'] for i in xrange(3)))
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+
+    def test_rows_writer_error(self):
+        """
+        Test that nothing is stored if writing the rows fails part way.
+        """
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            with report_store.rows_writer(self.course_id, 'report.csv') as writer:
+                writer.writerow(['a', 'b'])
+                raise ValueError()
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
@@ -93,6 +143,12 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_read_rows(self):
+        report_store = self.create_report_store()
+        rows = [[u'id', u'name'], [u'1', u'r\xe9sum\xe9']]
+        report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+        self.assertEqual(report_store.read_rows(self.course_id, 'report.csv'), rows)
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +161,31 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config()
+
+    def test_multipart_upload(self):
+        report_store = self.create_report_store()
+        report_store.MULTIPART_CHUNK_SIZE = 1000
+        # random enough that the compressed rows span several parts
+        rows = [[i, uuid4().hex, u'r\xe9sum\xe9'] for i in xrange(2000)]
+        report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+
+        upload, = report_store.bucket.uploads
+        self.assertGreater(len(upload.parts), 1)
+        key, = report_store.bucket.keys
+        self.assertEqual(key.key, report_store.key_for(self.course_id, 'report.csv').key)
+        contents = GzipFile(fileobj=StringIO(key.contents), mode="rb").read()
+        self.assertEqual(
+            contents,
+            ''.join(u'{},{},{}\r\n'.format(*row).encode('utf-8') for row in rows)
+        )
+
+    def test_multipart_upload_error(self):
+        report_store = self.create_report_store()
+        report_store.MULTIPART_CHUNK_SIZE = 1000
+        with self.assertRaises(ValueError):
+            with report_store.rows_writer(self.course_id, 'report.csv') as writer:
+                writer.writerows([i, uuid4().hex] for i in xrange(2000))
+                raise ValueError()
+        upload, = report_store.bucket.uploads
+        self.assertIsNone(upload.parts)
+        self.assertEqual(report_store.bucket.keys, [])
@@ -1,13 +1,23 @@
 """
 Unit tests for instructor_task subtasks.
 """
+import json
 from uuid import uuid4
 
+from celery.states import SUCCESS, FAILURE, RETRY
+from django.core.cache import cache
 from mock import Mock, patch
 
 from student.models import CourseEnrollment
 
-from instructor_task.subtasks import queue_subtasks_for_query
+from instructor_task.models import InstructorTask, InstructorSubtask, PROGRESS
+from instructor_task.subtasks import (
+    queue_subtasks_for_query,
+    initialize_subtask_info,
+    update_subtask_status,
+    get_subtask_status,
+    SubtaskStatus,
+)
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase
 
@@ -79,3 +89,68 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+
+class TestSubtaskStatus(InstructorTaskCourseTestCase):
+    """Tests for tracking the status of subtasks."""
+
+    def setUp(self):
+        super(TestSubtaskStatus, self).setUp()
+        self.initialize_course()
+        cache.clear()
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='bulk_course_email',
+        )
+        self.subtask_ids = ['subtask-1', 'subtask-2', 'subtask-3']
+        initialize_subtask_info(self.entry, 'emailed', 30, self.subtask_ids)
+
+    def _get_entry(self):
+        """Reload the InstructorTask."""
+        return InstructorTask.objects.get(pk=self.entry.id)
+
+    def test_initialize_subtask_info(self):
+        subtasks = InstructorSubtask.objects.filter(instructor_task=self.entry)
+        self.assertEqual(sorted(subtask.subtask_id for subtask in subtasks), self.subtask_ids)
+        entry = self._get_entry()
+        self.assertEqual(entry.task_state, PROGRESS)
+        self.assertEqual(json.loads(entry.subtasks), {'total': 3, 'succeeded': 0, 'failed': 0})
+        self.assertIsNone(get_subtask_status(self.entry.id, 'bogus-subtask'))
+
+    def test_update_subtask_status(self):
+        new_status = SubtaskStatus.create('subtask-1', state=RETRY, succeeded=4, retried_nomax=1)
+        update_subtask_status(self.entry.id, 'subtask-1', new_status)
+        self.assertEqual(get_subtask_status(self.entry.id, 'subtask-1').to_dict(), new_status.to_dict())
+
+    def test_last_subtask_completes_task(self):
+        update_subtask_status(self.entry.id, 'subtask-1', SubtaskStatus.create('subtask-1', state=SUCCESS, succeeded=10))
+        update_subtask_status(self.entry.id, 'subtask-2', SubtaskStatus.create('subtask-2', state=FAILURE, failed=10))
+        self.assertEqual(self._get_entry().task_state, PROGRESS)
+        update_subtask_status(
+            self.entry.id, 'subtask-3', SubtaskStatus.create('subtask-3', state=SUCCESS, succeeded=8, skipped=2)
+        )
+
+        entry = self._get_entry()
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks), {'total': 3, 'succeeded': 2, 'failed': 1})
+        task_output = json.loads(entry.task_output)
+        self.assertEqual(task_output['attempted'], 28)
+        self.assertEqual(task_output['succeeded'], 18)
+        self.assertEqual(task_output['failed'], 10)
+        self.assertEqual(task_output['skipped'], 2)
+        self.assertEqual(task_output['total'], 30)
+
+    def test_progress_updated_periodically(self):
+        update_subtask_status(self.entry.id, 'subtask-1', SubtaskStatus.create('subtask-1', state=SUCCESS, succeeded=10))
+        self.assertEqual(json.loads(self._get_entry().task_output)['succeeded'], 10)
+
+        # within the update interval, the InstructorTask isn't written to
+        with patch('instructor_task.subtasks.InstructorTask.save') as mock_task_save:
+            update_subtask_status(self.entry.id, 'subtask-2', SubtaskStatus.create('subtask-2', state=SUCCESS, succeeded=10))
+            self.assertFalse(mock_task_save.called)
+        entry = self._get_entry()
+        self.assertEqual(json.loads(entry.task_output)['succeeded'], 10)
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 1)
+        self.assertEqual(get_subtask_status(self.entry.id, 'subtask-2').succeeded, 10)
@@ -5,14 +5,25 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+from functools import partial
 from mock import Mock, patch
 import tempfile
 
+from celery.states import SUCCESS
+from django.test.utils import override_settings
 from xmodule.modulestore.tests.factories import CourseFactory
 
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
-from instructor_task.models import ReportStore
-from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task import tasks_helper
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks_helper import (
+    cohort_students_and_upload,
+    grade_students_for_grades_csv,
+    upload_grades_csv,
+    upload_students_csv,
+    GRADE_REPORT_PARTIALS_SUBDIRECTORY,
+)
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin
 
 
@@ -57,6 +68,95 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         report_store = ReportStore.from_config()
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_grading_in_subtasks(self):
+        """
+        Test that grading in subtasks produces the same report as grading in one task.
+        """
+        for i in range(5):
+            self.create_student('student{0}'.format(i))
+        report_store = ReportStore.from_config()
+        with patch('instructor_task.tasks_helper._get_current_task'):
+            upload_grades_csv(None, None, self.course.id, None, 'graded')
+        report_filename = report_store.links_for(self.course.id)[0][0]
+        expected_rows = report_store.read_rows(self.course.id, report_filename)
+        report_store.delete(self.course.id, report_filename)
+
+        # run the subtasks right away, rather than queueing them
+        chunk_task = Mock()
+        chunk_task.subtask.side_effect = lambda args, **kwargs: Mock(
+            apply_async=partial(grade_students_for_grades_csv, *args, action_name='graded')
+        )
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course', task_id='grading')
+        result = upload_grades_csv(None, entry.id, self.course.id, None, 'graded', chunk_task=chunk_task)
+
+        self.assertEqual(chunk_task.subtask.call_count, 3)
+        self.assertEqual(result['total'], 5)
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(report_store.read_rows(self.course.id, report_store.links_for(self.course.id)[0][0]), expected_rows)
+        # and the partial CSVs are gone
+        partials_store = ReportStore.from_config(GRADE_REPORT_PARTIALS_SUBDIRECTORY)
+        self.assertEqual(partials_store.links_for(self.course.id), [])
+
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_failed_subtask_students_in_errors(self):
+        """
+        Test that the students of a grading subtask which fails are in the
+        errors CSV, and the rest in the grade report.
+        """
+        for i in range(4):
+            self.create_student('student{0}'.format(i))
+        grade_students = tasks_helper._grade_students  # pylint: disable=protected-access
+
+        def grade_students_failing(course_id, students, *args, **kwargs):
+            """Fail for the chunk with student0"""
+            if students[0].username == 'student0':
+                raise Exception('grading failed')
+            return grade_students(course_id, students, *args, **kwargs)
+
+        def run_chunk(args):
+            """Run a subtask right away, ignoring its failure as celery would"""
+            try:
+                grade_students_for_grades_csv(*args, action_name='graded')
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+        chunk_task = Mock()
+        chunk_task.subtask.side_effect = lambda args, **kwargs: Mock(apply_async=partial(run_chunk, args))
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course', task_id='grading')
+        with patch('instructor_task.tasks_helper._grade_students', side_effect=grade_students_failing):
+            upload_grades_csv(None, entry.id, self.course.id, None, 'graded', chunk_task=chunk_task)
+
+        report_store = ReportStore.from_config()
+        filenames = [filename for filename, __ in report_store.links_for(self.course.id)]
+        errors_filename = [filename for filename in filenames if '_grade_report_err_' in filename][0]
+        grades_filename = [filename for filename in filenames if filename != errors_filename][0]
+        grade_rows = report_store.read_rows(self.course.id, grades_filename)
+        error_rows = report_store.read_rows(self.course.id, errors_filename)
+        self.assertEqual([row[1] for row in grade_rows[1:]], ['student2', 'student3'])
+        self.assertEqual([row[1] for row in error_rows[1:]], ['student0', 'student1'])
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_merge_task_queued_once(self):
+        """
+        Test that the subtask which completes last queues the merge task, rather than merging itself.
+        """
+        for i in range(3):
+            self.create_student('student{0}'.format(i))
+        merge_task = Mock()
+        chunk_task = Mock()
+        chunk_task.subtask.side_effect = lambda args, **kwargs: Mock(
+            apply_async=partial(grade_students_for_grades_csv, *args, action_name='graded', merge_task=merge_task)
+        )
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course', task_id='grading')
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded', chunk_task=chunk_task)
+
+        self.assertEqual(merge_task.delay.call_count, 1)
+        self.assertEqual(merge_task.delay.call_args[0][0], entry.id)
+        self.assertEqual(ReportStore.from_config().links_for(self.course.id), [])
+
 
 @ddt.ddt
 class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
@@ -1,25 +1,40 @@
 """
 Serializer for video outline
 """
-from rest_framework.reverse import reverse
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from pytz import UTC
 
 from courseware.access import has_access
+from opaque_keys.edx.keys import UsageKey
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.search import course_version
 
 from edxval.api import (
     get_video_info_for_course_and_profile, ValInternalError
 )
 
+# Seconds to cache a course version's outline for. Since VAL doesn't change the
+# course version, new encodings of videos show up in outlines after this long.
+OUTLINE_CACHE_TIMEOUT = 60 * 60
+
 
 class BlockOutline(object):
     """
     Serializes course videos, pulling data from VAL and the video modules.
+
+    The outline is the same for every user, and its URLs are relative to the
+    site. Iterating over it gives (access, item) pairs, where item is the
+    outline of one block and access holds the block fields that decide who
+    may load it; see `filter_outline`.
     """
-    def __init__(self, course_id, start_block, categories_to_outliner, request):
+    def __init__(self, course_id, start_block, categories_to_outliner):
         """Create a BlockOutline using `start_block` as a starting point."""
         self.start_block = start_block
         self.categories_to_outliner = categories_to_outliner
         self.course_id = course_id
-        self.request = request  # needed for making full URLS
         self.local_cache = {}
         try:
             self.local_cache['course_videos'] = get_video_info_for_course_and_profile(
@@ -29,61 +44,25 @@ class BlockOutline(object):
             self.local_cache['course_videos'] = {}
 
     def __iter__(self):
-        child_to_parent = {}
-        stack = [self.start_block]
-
-        # path should be optional
-        def path(block):
-            """path for block"""
-            block_path = []
-            while block in child_to_parent:
-                block = child_to_parent[block]
-                if block is not self.start_block:
-                    block_path.append({
-                        # to be consistent with other edx-platform clients, return the defaulted display name
-                        'name': block.display_name_with_default,
-                        'category': block.category,
-                        'id': unicode(block.location)
-                    })
-            return reversed(block_path)
-
-        def find_urls(block):
-            """section and unit urls for block"""
-            block_path = []
-            while block in child_to_parent:
-                block = child_to_parent[block]
-                block_path.append(block)
-
-            course, chapter, section, unit = list(reversed(block_path))[:4]
-            position = 1
-            unit_name = unit.url_name
-            for block in section.children:
-                if block.name == unit_name:
-                    break
-                position += 1
+        # Each block on the stack comes with its ancestors below the start
+        # block, and each ancestor with its position among its parent's children
+        stack = [(self.start_block, ())]
 
+        def find_urls(ancestors):
+            """section and unit urls for a block with the given ancestors"""
+            (chapter, _), (section, _), (_, position) = ancestors[:3]
             kwargs = dict(
-                course_id=course.id.to_deprecated_string(),
+                course_id=self.course_id.to_deprecated_string(),
                 chapter=chapter.url_name,
                 section=section.url_name
             )
-            section_url = reverse(
-                "courseware_section",
-                kwargs=kwargs,
-                request=self.request,
-            )
+            section_url = reverse("courseware_section", kwargs=kwargs)
             kwargs['position'] = position
-            unit_url = reverse(
-                "courseware_position",
-                kwargs=kwargs,
-                request=self.request,
-            )
-            return unit_url, section_url, block_path
-
-        user = self.request.user
+            unit_url = reverse("courseware_position", kwargs=kwargs)
+            return unit_url, section_url
 
         while stack:
-            curr_block = stack.pop()
+            curr_block, ancestors = stack.pop()
 
             if curr_block.hide_from_toc:
                 # For now, if the 'hide_from_toc' setting is set on the block, do not traverse down
@@ -95,28 +74,93 @@ class BlockOutline(object):
                 continue
 
             if curr_block.category in self.categories_to_outliner:
-                if not has_access(user, 'load', curr_block, course_key=self.course_id):
-                    continue
-
                 summary_fn = self.categories_to_outliner[curr_block.category]
-                block_path = list(path(curr_block))
-                unit_url, section_url, _ = find_urls(curr_block)
-
-                yield {
+                block_path = [
+                    {
+                        # to be consistent with other edx-platform clients, return the defaulted display name
+                        'name': block.display_name_with_default,
+                        'category': block.category,
+                        'id': unicode(block.location)
+                    }
+                    for block, _ in ancestors
+                ]
+                unit_url, section_url = find_urls(ancestors)
+
+                access = {
+                    'location': unicode(curr_block.location),
+                    'visible_to_staff_only': curr_block.visible_to_staff_only,
+                    'start': curr_block.start,
+                }
+                yield access, {
                     "path": block_path,
                     "named_path": [b["name"] for b in block_path[:-1]],
                     "unit_url": unit_url,
                     "section_url": section_url,
-                    "summary": summary_fn(self.course_id, curr_block, self.request, self.local_cache)
+                    "summary": summary_fn(self.course_id, curr_block, self.local_cache)
                 }
 
             if curr_block.has_children:
+                positions = dict(
+                    (child.name, position) for position, child in enumerate(curr_block.children, 1)
+                )
                 for block in reversed(curr_block.get_children()):
-                    stack.append(block)
-                    child_to_parent[block] = curr_block
+                    stack.append((block, ancestors + ((block, positions.get(block.location.name)),)))
 
 
-def video_summary(course, course_id, video_descriptor, request, local_cache):
+def video_outline(course, request, categories_to_outliner):
+    """
+    Return the outline of the course's videos that the requesting user may load.
+
+    The outline of each version of the course is cached, so the course tree is
+    only walked when the course has changed.
+    """
+    version = course_version(course)
+    cache_key = u'mobile_api.video_outline.{}.{}'.format(course.id, version)
+    outline = cache.get(cache_key) if version is not None else None
+    if outline is None:
+        course_tree = modulestore().get_course(course.id, depth=None)
+        outline = list(BlockOutline(course.id, course_tree, categories_to_outliner))
+        if version is not None:
+            cache.set(cache_key, outline, OUTLINE_CACHE_TIMEOUT)
+    return filter_outline(course.id, outline, request)
+
+
+def filter_outline(course_id, outline, request):
+    """
+    Return the items of a BlockOutline that the requesting user may load, with
+    full URLs.
+    """
+    user = request.user
+    now = datetime.now(UTC)
+    items = []
+    for access, item in outline:
+        # Anyone may load a block that isn't staff only, once it has started.
+        # Otherwise it depends on the user, so load the block to check.
+        if access['visible_to_staff_only'] or (access['start'] is not None and access['start'] >= now):
+            block = modulestore().get_item(UsageKey.from_string(access['location']))
+            if not has_access(user, 'load', block, course_key=course_id):
+                continue
+        items.append(_absolute_urls(item, request))
+    return items
+
+
+def _absolute_urls(item, request):
+    """
+    Return a copy of an outline item with full URLs rather than ones relative to the site.
+    """
+    item = dict(item)
+    item['unit_url'] = request.build_absolute_uri(item['unit_url'])
+    item['section_url'] = request.build_absolute_uri(item['section_url'])
+    if 'transcripts' in item['summary']:
+        item['summary'] = dict(item['summary'])
+        item['summary']['transcripts'] = {
+            lang: request.build_absolute_uri(url)
+            for lang, url in item['summary']['transcripts'].iteritems()
+        }
+    return item
+
+
+def video_summary(course, course_id, video_descriptor, local_cache):
     """
     returns summary dict for the given video module
     """
@@ -145,7 +189,6 @@ def video_summary(course, course_id, video_descriptor, request, local_cache):
                 'block_id': video_descriptor.scope_ids.usage_id.block_id,
                 'lang': lang
             },
-            request=request,
         )
         for lang in transcript_langs
     }
@@ -3,6 +3,7 @@ Tests for video outline API
 """
 import copy
 import ddt
+from datetime import datetime, timedelta
 from uuid import uuid4
 from collections import namedtuple
 
@@ -10,9 +11,11 @@ from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
 from django.conf import settings
 from edxval import api
+from mock import patch
+from pytz import UTC
 from rest_framework.test import APITestCase
 
-from courseware.tests.factories import UserFactory
+from courseware.tests.factories import UserFactory, StaffFactory
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.video_module import transcripts_utils
@@ -20,6 +23,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.django import modulestore
 
 from mobile_api.tests import ROLE_CASES
+from mobile_api.video_outlines.serializers import BlockOutline
 
 TEST_DATA_CONTENTSTORE = copy.deepcopy(settings.CONTENTSTORE)
 TEST_DATA_CONTENTSTORE['DOC_STORE_CONFIG']['db'] = 'test_xcontent_%s' % uuid4().hex
@@ -296,6 +300,37 @@ class TestVideoOutline(ModuleStoreTestCase, APITestCase):
                 set(case.expected_transcripts)
             )
 
+    def test_outline_cached(self):
+        self._create_video_with_subs()
+        with patch('mobile_api.video_outlines.serializers.BlockOutline', wraps=BlockOutline) as mock_outline:
+            self.assertEqual(len(self._get_video_summary_list()), 1)
+            self.assertEqual(len(self._get_video_summary_list()), 1)
+            self.assertEqual(mock_outline.call_count, 1)
+
+            # changing the course makes a new outline
+            ItemFactory.create(
+                parent_location=self.other_unit.location,
+                category="video",
+                display_name=u"test video omega 2 \u03a9",
+                html5_sources=[self.html5_video_url]
+            )
+            self.assertEqual(len(self._get_video_summary_list()), 2)
+            self.assertEqual(mock_outline.call_count, 2)
+
+    def test_outline_access_checked_per_user(self):
+        self._create_video_with_subs()
+        ItemFactory.create(
+            parent_location=self.other_unit.location,
+            category="video",
+            display_name=u"test future video omega \u03a9",
+            start=datetime.now(UTC) + timedelta(days=7),
+        )
+        self.assertEqual(len(self._get_video_summary_list()), 1)
+
+        staff = StaffFactory.create(course_key=self.course.id)
+        self.client.login(username=staff.username, password='test')
+        self.assertEqual(len(self._get_video_summary_list()), 2)
+
     def test_transcripts_detail(self):
         video = self._create_video_with_subs()
         kwargs = {
@@ -22,7 +22,7 @@ from xmodule.modulestore.django import modulestore
 
 from mobile_api.utils import mobile_available_when_enrolled
 
-from .serializers import BlockOutline, video_summary
+from .serializers import video_outline, video_summary
 
 
 class VideoSummaryList(generics.ListAPIView):
@@ -85,15 +85,9 @@ class VideoSummaryList(generics.ListAPIView):
         course_id = CourseKey.from_string(kwargs['course_id'])
         course = get_mobile_course(course_id, request.user)
 
-        video_outline = list(
-            BlockOutline(
-                course_id,
-                course,
-                {"video": partial(video_summary, course)},
-                request,
-            )
+        return Response(
+            video_outline(course, request, {"video": partial(video_summary, course)})
         )
-        return Response(video_outline)
 
 
 class VideoTranscripts(generics.RetrieveAPIView):
@@ -139,7 +133,7 @@ def get_mobile_course(course_id, user):
     Return only a CourseDescriptor if the course is mobile-ready or if the
     requesting user is a staff member.
     """
-    course = modulestore().get_course(course_id, depth=None)
+    course = modulestore().get_course(course_id)
     if mobile_available_when_enrolled(course, user):
         return course
 
@@ -56,6 +56,11 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# Number of keep-alive connections each process holds open to the comments
+# service, and number of comments service calls a view may make at once
+COMMENTS_SERVICE_POOL_SIZE = 10
+COMMENTS_SERVICE_CONCURRENCY = 4
+
 
 # Features
 FEATURES = {
@@ -581,6 +586,16 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# The total number of blocks split's process-wide cache of course structures may hold (0 disables it)
+SPLIT_STRUCTURE_CACHE_MAX_BLOCKS = 50000
+
+# Assets too big for memcached are kept in the directory ROOT, up to MAX_BYTES
+# in all, and served from there. Set ROOT to enable.
+ASSET_DISK_CACHE = {
+    'ROOT': None,
+    'MAX_BYTES': 2 * 1024 * 1024 * 1024,
+}
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -1360,6 +1375,11 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of connections to the mail server that each bulk email task sends
+# over at once.  With a single connection, each email waits for the one
+# before it to be accepted.
+BULK_EMAIL_SEND_CONNECTIONS = 1
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -1503,6 +1523,9 @@ INSTALLED_APPS = (
     # Course action state
     'course_action_state',
 
+    # Summaries of courses for the dashboard and course catalog
+    'course_summary',
+
     # Additional problem types
     'edx_jsme',    # Molecular Structure
 
@@ -1594,6 +1617,10 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# If set, grade reports for courses with more enrolled students than this
+# are split into subtasks which each grade this many students.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = None
+
 ######################## PROGRESS SUCCESS BUTTON ##############################
 # The following fields are available in the URL: {course_id} {student_id}
 PROGRESS_SUCCESS_BUTTON_URL = 'http://<domain>/<path>/{course_id}'
@@ -1891,3 +1918,8 @@ COURSE_CATALOG_VISIBILITY_PERMISSION = 'see_exists'
 # which access.py permission name to check in order to determine if a course about page is
 # visible. We default this to the legacy permission 'see_exists'.
 COURSE_ABOUT_VISIBILITY_PERMISSION = 'see_exists'
+
+# How many seconds the course catalog caches the list of all course ids for.
+# The list is also forgotten whenever a course is created, in the default cache
+# of the process creating it, so the CMS has to share that cache with the LMS.
+COURSE_SUMMARY_IDS_TIMEOUT = 300
@@ -125,6 +125,9 @@ STATICFILES_DIRS += [
 STATICFILES_STORAGE = 'pipeline.storage.NonPackagingPipelineStorage'
 PIPELINE_ENABLED = False
 
+# The structure cache outlives each test's modulestore, so it would change the mongo call counts tests expect
+SPLIT_STRUCTURE_CACHE_MAX_BLOCKS = 0
+
 update_module_store_settings(
     MODULESTORE,
     module_store_options={
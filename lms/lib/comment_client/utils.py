@@ -1,10 +1,16 @@
 from contextlib import contextmanager
+from cookielib import DefaultCookiePolicy
 import dogstats_wrapper as dog_stats_api
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 from django.conf import settings
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
 log = logging.getLogger(__name__)
@@ -50,6 +56,97 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+class RejectCookiesPolicy(DefaultCookiePolicy):
+    """
+    A cookie policy which accepts no cookies, so that the session, which makes
+    the requests of every user, never sends one user's cookies for another.
+    """
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+_session = None
+_pool = None
+_pid = None
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """
+    Drop the session and thread pool if they were made in another process, since
+    forked workers can't share their connections, and don't inherit their threads.
+
+    Must be called with the lock held.
+    """
+    global _session, _pool, _pid
+    if _pid != os.getpid():
+        _session = None
+        _pool = None
+        _pid = os.getpid()
+
+
+def get_session():
+    """
+    Return this process's requests.Session for the comments service, which
+    keeps up to settings.COMMENTS_SERVICE_POOL_SIZE connections alive, and no cookies.
+    """
+    global _session
+    with _lock:
+        _reset_after_fork()
+        if _session is None:
+            pool_size = getattr(settings, "COMMENTS_SERVICE_POOL_SIZE", 10)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.cookies.set_policy(RejectCookiesPolicy())
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def _get_pool():
+    """
+    Return this process's pool of settings.COMMENTS_SERVICE_CONCURRENCY threads.
+    """
+    global _pool
+    with _lock:
+        _reset_after_fork()
+        if _pool is None:
+            _pool = ThreadPool(getattr(settings, "COMMENTS_SERVICE_CONCURRENCY", 4))
+        return _pool
+
+
+def _call_in_language(language, func):
+    """
+    Call func with language active, since the language is set per thread, and is
+    sent to the comments service.
+    """
+    translation.activate(language)
+    try:
+        return func()
+    finally:
+        translation.deactivate()
+
+
+def perform_concurrently(*funcs):
+    """
+    Call each of funcs, functions without arguments that make independent
+    comments service requests, at the same time, and return a list of their results.
+    If any of them raises an exception, the first one is raised.
+
+    funcs are called in other threads, so they shouldn't use the database, or
+    anything else which is kept per thread besides the language.
+    """
+    if len(funcs) < 2:
+        return [func() for func in funcs]
+    language = get_language()
+    results = [_get_pool().apply_async(_call_in_language, (language, func)) for func in funcs]
+    return [result.get() for result in results]
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
 
@@ -76,7 +173,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,